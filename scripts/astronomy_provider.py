@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+带 LRU 缓存的天文特征提供者
+按 (地点, 日期, 分辨率) 缓存一整天的特征包, 重叠日期不再重复计算;
+命中/未命中计数用于观察夜间构建的节省情况
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+from compute_astronomy import (
+    LOCATION, EPHEMERIS, TIDE_INDEX, moon_illumination_array, tide_level_array,
+    get_moon_phase_name, _utc_isoformat
+)
+from darkness import is_dark
+
+class AstronomyProvider:
+    """
+    天文特征包的有界 LRU 缓存
+    特征包 = 当天按 resolution_minutes 划分的时间网格上的月照度/潮位/近低潮/夜间/暗夜数组,
+    加上当天的日出日落和高低潮时刻
+    """
+
+    def __init__(self, location=LOCATION, ephemeris=EPHEMERIS, maxsize=1024):
+        self.location = location
+        self.ephemeris = ephemeris
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, day, resolution_minutes):
+        return (self.location.latitude, self.location.longitude, day, resolution_minutes)
+
+    def day_bundle(self, day, resolution_minutes=180):
+        """某日 (UTC) 的特征包, 优先取缓存"""
+        if isinstance(day, datetime):
+            day = day.date()
+        key = self._key(day, resolution_minutes)
+
+        bundle = self._cache.get(key)
+        if bundle is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return bundle
+
+        self.misses += 1
+        bundle = self._compute_bundle(day, resolution_minutes)
+        self._cache[key] = bundle
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return bundle
+
+    def _compute_bundle(self, day, resolution_minutes):
+        day_start = np.datetime64(day, "s")
+        times = day_start + np.arange(0, 24 * 60, resolution_minutes).astype("timedelta64[m]")
+
+        eph = self.ephemeris.lookup(day_start)
+        high_times, low_times = TIDE_INDEX.events_between(day_start, day_start + np.timedelta64(1, "D"))
+
+        return {
+            "date": day,
+            "resolution_minutes": resolution_minutes,
+            "times": times,
+            "moon_illumination": moon_illumination_array(times),
+            "tide_level": tide_level_array(times),
+            "near_low_tide": TIDE_INDEX.near_low_tide(times, window_hours=2),
+            "is_night": self.ephemeris.is_night(times),
+            "is_dark": is_dark(times, self.location.latitude, self.location.longitude),
+            "sun": {
+                "sunrise": _utc_isoformat(eph["sunrise"]),
+                "sunset": _utc_isoformat(eph["sunset"]),
+                "noon": _utc_isoformat(eph["noon"])
+            },
+            "high_tide_times": [t.isoformat() for t in high_times.astype(datetime)][:2],
+            "low_tide_times": [t.isoformat() for t in low_times.astype(datetime)][:2]
+        }
+
+    def grid(self, days, resolution_minutes=180):
+        """多日网格特征, 各数组按日期顺序拼接"""
+        bundles = [self.day_bundle(day, resolution_minutes) for day in days]
+        fields = ("times", "moon_illumination", "tide_level", "near_low_tide", "is_night", "is_dark")
+        if not bundles:
+            return {field: np.empty(0) for field in fields}
+        return {field: np.concatenate([b[field] for b in bundles]) for field in fields}
+
+    def features(self, dt, resolution_minutes=180):
+        """
+        某时刻的天文特征 (格式同 compute_astronomy_features)
+        时刻落在网格上时直接取缓存值, 否则只对该时刻做向量化计算
+        """
+        bundle = self.day_bundle(dt, resolution_minutes)
+        t = np.datetime64(dt, "s")
+        offset = (t - bundle["times"][0]).astype(np.int64)
+        step = resolution_minutes * 60
+
+        if offset % step == 0:
+            i = offset // step
+            moon_illum = float(bundle["moon_illumination"][i])
+            tide_level = float(bundle["tide_level"][i])
+            near_low_tide = bool(bundle["near_low_tide"][i])
+        else:
+            moon_illum = float(moon_illumination_array(t))
+            tide_level = float(tide_level_array(t))
+            near_low_tide = TIDE_INDEX.near_low_tide(t, window_hours=2)
+
+        return {
+            "date": dt.isoformat(),
+            "sun": dict(bundle["sun"]),
+            "moon": {
+                "illumination": round(moon_illum, 3),
+                "phase_name": get_moon_phase_name(moon_illum),
+                "is_dark_night": moon_illum < 0.3
+            },
+            "tide": {
+                "high_tide_times": list(bundle["high_tide_times"]),
+                "low_tide_times": list(bundle["low_tide_times"]),
+                "current_level": round(tide_level, 3),
+                "near_low_tide": near_low_tide
+            }
+        }
+
+    def cache_info(self):
+        """缓存统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.maxsize
+        }
+
+    def report(self):
+        """打印缓存命中情况"""
+        info = self.cache_info()
+        print(f"   🗃️  Astronomy cache: {info['hits']} hits / {info['misses']} misses "
+              f"({info['hit_rate'] * 100:.0f}% hit rate, {info['size']}/{info['maxsize']} days)")
+
+# 进程内共享的默认实例
+ASTRONOMY = AstronomyProvider()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+批量评分 - 整个日期/时段网格只构建一个特征矩阵, 只调用一次 predict_proba
+避免逐行 1×6 调用 sklearn 的固定开销; 特征矩阵由 features.feature_matrix 构建
+"""
+
+import numpy as np
+from features import feature_matrix
+
+def predict_matrix(model, X):
+    """
+    (N, F) 特征矩阵一次性预测
+    返回: 类别1(高可能)的概率数组, 长度 N
+    """
+    if len(X) == 0:
+        return np.empty(0, dtype=float)
+    return model.predict_proba(X)[:, 1]
+
+def predict_columns(model, feature_cols, columns):
+    """
+    按列给出的特征一次性预测 (列名 → 可广播的同形数组, 如 站点×时刻)
+    返回: 与广播后形状相同的概率数组
+    """
+    shape = np.broadcast_shapes(*(np.shape(columns[col]) for col in feature_cols))
+    return predict_matrix(model, feature_matrix(columns, feature_cols)).reshape(shape)
+
+def probabilities_to_scores(probs):
+    """概率 → 0-100 整数评分 (与 int(prob * 100) 一致)"""
+    return (np.asarray(probs, dtype=float) * 100).astype(int)
+
+def rate_score(score):
+    """评分 → (评级, 图标)"""
+    if score >= 70:
+        return "Excellent", "🌟"
+    elif score >= 50:
+        return "Good", "✨"
+    elif score >= 30:
+        return "Fair", "💫"
+    else:
+        return "Poor", "⭐"
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+日内 × 年积日 气候态网格 - (变量, 366, 24) float32 二进制 + JSON 头
+由 compute_climatology 一次扫描构建 (逐格平均后做环形平滑);
+查询是纯数组索引, 不再按字符串 DOY 查字典
+"""
+
+import os
+import json
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+GRID_FILE = os.path.join(ROOT, "data", "climatology_grid.f32")
+HEADER_FILE = os.path.join(ROOT, "data", "climatology_grid.json")
+
+# 网格变量及缺省值 (与 climatology.json 的 <变量>_doy 对应)
+GRID_VARIABLES = {"wave_height": 1.0, "water_temp": 16.0}
+# 环形平滑半宽: 年积日 ±7 天, 小时 ±1 小时
+SMOOTH_DOY_DAYS = 7
+SMOOTH_HOURS = 1
+
+def _circular_box_sum(a, half_width, axis):
+    """沿某轴的环形滑动窗口求和 (窗口宽 2·half_width + 1)"""
+    return sum(np.roll(a, shift, axis=axis) for shift in range(-half_width, half_width + 1))
+
+class GridAccumulator:
+    """
+    逐格 (DOY × 小时) 求和/计数, 可分批更新 (内存固定)
+    finalize 时先对和与计数分别做环形平滑再相除, 稀疏格子自然得到邻近格子的加权平均
+    """
+
+    def __init__(self, variables=GRID_VARIABLES):
+        self.variables = dict(variables)
+        shape = (len(self.variables), 366, 24)
+        self.sums = np.zeros(shape)
+        self.counts = np.zeros(shape)
+
+    def update(self, timestamps, columns):
+        """timestamps: datetime64 数组; columns: {变量: 值数组} (NaN 忽略)"""
+        t = np.asarray(timestamps, dtype="datetime64[s]")
+        doy = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(np.int64)
+        hour = (t - t.astype("datetime64[D]")).astype(np.int64) // 3600
+        cell = doy * 24 + hour
+        for i, var in enumerate(self.variables):
+            if var not in columns:
+                continue
+            values = np.asarray(columns[var], dtype=float)
+            ok = ~np.isnan(values)
+            self.sums[i] += np.bincount(cell[ok], weights=values[ok], minlength=366 * 24).reshape(366, 24)
+            self.counts[i] += np.bincount(cell[ok], minlength=366 * 24).reshape(366, 24)
+        return self
+
+    def finalize(self, smooth_days=SMOOTH_DOY_DAYS, smooth_hours=SMOOTH_HOURS):
+        """平滑后的网格 (变量, 366, 24) float32; 仍为空的格子沿 DOY 环形插值, 全空用缺省值"""
+        sums = _circular_box_sum(_circular_box_sum(self.sums, smooth_days, 1), smooth_hours, 2)
+        counts = _circular_box_sum(_circular_box_sum(self.counts, smooth_days, 1), smooth_hours, 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid = sums / counts
+
+        doy = np.arange(366)
+        for i, default in enumerate(self.variables.values()):
+            for h in range(24):
+                col = grid[i, :, h]
+                known = ~np.isnan(col)
+                if not known.any():
+                    continue
+                col[~known] = np.interp(doy[~known], doy[known], col[known], period=366)
+            # 完全没有数据的小时: 用同一天其他小时的平均; 整个变量都没有数据: 缺省值
+            if np.isnan(grid[i]).all():
+                grid[i] = default
+            else:
+                daily = np.nanmean(grid[i], axis=1)
+                grid[i] = np.where(np.isnan(grid[i]), daily[:, None], grid[i])
+        return grid.astype(np.float32)
+
+class ClimatologyGrid:
+    """
+    (变量, 366, 24) 气候态网格的查询
+    lookup(变量, doy, hour) / at(变量, 时刻数组) 都是数组索引, 可直接用于整个预测网格
+    """
+
+    def __init__(self, values, variables, source="grid"):
+        self.values = values
+        self.variables = list(variables)
+        self.source = source
+        self._index = {var: i for i, var in enumerate(self.variables)}
+
+    @classmethod
+    def load(cls, grid_file=GRID_FILE, header_file=HEADER_FILE):
+        """内存映射读取二进制网格"""
+        with open(header_file, "r") as f:
+            header = json.load(f)
+        values = np.memmap(grid_file, dtype=header["dtype"], mode="r", shape=tuple(header["shape"]))
+        return cls(values, header["variables"], source="grid")
+
+    def lookup(self, variable, doy, hour):
+        """doy: 1-366, hour: 0-23 (标量或数组)"""
+        return self.values[self._index[variable], np.asarray(doy) - 1, np.asarray(hour)]
+
+    def at(self, variable, times):
+        """任意时刻数组 (UTC) 的气候态值"""
+        t = np.asarray(times, dtype="datetime64[s]")
+        doy = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(np.int64) + 1
+        hour = (t - t.astype("datetime64[D]")).astype(np.int64) // 3600
+        return self.lookup(variable, doy, hour)
+
+def write_grid(grid, variables=GRID_VARIABLES, metadata=None,
+               grid_file=GRID_FILE, header_file=HEADER_FILE):
+    """写入 float32 二进制网格 (小端) 和 JSON 头"""
+    grid = np.ascontiguousarray(grid, dtype="<f4")
+    os.makedirs(os.path.dirname(grid_file), exist_ok=True)
+    grid.tofile(grid_file)
+    header = {
+        "file": os.path.basename(grid_file),
+        "dtype": "<f4",
+        "shape": list(grid.shape),
+        "axes": ["variable", "day_of_year (1-366)", "hour_utc (0-23)"],
+        "variables": list(variables),
+        "smoothing": {"doy_half_width_days": SMOOTH_DOY_DAYS, "hour_half_width": SMOOTH_HOURS},
+        **(metadata or {})
+    }
+    with open(header_file, "w") as f:
+        json.dump(header, f, indent=2)
+    return grid_file
+
+def load_climatology_grid(fallback):
+    """有二进制网格时内存映射读取, 否则返回 fallback (通常为逐日的 ClimatologyTable)"""
+    if os.path.exists(GRID_FILE) and os.path.exists(HEADER_FILE):
+        return ClimatologyGrid.load()
+    return fallback
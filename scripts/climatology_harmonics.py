@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+谐波气候态 - 年周期 + 半年周期 (+ 日周期) 的低阶傅里叶拟合
+只保存系数; 任意时刻数组的气候态是一个闭式向量化表达式, 不再按 DOY 查表
+拟合用法方程 (XᵀX, Xᵀy) 累加, 可分批更新、跨文件相加合并
+"""
+
+import os
+import numpy as np
+from dotenv import dotenv_values
+from climatology_grid import GRID_VARIABLES, load_climatology_grid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CFG = {**dotenv_values(os.path.join(ROOT, "config", ".env"))}
+
+# 气候态来源: daily (DOY 中位值, 默认) / grid (日内×年积日网格) / harmonic (谐波系数)
+# harmonic 缺少系数时回退到 grid, grid 缺少文件时回退到 daily (回退时给出警告)
+CLIMATOLOGY_MODEL = (CFG.get("CLIMATOLOGY_MODEL") or "daily").strip().lower()
+
+# 回归年 (天); 相位以 Unix 纪元 (1970-01-01 00:00 UTC) 为零点
+YEAR_DAYS = 365.2422
+# 谐波项: 名称 → (每天的圈数)
+HARMONIC_TERMS = {
+    "annual": 1.0 / YEAR_DAYS,
+    "semiannual": 2.0 / YEAR_DAYS,
+    "diurnal": 1.0,
+}
+# 日周期项至少需要多少个不同的整点小时有数据 (日报数据不拟合日周期)
+MIN_DIURNAL_HOURS = 12
+
+def _days(times):
+    """datetime64 数组 → 自纪元起的天数 (float)"""
+    t = np.asarray(times, dtype="datetime64[s]")
+    return t.astype(np.int64) / 86400.0
+
+def design_matrix(times, terms=HARMONIC_TERMS):
+    """设计矩阵: [1, cos, sin, cos, sin, ...], 形状 (n, 1 + 2·谐波项数)"""
+    days = _days(times)
+    columns = [np.ones_like(days)]
+    for cycles_per_day in terms.values():
+        phase = 2 * np.pi * cycles_per_day * days
+        columns += [np.cos(phase), np.sin(phase)]
+    return np.stack(columns, axis=-1)
+
+class HarmonicAccumulator:
+    """
+    逐变量累加法方程 XᵀX / Xᵀy / yᵀy 和每小时样本数
+    update 可分批调用; 两个累加器的数组直接相加即可合并
+    """
+
+    def __init__(self, variables=GRID_VARIABLES):
+        self.variables = dict(variables)
+        k = 1 + 2 * len(HARMONIC_TERMS)
+        self.xtx = np.zeros((len(self.variables), k, k))
+        self.xty = np.zeros((len(self.variables), k))
+        self.yty = np.zeros(len(self.variables))
+        self.hours = np.zeros((len(self.variables), 24))
+
+    def update(self, timestamps, columns):
+        """timestamps: datetime64 数组; columns: {变量: 值数组} (NaN 忽略)"""
+        t = np.asarray(timestamps, dtype="datetime64[s]")
+        x = design_matrix(t)
+        hour = (t - t.astype("datetime64[D]")).astype(np.int64) // 3600
+        for i, var in enumerate(self.variables):
+            if var not in columns:
+                continue
+            values = np.asarray(columns[var], dtype=float)
+            ok = ~np.isnan(values)
+            xv, yv = x[ok], values[ok]
+            self.xtx[i] += xv.T @ xv
+            self.xty[i] += xv.T @ yv
+            self.yty[i] += yv @ yv
+            self.hours[i] += np.bincount(hour[ok], minlength=24)
+        return self
+
+    def merge(self, other):
+        self.xtx += other.xtx
+        self.xty += other.xty
+        self.yty += other.yty
+        self.hours += other.hours
+        return self
+
+    def to_arrays(self):
+        """持久化用的累加量 (可直接传给 np.savez)"""
+        return {"xtx": self.xtx, "xty": self.xty, "yty": self.yty, "hours": self.hours}
+
+    @classmethod
+    def from_arrays(cls, xtx, xty, yty, hours, variables=GRID_VARIABLES):
+        acc = cls(variables)
+        acc.xtx, acc.xty, acc.yty, acc.hours = xtx, xty, yty, hours
+        return acc
+
+    def finalize(self, min_diurnal_hours=MIN_DIURNAL_HOURS):
+        """
+        解法方程 → 可写入 climatology.json 的系数
+        没有数据的变量不输出 (查询时用缺省值); 小时覆盖不足时不拟合日周期项
+        """
+        names = list(HARMONIC_TERMS)
+        fitted = {}
+        for i, var in enumerate(self.variables):
+            n = self.xtx[i, 0, 0]
+            if n == 0:
+                continue
+            diurnal = int((self.hours[i] > 0).sum()) >= min_diurnal_hours
+            keep = np.arange(self.xtx.shape[1])
+            if not diurnal:
+                keep = keep[:-2]
+            xtx, xty = self.xtx[i][np.ix_(keep, keep)], self.xty[i][keep]
+            beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+            # 残差平方和: yᵀy - 2βᵀXᵀy + βᵀXᵀXβ
+            sse = max(self.yty[i] - 2 * beta @ xty + beta @ xtx @ beta, 0.0)
+
+            coef = {"mean": round(float(beta[0]), 4)}
+            for j, name in enumerate(names):
+                pair = beta[1 + 2 * j: 3 + 2 * j]
+                coef[name] = [round(float(c), 4) for c in pair] if len(pair) == 2 else None
+            coef["samples"] = int(n)
+            coef["rmse"] = round(float(np.sqrt(sse / n)), 4)
+            fitted[var] = coef
+
+        return {
+            "epoch": "1970-01-01T00:00:00Z",
+            "year_days": YEAR_DAYS,
+            "terms": dict(HARMONIC_TERMS),
+            "variables": fitted
+        }
+
+class HarmonicClimatology:
+    """
+    谐波系数 → 任意时刻的气候态
+    at(变量, 时刻数组) 为闭式向量化计算, 与 ClimatologyGrid.at 接口相同
+    """
+
+    def __init__(self, harmonics, defaults=GRID_VARIABLES):
+        self.terms = dict(harmonics.get("terms", HARMONIC_TERMS))
+        self.variables = harmonics.get("variables", {})
+        self.defaults = dict(defaults)
+        self.source = "harmonic"
+
+    def at(self, variable, times):
+        """任意时刻数组 (UTC) 的气候态值"""
+        days = _days(times)
+        coef = self.variables.get(variable)
+        if coef is None:
+            return np.full(days.shape, float(self.defaults.get(variable, np.nan)))
+        out = np.full(days.shape, float(coef["mean"]))
+        for name, cycles_per_day in self.terms.items():
+            if coef.get(name) is None:
+                continue
+            a, b = coef[name]
+            phase = 2 * np.pi * cycles_per_day * days
+            out += a * np.cos(phase) + b * np.sin(phase)
+        return out
+
+# 已警告过的 (配置, 实际使用) 组合
+_FALLBACK_WARNED = set()
+
+def _warn_fallback(model, reason, used):
+    """配置的气候态来源不可用时警告一次"""
+    if (model, used) not in _FALLBACK_WARNED:
+        _FALLBACK_WARNED.add((model, used))
+        print(f"⚠️  CLIMATOLOGY_MODEL={model}: {reason}, using {used} "
+              f"(build it with python scripts/compute_climatology.py)")
+
+def load_climatology_model(table, model=CLIMATOLOGY_MODEL):
+    """
+    按配置选择气候态来源, 返回带 at(变量, 时刻数组) 的对象
+    table: ClimatologyTable; harmonic 用其中的谐波系数, grid 用二进制网格, daily 直接用 table
+    """
+    if model == "daily":
+        return table
+    if model == "harmonic":
+        if table.harmonics:
+            return HarmonicClimatology(table.harmonics)
+        grid = load_climatology_grid(None)
+        _warn_fallback(model, "no harmonic coefficients in data/climatology.json",
+                       "daily" if grid is None else "grid")
+        return table if grid is None else grid
+    grid = load_climatology_grid(None)
+    if grid is None:
+        _warn_fallback(model, "climatology grid not built", "daily")
+        return table
+    return grid
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+气候态查询表 - climatology.json 一次性载入为连续 NumPy 数组
+<变量>_doy 字典 → (变量, 366) float64 数组, 季节默认值 → (变量, 4) 数组;
+查询是数组索引 (标量或整个网格), 不再把 DOY 转成字符串查字典
+二进制旁车文件 climatology.npz 与 JSON 同目录, JSON 未变化时直接读取
+"""
+
+import os
+import json
+import numpy as np
+from climatology_grid import GRID_VARIABLES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CLIM_FILE = os.path.join(ROOT, "data", "climatology.json")
+
+# 季节默认值的顺序 (与 compute_climatology.get_season 一致)
+SEASONS = ("winter", "spring", "summer", "fall")
+# 月份 (1-12) → SEASONS 下标
+MONTH_SEASON = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+def sidecar_path(json_file):
+    """JSON 对应的二进制旁车文件路径 (同名 .npz)"""
+    return os.path.splitext(json_file)[0] + ".npz"
+
+class ClimatologyTable:
+    """
+    气候态数组表
+    daily: (变量, 366) — 按 DOY; values 为其在小时维上的广播视图 (变量, 366, 24), 不复制
+    seasonal: {名称: 长度 4 的数组, 顺序见 SEASONS}
+    harmonics / metadata: climatology.json 中对应的原始字典
+    """
+
+    def __init__(self, daily, variables, seasonal=None, harmonics=None, metadata=None):
+        self.daily = np.ascontiguousarray(daily, dtype=float)
+        self.values = np.broadcast_to(self.daily[:, :, None], self.daily.shape + (24,))
+        self.variables = list(variables)
+        self.seasonal = dict(seasonal or {})
+        self.harmonics = harmonics or None
+        self.metadata = metadata or {}
+        self.source = "daily"
+        self._index = {var: i for i, var in enumerate(self.variables)}
+
+    @classmethod
+    def from_dict(cls, clim, variables=GRID_VARIABLES):
+        """由 climatology.json 的内容构建; 缺失的 DOY 用变量缺省值"""
+        daily = np.empty((len(variables), 366))
+        for i, (var, default) in enumerate(variables.items()):
+            doy = clim.get(f"{var}_doy", {})
+            daily[i] = [float(doy.get(str(d), default)) for d in range(1, 367)]
+        seasonal = {
+            key: np.array([float(by_season[s]) for s in SEASONS])
+            for key, by_season in clim.get("seasonal_defaults", {}).items()
+        }
+        return cls(daily, variables, seasonal, clim.get("harmonics"), clim.get("metadata"))
+
+    @classmethod
+    def from_json(cls, json_file=CLIM_FILE):
+        with open(json_file, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def save_sidecar(self, sidecar_file, json_file):
+        """写入二进制旁车文件, 记录源 JSON 的修改时间用于判断是否过期"""
+        extras = {"harmonics": self.harmonics, "metadata": self.metadata}
+        np.savez(
+            sidecar_file,
+            daily=self.daily,
+            variables=np.array(self.variables),
+            seasonal_keys=np.array(list(self.seasonal)),
+            seasonal=np.array([self.seasonal[k] for k in self.seasonal]).reshape(-1, len(SEASONS)),
+            extras=np.array(json.dumps(extras)),
+            source_mtime_ns=np.array(os.stat(json_file).st_mtime_ns)
+        )
+        return sidecar_file
+
+    @classmethod
+    def load(cls, json_file=CLIM_FILE, sidecar_file=None):
+        """
+        载入气候态: 旁车文件与 JSON 一致时直接读取数组, 否则解析 JSON 并重写旁车文件
+        """
+        sidecar_file = sidecar_file or sidecar_path(json_file)
+        mtime_ns = os.stat(json_file).st_mtime_ns
+        if os.path.exists(sidecar_file):
+            with np.load(sidecar_file) as data:
+                if int(data["source_mtime_ns"]) == mtime_ns:
+                    extras = json.loads(str(data["extras"]))
+                    seasonal = dict(zip(data["seasonal_keys"].tolist(), data["seasonal"]))
+                    return cls(data["daily"], data["variables"].tolist(), seasonal,
+                               extras["harmonics"], extras["metadata"])
+
+        table = cls.from_json(json_file)
+        try:
+            table.save_sidecar(sidecar_file, json_file)
+        except OSError as e:
+            print(f"⚠️  Could not write {sidecar_file}: {e}")
+        return table
+
+    def lookup(self, doy, hour=0):
+        """
+        doy: 1-366, hour: 0-23 (标量或可广播的数组)
+        返回: {变量: 数组}
+        """
+        doy = np.asarray(doy) - 1
+        hour = np.asarray(hour)
+        return {var: self.values[i, doy, hour] for i, var in enumerate(self.variables)}
+
+    def at(self, variable, times):
+        """任意时刻数组 (UTC) 的气候态值 (与 ClimatologyGrid.at 接口相同)"""
+        t = np.asarray(times, dtype="datetime64[s]")
+        doy = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(np.int64)
+        hour = (t - t.astype("datetime64[D]")).astype(np.int64) // 3600
+        return self.values[self._index[variable], doy, hour]
+
+    def seasonal_at(self, key, months):
+        """季节默认值 (如 sst / chla) 按月份 (1-12, 标量或数组) 取值"""
+        return self.seasonal[key][MONTH_SEASON[np.asarray(months)]]
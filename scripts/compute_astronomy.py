@@ -7,11 +7,13 @@
 import os
 import json
 import math
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, timedelta, timezone
 from astral import LocationInfo
-from astral.sun import sun
-from astral.moon import phase
 from dotenv import dotenv_values
+from tide_harmonics import HarmonicTidePredictor
+from ephemeris import Ephemeris
+from lunar_ephemeris import illuminated_fraction
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CFG = {**dotenv_values(os.path.join(ROOT, "config", ".env"))}
@@ -21,16 +23,81 @@ LAT = float(CFG.get("LAT_MIN", 32.86))
 LON = float(CFG.get("LON_MIN", -117.26))
 LOCATION = LocationInfo("La Jolla", "USA", "America/Los_Angeles", LAT, LON)
 
+# 预计算历表 (日出日落/晨昏蒙影/月相), 见 ephemeris.py
+EPHEMERIS = Ephemeris(LAT, LON)
+
+# M2潮汐周期 (12小时25分钟)
+M2_PERIOD_HOURS = 12.42
+
+# 参考时间: 2024-01-01 00:00 UTC 为高潮
+# (这是简化假设，实际需要调和常数)
+M2_REFERENCE = datetime(2024, 1, 1, 0, 0)
+
+# 潮汐模型: "m2" (单一余弦, 默认) 或 "harmonic" (Scripps Pier 多分潮调和预测)
+TIDE_MODEL = (CFG.get("TIDE_MODEL") or "m2").strip().lower()
+HARMONIC_TIDES = HarmonicTidePredictor() if TIDE_MODEL == "harmonic" else None
+
+# 月照度模型: "phase" (由 astral 月相线性换算, 与训练数据一致, 默认)
+# 或 "meeus" (Meeus 被照亮比例, 见 lunar_ephemeris.py)
+MOON_MODEL = (CFG.get("MOON_MODEL") or "phase").strip().lower()
+
 def moon_illumination(date):
     """
     计算月照度 (0-1)
     0 = 新月(暗), 1 = 满月(亮)
     """
-    # astral.moon.phase 返回月相角度 (0-28天周期)
-    moon_phase_value = phase(date)
-    # 转换为照度: 满月在phase=14附近
-    illumination = 1.0 - abs(moon_phase_value - 14) / 14.0
-    return max(0.0, min(1.0, illumination))
+    return float(moon_illumination_array(date))
+
+def _as_datetime64(times):
+    """任意时间输入 → datetime64[s] 数组 (naive, 与标量函数一样按UTC处理)"""
+    return np.asarray(times, dtype="datetime64[s]")
+
+def julian_day_array(times):
+    """
+    向量化儒略日 (与 astral.julian.julianday 一致, 含日内秒数)
+    """
+    t = _as_datetime64(times)
+    days = t.astype("datetime64[D]")
+    seconds = (t - days).astype(np.int64)
+    return days.astype(np.int64) + 2440587.5 + seconds / (24 * 60 * 60)
+
+def moon_phase_array(times):
+    """
+    向量化月相 (0-28), 逐元素复现 astral.moon.phase
+    """
+    jd = julian_day_array(times)
+    dt = (jd - 2382148) ** 2 / (41048480 * 86400)
+    t = (jd + dt - 2451545.0) / 36525
+    t2 = t ** 2
+    t3 = t ** 3
+
+    d = 297.85 + (445267.1115 * t) - (0.0016300 * t2) + (t3 / 545868)
+    d = np.radians(d % 360.0)
+
+    m = 357.53 + (35999.0503 * t)
+    m = np.radians(m % 360.0)
+
+    m1 = 134.96 + (477198.8676 * t) + (0.0089970 * t2) + (t3 / 69699)
+    m1 = np.radians(m1 % 360.0)
+
+    elong = np.degrees(d) + 6.29 * np.sin(m1)
+    elong -= 2.10 * np.sin(m)
+    elong += 1.27 * np.sin(2 * d - m1)
+    elong += 0.66 * np.sin(2 * d)
+    elong = np.floor(elong % 360.0)
+    moon = ((elong + 6.43) / 360) * 28
+    return np.where(moon >= 28.0, moon - 28.0, moon)
+
+def moon_illumination_array(times):
+    """
+    向量化月照度 (0-1), 输入 datetime64 数组
+    phase 模型: 月相 (0-28) 线性换算, 满月在 phase=14 附近
+    """
+    if MOON_MODEL == "meeus":
+        return illuminated_fraction(times)
+    moon_phase_value = moon_phase_array(times)
+    illumination = 1.0 - np.abs(moon_phase_value - 14) / 14.0
+    return np.clip(illumination, 0.0, 1.0)
 
 def is_dark_night(date):
     """
@@ -51,37 +118,26 @@ def compute_tides(date):
         "current_level": float  # -1.0 (低潮) 至 1.0 (高潮)
     }
     """
-    # M2潮汐周期 (12小时25分钟)
-    M2_PERIOD_HOURS = 12.42
-    
-    # 参考时间: 2024-01-01 00:00 UTC 为高潮
-    # (这是简化假设，实际需要调和常数)
-    reference = datetime(2024, 1, 1, 0, 0)
-    hours_since_ref = (date - reference).total_seconds() / 3600
-    
-    # M2相位 (0-2π)
-    phase_m2 = (hours_since_ref / M2_PERIOD_HOURS) * 2 * math.pi
-    
-    # 潮位 (-1 至 1)
-    tide_level = math.cos(phase_m2)
-    
-    # 计算当天的高低潮时间
-    day_start = datetime(date.year, date.month, date.day, 0, 0)
-    tide_times = {"high": [], "low": []}
-    
-    for hour_offset in range(0, 26):  # 24小时+余量
-        t = day_start + timedelta(hours=hour_offset * M2_PERIOD_HOURS / 2)
-        if t.day != date.day:
-            continue
+    if HARMONIC_TIDES is not None:
+        # 调和模型: 归一化潮位 (-1 至 1)
+        tide_level = float(HARMONIC_TIDES.normalized_level(date))
+    else:
+        reference = M2_REFERENCE
+        hours_since_ref = (date - reference).total_seconds() / 3600
         
-        hrs = (t - reference).total_seconds() / 3600
-        phase = (hrs / M2_PERIOD_HOURS) * 2 * math.pi
-        level = math.cos(phase)
+        # M2相位 (0-2π)
+        phase_m2 = (hours_since_ref / M2_PERIOD_HOURS) * 2 * math.pi
         
-        if hour_offset % 2 == 0:
-            tide_times["high"].append(t.isoformat())
-        else:
-            tide_times["low"].append(t.isoformat())
+        # 潮位 (-1 至 1)
+        tide_level = math.cos(phase_m2)
+    
+    # 当天的高低潮时间 (直接查闭式潮汐事件索引)
+    day_start = datetime(date.year, date.month, date.day, 0, 0)
+    high_times, low_times = TIDE_INDEX.events_between(day_start, day_start + timedelta(days=1))
+    tide_times = {
+        "high": [t.isoformat() for t in high_times.astype(datetime)],
+        "low": [t.isoformat() for t in low_times.astype(datetime)]
+    }
     
     return {
         "high_tide_times": tide_times["high"][:2],  # 每天约2次高潮
@@ -89,41 +145,180 @@ def compute_tides(date):
         "current_level": float(tide_level)
     }
 
+def tide_level_array(times):
+    """
+    向量化潮位 (-1 至 1), 输入 datetime64 数组
+    结果与 compute_tides(date)["current_level"] 逐元素一致
+    """
+    if HARMONIC_TIDES is not None:
+        return HARMONIC_TIDES.normalized_level(times)
+    
+    hours_since_ref = (
+        (_as_datetime64(times) - np.datetime64(M2_REFERENCE, "s")).astype(np.int64) / 3600
+    )
+    phase_m2 = (hours_since_ref / M2_PERIOD_HOURS) * 2 * math.pi
+    return np.cos(phase_m2)
+
+class TideEventIndex:
+    """
+    高/低潮时刻的预计算排序索引, 查询用 searchsorted 二分完成
+    M2 余弦模型的极值是闭式的: 高潮在参考时刻 + k·T, 低潮在 + (k+½)·T;
+    调和模型的极值由 HarmonicTidePredictor.extrema 一次扫描得到
+    查询超出覆盖范围时按整年惰性扩展 (与 ephemeris 按年构建缺失年份相同); 无 builder 时报错
+    """
+
+    def __init__(self, high_times, low_times, start, end, builder=None):
+        self.start = np.datetime64(start, "s")
+        self.end = np.datetime64(end, "s")
+        self.high_times = np.sort(np.asarray(high_times, dtype="datetime64[s]"))
+        self.low_times = np.sort(np.asarray(low_times, dtype="datetime64[s]"))
+        # builder(start, end) → 覆盖该范围的 TideEventIndex, 用于扩展
+        self.builder = builder
+
+    @classmethod
+    def from_m2(cls, start, end):
+        """M2 余弦模型的闭式事件索引"""
+        half_period_s = int(round(M2_PERIOD_HOURS * 3600 / 2))
+        reference = np.datetime64(M2_REFERENCE, "s")
+        start64 = np.datetime64(start, "s")
+        end64 = np.datetime64(end, "s")
+        
+        # 覆盖 [start, end] 的半周期序号 (多留一个事件作边界余量)
+        k0 = int(np.floor((start64 - reference).astype(np.int64) / half_period_s)) - 1
+        k1 = int(np.ceil((end64 - reference).astype(np.int64) / half_period_s)) + 1
+        k = np.arange(k0, k1 + 1, dtype=np.int64)
+        
+        event_times = reference + (k * half_period_s).astype("timedelta64[s]")
+        is_low = (k % 2) == 1
+        return cls(event_times[~is_low], event_times[is_low], start64, end64, builder=cls.from_m2)
+
+    @classmethod
+    def from_harmonic(cls, predictor, start, end, step_minutes=30):
+        """调和模型的事件索引 (两端各多扫一天作边界余量)"""
+        margin = np.timedelta64(1, "D")
+        start64 = np.datetime64(start, "s")
+        end64 = np.datetime64(end, "s")
+        high_times, _, low_times, _ = predictor.extrema(
+            start64 - margin, end64 + margin, step_minutes=step_minutes
+        )
+        builder = lambda s, e: cls.from_harmonic(predictor, s, e, step_minutes)
+        return cls(high_times, low_times, start64, end64, builder=builder)
+
+    def _extend(self, start, end):
+        """
+        把覆盖范围扩展到 [start, end]
+        已有范围内的事件保留; 扩展一侧的旧边界余量事件由新构建的范围外事件替换, 不重复
+        """
+        keep_high = np.ones(self.high_times.shape, dtype=bool)
+        keep_low = np.ones(self.low_times.shape, dtype=bool)
+        highs, lows = [], []
+        for s, e, outside in ((start, self.start, lambda t: t < self.start),
+                              (self.end, end, lambda t: t > self.end)):
+            if s >= e:
+                continue
+            keep_high &= ~outside(self.high_times)
+            keep_low &= ~outside(self.low_times)
+            extra = self.builder(s, e)
+            highs.append(extra.high_times[outside(extra.high_times)])
+            lows.append(extra.low_times[outside(extra.low_times)])
+        self.high_times = np.sort(np.concatenate([self.high_times[keep_high], *highs]))
+        self.low_times = np.sort(np.concatenate([self.low_times[keep_low], *lows]))
+        self.start = min(self.start, start)
+        self.end = max(self.end, end)
+
+    def _check_range(self, times):
+        if not times.size or (times.min() >= self.start and times.max() <= self.end):
+            return
+        if self.builder is None:
+            raise ValueError(
+                f"Query outside tide index span {self.start} → {self.end}; "
+                "build a TideEventIndex covering the requested dates"
+            )
+        # 以整年为单位扩展, 同一年内的后续查询不再扩展
+        first = int(times.min().astype("datetime64[Y]").astype(np.int64)) + 1970
+        last = int(times.max().astype("datetime64[Y]").astype(np.int64)) + 1970
+        print(f"🌊 Extending tide event index to cover {first}-{last}...")
+        self._extend(
+            min(self.start, np.datetime64(f"{first}-01-01T00:00:00", "s")),
+            max(self.end, np.datetime64(f"{last + 1}-01-01T00:00:00", "s") - np.timedelta64(1, "s"))
+        )
+
+    def events_between(self, t0, t1):
+        """[t0, t1) 之间的 (高潮时刻数组, 低潮时刻数组)"""
+        t0 = np.datetime64(t0, "s")
+        t1 = np.datetime64(t1, "s")
+        self._check_range(np.array([t0, t1]))
+        highs = self.high_times[
+            np.searchsorted(self.high_times, t0):np.searchsorted(self.high_times, t1)
+        ]
+        lows = self.low_times[
+            np.searchsorted(self.low_times, t0):np.searchsorted(self.low_times, t1)
+        ]
+        return highs, lows
+
+    def nearest_low_tide(self, times):
+        """每个查询时刻最近的低潮时刻 (标量输入返回标量)"""
+        t = _as_datetime64(times)
+        self._check_range(t)
+        idx = np.searchsorted(self.low_times, t)
+        before = self.low_times[idx - 1]
+        after = self.low_times[idx]
+        nearest = np.where((t - before) <= (after - t), before, after)
+        return nearest[()] if nearest.ndim == 0 else nearest
+
+    def hours_to_low_tide(self, times):
+        """每个查询时刻距最近低潮的绝对小时数"""
+        t = _as_datetime64(times)
+        diff = np.abs((t - self.nearest_low_tide(t)).astype(np.int64)) / 3600
+        return diff[()] if diff.ndim == 0 else diff
+
+    def near_low_tide(self, times, window_hours=2):
+        """是否在最近低潮前后±window_hours内 (标量输入返回 bool)"""
+        near = np.asarray(self.hours_to_low_tide(times)) <= window_hours
+        return bool(near) if near.ndim == 0 else near
+
+# 潮汐事件索引初始覆盖的年份范围 (可在 config/.env 配置; 范围外的查询按年惰性扩展)
+TIDE_INDEX_START_YEAR = int(CFG.get("TIDE_INDEX_START_YEAR") or 2020)
+TIDE_INDEX_END_YEAR = int(CFG.get("TIDE_INDEX_END_YEAR") or 2035)
+_TIDE_INDEX_SPAN = (
+    datetime(TIDE_INDEX_START_YEAR, 1, 1), datetime(TIDE_INDEX_END_YEAR, 12, 31, 23, 59, 59)
+)
+if HARMONIC_TIDES is not None:
+    TIDE_INDEX = TideEventIndex.from_harmonic(HARMONIC_TIDES, *_TIDE_INDEX_SPAN)
+else:
+    TIDE_INDEX = TideEventIndex.from_m2(*_TIDE_INDEX_SPAN)
+
 def is_near_low_tide(date, window_hours=2):
     """
     判断是否在低潮前后±window_hours时间内
     """
-    tides = compute_tides(date)
-    
-    for low_time_str in tides["low_tide_times"]:
-        low_time = datetime.fromisoformat(low_time_str)
-        diff = abs((date - low_time).total_seconds() / 3600)
-        if diff <= window_hours:
-            return True
-    
-    return False
+    return TIDE_INDEX.near_low_tide(date, window_hours)
+
+def _utc_isoformat(t64):
+    """datetime64 (UTC) → 带时区的 ISO 字符串"""
+    return np.asarray(t64, dtype="datetime64[s]").item().replace(tzinfo=timezone.utc).isoformat()
 
 def compute_astronomy_features(date):
     """
     计算单个日期的所有天文特征
     """
-    s = sun(LOCATION.observer, date=date)
+    eph = EPHEMERIS.lookup(date)
     
-    moon_illum = moon_illumination(date)
-    dark_night = is_dark_night(date)
+    moon_illum = float(moon_illumination_array(date))
+    dark_night = moon_illum < 0.3
     tides = compute_tides(date)
-    near_low_tide = is_near_low_tide(date, window_hours=2)
+    near_low_tide = TIDE_INDEX.near_low_tide(date, window_hours=2)
     
     return {
         "date": date.isoformat(),
         "sun": {
-            "sunrise": s["sunrise"].isoformat(),
-            "sunset": s["sunset"].isoformat(),
-            "noon": s["noon"].isoformat()
+            "sunrise": _utc_isoformat(eph["sunrise"]),
+            "sunset": _utc_isoformat(eph["sunset"]),
+            "noon": _utc_isoformat(eph["noon"])
         },
         "moon": {
             "illumination": round(moon_illum, 3),
-            "phase_name": get_moon_phase_name(moon_illumination(date)),
+            "phase_name": get_moon_phase_name(moon_illum),
             "is_dark_night": dark_night
         },
         "tide": {
@@ -147,17 +342,70 @@ def get_moon_phase_name(illumination):
     else:
         return "Full Moon"
 
-def compute_next_n_days(n=7):
-    """计算未来N天的天文特征"""
-    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
-    
-    features = []
-    for i in range(n):
-        date = today + timedelta(days=i)
-        feat = compute_astronomy_features(date)
-        features.append(feat)
-    
-    return features
+# 流式生成时每个 NumPy 块覆盖的天数
+ASTRONOMY_BLOCK_DAYS = 30
+
+def iter_astronomy_blocks(start, end, step=timedelta(days=1), block_days=ASTRONOMY_BLOCK_DAYS):
+    """
+    [start, end) 内按 step 采样的天文特征, 每次产出约 block_days 天的 NumPy 块
+    块内为等长数组: times, moon_illumination, tide_level, near_low_tide, is_night,
+    sunrise, sunset, noon; 内存只与块大小有关, 可流式遍历多年范围
+    """
+    start64 = np.datetime64(start, "s")
+    end64 = np.datetime64(end, "s")
+    step_s = int(step.total_seconds())
+    if step_s <= 0:
+        raise ValueError(f"step must be positive, got {step}")
+
+    n = max(0, -(-(end64 - start64).astype(np.int64) // step_s))
+    per_block = max(1, block_days * 86400 // step_s)
+    for i0 in range(0, n, per_block):
+        offsets = np.arange(i0, min(i0 + per_block, n), dtype=np.int64) * step_s
+        times = start64 + offsets.astype("timedelta64[s]")
+        eph = EPHEMERIS.lookup(times)
+        yield {
+            "times": times,
+            "moon_illumination": moon_illumination_array(times),
+            "tide_level": tide_level_array(times),
+            "near_low_tide": TIDE_INDEX.near_low_tide(times, window_hours=2),
+            "is_night": EPHEMERIS.is_night(times),
+            "sunrise": eph["sunrise"],
+            "sunset": eph["sunset"],
+            "noon": eph["noon"]
+        }
+
+def iter_astronomy(start, end, step=timedelta(days=1), block_days=ASTRONOMY_BLOCK_DAYS):
+    """
+    逐条惰性产出 [start, end) 内的天文特征记录 (格式同 compute_astronomy_features)
+    底层按块向量化计算, 只在产出时才组装字典
+    """
+    for block in iter_astronomy_blocks(start, end, step, block_days):
+        for i, t in enumerate(block["times"]):
+            date = t.item()
+            day_start = t.astype("datetime64[D]")
+            high_times, low_times = TIDE_INDEX.events_between(
+                day_start, day_start + np.timedelta64(1, "D")
+            )
+            moon_illum = float(block["moon_illumination"][i])
+            yield {
+                "date": date.isoformat(),
+                "sun": {
+                    "sunrise": _utc_isoformat(block["sunrise"][i]),
+                    "sunset": _utc_isoformat(block["sunset"][i]),
+                    "noon": _utc_isoformat(block["noon"][i])
+                },
+                "moon": {
+                    "illumination": round(moon_illum, 3),
+                    "phase_name": get_moon_phase_name(moon_illum),
+                    "is_dark_night": moon_illum < 0.3
+                },
+                "tide": {
+                    "high_tide_times": [h.isoformat() for h in high_times.astype(datetime)][:2],
+                    "low_tide_times": [l.isoformat() for l in low_times.astype(datetime)][:2],
+                    "current_level": round(float(block["tide_level"][i]), 3),
+                    "near_low_tide": bool(block["near_low_tide"][i])
+                }
+            }
 
 def main():
     print("=" * 60)
@@ -167,7 +415,8 @@ def main():
     
     # 计算未来7天
     print("\n🔮 Computing next 7 days...")
-    features = compute_next_n_days(7)
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    features = list(iter_astronomy(today, today + timedelta(days=7)))
     
     print("\n📊 Summary:")
     for feat in features:
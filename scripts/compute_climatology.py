@@ -5,44 +5,130 @@ Climatology: 风速历年同日中位值, SST/Chl-a季节中位值
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import dotenv_values
+from quantile_sketch import HistogramSketch
+from ndbc_store import load_observations, to_dataframe
+from climatology_grid import GridAccumulator, write_grid
+from climatology_harmonics import HarmonicAccumulator
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CFG = {**dotenv_values(os.path.join(ROOT, "config", ".env"))}
 RAW_DIR = os.path.join(ROOT, "data", "raw")
 OUTPUT_FILE = os.path.join(ROOT, "data", "climatology.json")
+# 增量模式: 每个源文件的草图按内容哈希持久化
+STATE_DIR = os.path.join(ROOT, "data", "climatology_state")
+STATE_MANIFEST = os.path.join(STATE_DIR, "manifest.json")
+# 日内×年积日 网格 (格式见 climatology_grid.py)
+GRID_FILE = os.path.join(ROOT, "data", "climatology_grid.f32")
+GRID_HEADER_FILE = os.path.join(ROOT, "data", "climatology_grid.json")
 
-def load_ndbc_data():
-    """加载所有NDBC CSV文件"""
-    files = [f for f in os.listdir(RAW_DIR) if f.startswith("ndbc_") and f.endswith(".csv")]
+# 流式模式每批读取的行数
+STREAM_CHUNK_ROWS = 200_000
+# 分位数草图: NDBC 列 → (输出键, 有效下限, 有效上限, 分箱宽度, 默认值)
+# 有效范围 (开区间) 同时排除 99/999 缺测标记
+SKETCH_VARIABLES = {
+    "WVHT": ("wave_height", 0.0, 20.0, 0.01, 1.0),
+    "WTMP": ("water_temp", 5.0, 30.0, 0.05, 16.0),
+}
+QUANTILES = (0.1, 0.5, 0.9)
+
+# 并行加载的进程数 (config/.env 的 NDBC_WORKERS, 留空为 CPU 核数)
+NDBC_WORKERS = int(CFG.get("NDBC_WORKERS") or os.cpu_count() or 1)
+
+# NDBC 浮标站 (config/.env 的 NDBC_STATION, 逗号分隔); 多站时各站并行计算后按反距离加权融合
+NDBC_STATIONS = [s.strip() for s in (CFG.get("NDBC_STATION") or "46254").split(",") if s.strip()]
+STATIONS_FILE = os.path.join(ROOT, "config", "ndbc_stations.json")
+# 融合目标点: 配置的 bbox 中心
+TARGET_LAT = (float(CFG.get("LAT_MIN") or 32.83) + float(CFG.get("LAT_MAX") or 32.89)) / 2
+TARGET_LON = (float(CFG.get("LON_MIN") or -117.32) + float(CFG.get("LON_MAX") or -117.20)) / 2
+# 反距离权重 1/d^p; 距离下限 10 km (约为相邻浮标间距), 避免最近的站独占权重
+IDW_POWER = 2
+IDW_MIN_KM = 10.0
+
+def ndbc_files(station=None):
+    """data/raw 下的 NDBC CSV 文件名 (排序); station 指定时只取该站 (ndbc_<站号>_*.csv)"""
+    if not os.path.isdir(RAW_DIR):
+        return []
+    prefix = f"ndbc_{station}_" if station else "ndbc_"
+    return sorted(f for f in os.listdir(RAW_DIR) if f.startswith(prefix) and f.endswith(".csv"))
+
+def load_ndbc_file(path):
+    """
+    单个文件: 读取列式存储 (必要时解析入库), 超出有效范围的值置为 NaN
+    只返回时间戳和气候态用到的列 (紧凑数组, 便于跨进程传回)
+    返回: (文件名, {列名: 数组}, 耗时秒)
+    """
+    t0 = time.perf_counter()
+    obs = load_observations(path)
+    arrays = {"timestamp": np.array(obs["timestamp"])}
+    for col, (_, lo, hi, _, _) in SKETCH_VARIABLES.items():
+        if col in obs:
+            values = np.array(obs[col], dtype=np.float32)
+            values[~((values > lo) & (values < hi))] = np.nan
+            arrays[col] = values
+    return os.path.basename(path), arrays, time.perf_counter() - t0
+
+def load_ndbc_data(workers=NDBC_WORKERS, files=None):
+    """
+    加载NDBC CSV文件 (默认全部)
+    每个文件在独立进程中解析/质控, 主进程只做拼接; workers=1 时在本进程内顺序执行
+    """
+    files = ndbc_files() if files is None else files
     if not files:
         print("⚠️  No NDBC data found in data/raw/")
         return pd.DataFrame()
     
-    dfs = []
-    for f in sorted(files):
-        path = os.path.join(RAW_DIR, f)
-        try:
-            df = pd.read_csv(path)
-            # 标准化列名
-            df.columns = [c.strip() for c in df.columns]
-            dfs.append(df)
-            print(f"✅ Loaded {f}: {len(df)} rows")
-        except Exception as e:
-            print(f"⚠️  Failed to load {f}: {e}")
+    paths = [os.path.join(RAW_DIR, f) for f in files]
+    workers = max(1, min(workers, len(paths)))
+    print(f"   Workers: {workers}")
+    
+    results = []
+    t0 = time.perf_counter()
+    if workers == 1:
+        jobs = [(path, None) for path in paths]
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        jobs = [(path, pool.submit(load_ndbc_file, path)) for path in paths]
+    try:
+        for path, future in jobs:
+            f = os.path.basename(path)
+            try:
+                _, arrays, seconds = load_ndbc_file(path) if future is None else future.result()
+                results.append(arrays)
+                print(f"✅ Loaded {f}: {len(arrays['timestamp'])} rows ({seconds:.2f}s)")
+            except Exception as e:
+                print(f"⚠️  Failed to load {f}: {e}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(f"   Total load time: {time.perf_counter() - t0:.2f}s")
     
-    if not dfs:
+    if not results:
         return pd.DataFrame()
     
-    return pd.concat(dfs, ignore_index=True)
+    columns = ["timestamp"] + [c for c in SKETCH_VARIABLES if all(c in r for r in results)]
+    merged = {col: np.concatenate([r[col] for r in results]) for col in columns}
+    merged["timestamp"] = merged["timestamp"].astype("datetime64[s]")
+    return pd.DataFrame(merged)
 
 def parse_ndbc_datetime(df):
     """解析NDBC时间戳"""
     # NDBC格式: YY, MM, DD, hh, mm
     # YY可能是2位或4位年份
     
+    # 来自列式存储: 时间戳已解析
+    if 'timestamp' in df.columns:
+        return df
+    
     # 清理列名
     df.columns = [c.replace('#', '').strip() for c in df.columns]
     
@@ -56,8 +142,8 @@ def parse_ndbc_datetime(df):
     
     # YY列可能是4位年份(2024)或2位(24)
     df['year'] = pd.to_numeric(df[year_col], errors='coerce')
-    df.loc[df['year'] < 100, 'year'] = df.loc[df['year'] < 100, 'year'].apply(
-        lambda y: 1900 + y if y > 50 else 2000 + y
+    df['year'] = np.where(
+        df['year'] < 100, np.where(df['year'] > 50, 1900 + df['year'], 2000 + df['year']), df['year']
     )
     
     df['timestamp'] = pd.to_datetime(
@@ -70,6 +156,39 @@ def parse_ndbc_datetime(df):
     
     return df
 
+def doy_medians(doy, values):
+    """
+    单次分组归约: 各 DOY (1-366) 的中位数
+    返回: 长度 366 的数组, 无数据的 DOY 为 NaN
+    """
+    out = np.full(366, np.nan)
+    medians = pd.Series(np.asarray(values, dtype=float)).groupby(np.asarray(doy)).median()
+    out[medians.index.to_numpy(dtype=int) - 1] = medians.to_numpy()
+    return out
+
+def fill_doy_gaps(clim, default):
+    """
+    向量化环形线性插值补齐缺失 DOY (12月31日与1月1日首尾相接)
+    全部缺失时填默认值
+    """
+    clim = np.asarray(clim, dtype=float)
+    known = ~np.isnan(clim)
+    if not known.any():
+        return np.full(clim.shape, float(default))
+    doy = np.arange(1, len(clim) + 1)
+    filled = clim.copy()
+    filled[~known] = np.interp(doy[~known], doy[known], clim[known], period=len(clim))
+    return filled
+
+def doy_climatology(timestamps, values, default):
+    """
+    历年同日中位值 (DOY 1-366 → float), 缺失日环形插值
+    保留 3 位小数 (列式存储为 float32, 更多位数没有意义)
+    """
+    doy = pd.DatetimeIndex(timestamps).dayofyear
+    filled = fill_doy_gaps(doy_medians(doy, values), default)
+    return {d: round(float(v), 3) for d, v in enumerate(filled, start=1)}
+
 def compute_wind_climatology(df):
     """
     计算风浪的历年同日中位值
@@ -81,74 +200,408 @@ def compute_wind_climatology(df):
     
     # 1. 浪高 (Wave Height) - 作为风浪强度指标
     if 'WVHT' in df.columns:
-        df['WVHT'] = pd.to_numeric(df['WVHT'], errors='coerce')
-        df_wave = df[(df['WVHT'] > 0) & (df['WVHT'] < 20) & (df['WVHT'] != 99.0)].copy()
+        wvht = pd.to_numeric(df['WVHT'], errors='coerce')
+        valid = (wvht > 0) & (wvht < 20) & (wvht != 99.0)
         
-        if len(df_wave) > 0:
-            df_wave['doy'] = df_wave['timestamp'].dt.dayofyear
-            wave_clim = {}
-            for doy in range(1, 367):
-                subset = df_wave[df_wave['doy'] == doy]['WVHT']
-                if len(subset) > 0:
-                    wave_clim[doy] = float(subset.median())
-            
-            # 填充缺失DOY
-            for doy in range(1, 367):
-                if doy not in wave_clim:
-                    before = max([d for d in wave_clim.keys() if d < doy], default=None)
-                    after = min([d for d in wave_clim.keys() if d > doy], default=None)
-                    if before and after:
-                        wave_clim[doy] = (wave_clim[before] + wave_clim[after]) / 2
-                    elif before:
-                        wave_clim[doy] = wave_clim[before]
-                    elif after:
-                        wave_clim[doy] = wave_clim[after]
-                    else:
-                        wave_clim[doy] = 1.0  # 默认1米
-            
+        if valid.any():
+            wave_clim = doy_climatology(df.loc[valid, 'timestamp'], wvht[valid], default=1.0)  # 默认1米
             result['wave_height'] = wave_clim
             print(f"✅ Wave height climatology: {len(wave_clim)} days")
             print(f"   Example: DOY 1 = {wave_clim.get(1, 0):.2f}m, DOY 180 = {wave_clim.get(180, 0):.2f}m")
     
     # 2. 水温 (Water Temperature) - 补充SST数据
     if 'WTMP' in df.columns:
-        df['WTMP'] = pd.to_numeric(df['WTMP'], errors='coerce')
-        df_temp = df[(df['WTMP'] > 5) & (df['WTMP'] < 30) & (df['WTMP'] != 999.0)].copy()
+        wtmp = pd.to_numeric(df['WTMP'], errors='coerce')
+        valid = (wtmp > 5) & (wtmp < 30) & (wtmp != 999.0)
         
-        if len(df_temp) > 0:
-            df_temp['doy'] = df_temp['timestamp'].dt.dayofyear
-            temp_clim = {}
-            for doy in range(1, 367):
-                subset = df_temp[df_temp['doy'] == doy]['WTMP']
-                if len(subset) > 0:
-                    temp_clim[doy] = float(subset.median())
-            
-            # 填充缺失DOY
-            for doy in range(1, 367):
-                if doy not in temp_clim:
-                    before = max([d for d in temp_clim.keys() if d < doy], default=None)
-                    after = min([d for d in temp_clim.keys() if d > doy], default=None)
-                    if before and after:
-                        temp_clim[doy] = (temp_clim[before] + temp_clim[after]) / 2
-                    elif before:
-                        temp_clim[doy] = temp_clim[before]
-                    elif after:
-                        temp_clim[doy] = temp_clim[after]
-                    else:
-                        temp_clim[doy] = 16.0  # 默认16°C
-            
+        if valid.any():
+            temp_clim = doy_climatology(df.loc[valid, 'timestamp'], wtmp[valid], default=16.0)  # 默认16°C
             result['water_temp'] = temp_clim
             print(f"✅ Water temp climatology: {len(temp_clim)} days")
             print(f"   Example: DOY 1 = {temp_clim.get(1, 0):.2f}°C, DOY 180 = {temp_clim.get(180, 0):.2f}°C")
     
     return result
 
-def compute_seasonal_defaults():
+def iter_ndbc_chunks(chunk_rows=STREAM_CHUNK_ROWS, files=None):
+    """
+    按固定行数分批读取 NDBC 文件 (默认全部), 产出 (文件名, 已解析时间戳的 DataFrame)
+    任意时刻内存中只有一批数据
+    """
+    for f in (ndbc_files() if files is None else files):
+        path = os.path.join(RAW_DIR, f)
+        try:
+            obs = load_observations(path)
+            for start in range(0, len(obs["timestamp"]), chunk_rows):
+                yield f, to_dataframe(obs, start, start + chunk_rows)
+        except Exception as e:
+            print(f"⚠️  Failed to load {f}: {e}")
+
+def new_sketches():
+    """每个变量一组按 DOY (366) 和按小时 (24) 的分位数草图"""
+    return {
+        col: {
+            "doy": HistogramSketch(366, lo, hi, resolution),
+            "hour": HistogramSketch(24, lo, hi, resolution)
+        }
+        for col, (_, lo, hi, resolution, _) in SKETCH_VARIABLES.items()
+    }
+
+def update_sketches(sketches, chunk):
+    """把一批观测加入草图"""
+    doy = chunk['timestamp'].dt.dayofyear.to_numpy() - 1
+    hour = chunk['timestamp'].dt.hour.to_numpy()
+    for col, (_, lo, hi, _, _) in SKETCH_VARIABLES.items():
+        if col not in chunk.columns:
+            continue
+        values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=float)
+        valid = (values > lo) & (values < hi)
+        sketches[col]["doy"].update(doy[valid], values[valid])
+        sketches[col]["hour"].update(hour[valid], values[valid])
+
+def _accumulate(sketches, stats, chunk):
+    """把一批观测加入草图并更新统计信息"""
+    update_sketches(sketches, chunk)
+    t0, t1 = chunk['timestamp'].min(), chunk['timestamp'].max()
+    stats["records"] += len(chunk)
+    stats["start"] = t0 if stats["start"] is None else min(stats["start"], t0)
+    stats["end"] = t1 if stats["end"] is None else max(stats["end"], t1)
+
+def _merge_stats(stats, other):
+    stats["records"] += other["records"]
+    for key, pick in (("start", min), ("end", max)):
+        if other[key] is not None:
+            stats[key] = other[key] if stats[key] is None else pick(stats[key], other[key])
+
+def stream_climatology(chunk_rows=STREAM_CHUNK_ROWS, files=None, grid=None, harmonics=None):
+    """
+    流式计算气候态: 单遍扫描文件 (默认全部), 内存与历史长度无关
+    grid: 可选 GridAccumulator, 同一遍扫描中累加 日内×年积日 网格
+    harmonics: 可选 HarmonicAccumulator, 同一遍扫描中累加谐波拟合的法方程
+    返回: (草图, 统计信息 {records, start, end})
+    """
+    sketches = new_sketches()
+    stats = {"records": 0, "start": None, "end": None}
+    for f, chunk in iter_ndbc_chunks(chunk_rows, files):
+        if chunk.empty:
+            continue
+        _accumulate(sketches, stats, chunk)
+        if grid is not None:
+            grid.update(chunk['timestamp'].to_numpy(), grid_columns(chunk))
+        if harmonics is not None:
+            harmonics.update(chunk['timestamp'].to_numpy(), grid_columns(chunk))
+        print(f"✅ Streamed {f}: {len(chunk)} rows")
+    return sketches, stats
+
+def file_hash(path):
+    """文件内容 SHA-256 (分块读取)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _state_path(digest):
+    return os.path.join(STATE_DIR, f"{digest}.npz")
+
+def save_file_state(digest, sketches, grid, harmonics):
+    """保存单个源文件的草图、网格累加量和谐波法方程"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    arrays = {"grid__sums": grid.sums, "grid__counts": grid.counts}
+    for name, arr in harmonics.to_arrays().items():
+        arrays[f"harmonics__{name}"] = arr
+    for col, groups in sketches.items():
+        for group, sketch in groups.items():
+            for name, arr in sketch.to_arrays().items():
+                arrays[f"{col}__{group}__{name}"] = arr
+    np.savez_compressed(_state_path(digest), **arrays)
+
+def load_file_state(digest):
+    """读取单个源文件的 (草图, 网格累加量, 谐波法方程); 旧版状态文件缺少网格/谐波时返回 None"""
+    sketches = {}
+    with np.load(_state_path(digest)) as data:
+        if "grid__sums" not in data.files or "harmonics__xtx" not in data.files:
+            return None
+        grid = GridAccumulator()
+        grid.sums, grid.counts = data["grid__sums"], data["grid__counts"]
+        harmonics = HarmonicAccumulator.from_arrays(
+            *(data[f"harmonics__{name}"] for name in ("xtx", "xty", "yty", "hours"))
+        )
+        for col in SKETCH_VARIABLES:
+            sketches[col] = {
+                group: HistogramSketch.from_arrays(
+                    data[f"{col}__{group}__config"], data[f"{col}__{group}__counts"]
+                )
+                for group in ("doy", "hour")
+            }
+    return sketches, grid, harmonics
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def incremental_climatology(chunk_rows=STREAM_CHUNK_ROWS, grid=None, harmonics=None,
+                            files=None, manifest_path=None):
+    """
+    增量计算气候态
+    每个源文件的草图按内容哈希缓存在 data/climatology_state/; 只有新增或内容变化的文件
+    需要重新解析, 其余直接读取缓存后相加合并; 已删除文件的贡献自动丢弃
+    grid / harmonics: 可选 GridAccumulator / HarmonicAccumulator, 合并各文件的累加量
+    files / manifest_path: 只处理部分文件 (如单个浮标站) 时使用各自的清单
+    返回: (草图, 统计信息 {records, start, end})
+    """
+    manifest_path = manifest_path or STATE_MANIFEST
+    manifest = _load_manifest(manifest_path)
+    new_manifest = {}
+    sketches = new_sketches()
+    stats = {"records": 0, "start": None, "end": None}
+    reused = processed = 0
+
+    for f in (ndbc_files() if files is None else files):
+        digest = file_hash(os.path.join(RAW_DIR, f))
+        entry = manifest.get(f)
+        cached = None
+        if entry and entry["hash"] == digest and os.path.exists(_state_path(digest)):
+            cached = load_file_state(digest)
+        if cached is not None:
+            file_sketches, file_grid, file_harmonics = cached
+            file_stats = {
+                "records": entry["records"],
+                "start": pd.Timestamp(entry["start"]) if entry["start"] else None,
+                "end": pd.Timestamp(entry["end"]) if entry["end"] else None
+            }
+            reused += 1
+        else:
+            file_grid, file_harmonics = GridAccumulator(), HarmonicAccumulator()
+            file_sketches, file_stats = stream_climatology(
+                chunk_rows, files=[f], grid=file_grid, harmonics=file_harmonics
+            )
+            save_file_state(digest, file_sketches, file_grid, file_harmonics)
+            if entry and entry["hash"] != digest and os.path.exists(_state_path(entry["hash"])):
+                os.remove(_state_path(entry["hash"]))
+            processed += 1
+
+        for col, groups in file_sketches.items():
+            for group, sketch in groups.items():
+                sketches[col][group].merge(sketch)
+        if grid is not None:
+            grid.sums += file_grid.sums
+            grid.counts += file_grid.counts
+        if harmonics is not None:
+            harmonics.merge(file_harmonics)
+        _merge_stats(stats, file_stats)
+        new_manifest[f] = {
+            "hash": digest,
+            "records": file_stats["records"],
+            "start": file_stats["start"].isoformat() if file_stats["start"] is not None else None,
+            "end": file_stats["end"].isoformat() if file_stats["end"] is not None else None
+        }
+
+    # 已删除的源文件: 清理其缓存
+    for f, entry in manifest.items():
+        if f not in new_manifest and os.path.exists(_state_path(entry["hash"])):
+            os.remove(_state_path(entry["hash"]))
+
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(manifest_path, "w") as fh:
+        json.dump(new_manifest, fh, indent=2)
+    print(f"♻️  Incremental state: {reused} files reused, {processed} files processed")
+    return sketches, stats
+
+def grid_columns(chunk):
+    """一批观测中网格用到的列 (输出键 → 质控后的数组, 超出有效范围为 NaN)"""
+    columns = {}
+    for col, (key, lo, hi, _, _) in SKETCH_VARIABLES.items():
+        if col in chunk.columns:
+            values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=float)
+            columns[key] = np.where((values > lo) & (values < hi), values, np.nan)
+    return columns
+
+def sketch_climatology(sketches):
+    """
+    草图 → 气候态字典
+    <key>_doy: DOY 中位值 (p50, 缺失日环形插值, 与非流式输出格式相同)
+    <key>_doy_quantiles / <key>_hour_quantiles: {"p10": {...}, "p50": {...}, "p90": {...}}
+    """
+    result = {}
+    for col, (key, _, _, _, default) in SKETCH_VARIABLES.items():
+        doy_sketch = sketches[col]["doy"]
+        if doy_sketch.count().sum() == 0:
+            continue
+        doy_q = doy_sketch.quantiles(QUANTILES)
+        hour_q = sketches[col]["hour"].quantiles(QUANTILES)
+        doy_quantiles, hour_quantiles = {}, {}
+        for j, q in enumerate(QUANTILES):
+            name = f"p{int(round(q * 100))}"
+            filled = fill_doy_gaps(doy_q[:, j], default)
+            doy_quantiles[name] = {d: round(float(v), 3) for d, v in enumerate(filled, start=1)}
+            hour_quantiles[name] = {
+                h: round(float(v), 3) for h, v in enumerate(hour_q[:, j]) if not np.isnan(v)
+            }
+        result[f"{key}_doy"] = doy_quantiles["p50"]
+        result[f"{key}_doy_quantiles"] = doy_quantiles
+        result[f"{key}_hour_quantiles"] = hour_quantiles
+    return result
+
+def build_climatology(files=None, mode="memory", workers=NDBC_WORKERS, manifest_path=None):
+    """
+    一组 NDBC 文件 (默认全部) 的浪高/水温气候态
+    mode: memory (全部载入, DOY 中位值) / stream (分位数草图) / incremental (流式 + 按文件缓存)
+    返回: {clim, grid (366×24 网格), harmonics (谐波系数), stats}; 没有数据时返回 None
+    """
+    if mode in ("stream", "incremental"):
+        # 流式读取并更新草图
+        print(f"\n📊 Streaming NDBC historical data ({STREAM_CHUNK_ROWS:,} rows per batch)...")
+        grid, harmonics = GridAccumulator(), HarmonicAccumulator()
+        if mode == "incremental":
+            sketches, stats = incremental_climatology(
+                grid=grid, harmonics=harmonics, files=files, manifest_path=manifest_path
+            )
+        else:
+            sketches, stats = stream_climatology(files=files, grid=grid, harmonics=harmonics)
+        if stats["records"] == 0:
+            return None
+        print(f"✅ Streamed {stats['records']} valid records")
+        print(f"   Time range: {stats['start']} → {stats['end']}")
+        print("\n🌊 Wave & temperature climatology (DOY/hour p10/p50/p90 from sketches)...")
+        clim_data = sketch_climatology(sketches)
+        for key in ("wave_height", "water_temp"):
+            if f"{key}_doy" in clim_data:
+                doy = clim_data[f"{key}_doy_quantiles"]
+                print(f"✅ {key}: DOY 1 p10/p50/p90 = "
+                      f"{doy['p10'][1]:.2f}/{doy['p50'][1]:.2f}/{doy['p90'][1]:.2f}")
+    else:
+        # 加载NDBC数据
+        print("\n📊 Loading NDBC historical data...")
+        df = load_ndbc_data(workers, files)
+        
+        if df.empty:
+            return None
+        
+        # 解析时间戳
+        print("\n🕐 Parsing timestamps...")
+        df = parse_ndbc_datetime(df)
+        df = df.dropna(subset=['timestamp'])
+        stats = {"records": len(df), "start": df['timestamp'].min(), "end": df['timestamp'].max()}
+        print(f"✅ Parsed {stats['records']} valid records")
+        print(f"   Time range: {stats['start']} → {stats['end']}")
+        
+        # 计算浪高和水温气候态
+        print("\n🌊 Computing wave & temperature climatology (DOY median)...")
+        wind = compute_wind_climatology(df)
+        clim_data = {f"{key}_doy": values for key, values in wind.items()}
+        columns = grid_columns(df)
+        grid = GridAccumulator().update(df['timestamp'].to_numpy(), columns)
+        harmonics = HarmonicAccumulator().update(df['timestamp'].to_numpy(), columns)
+    
+    return {"clim": clim_data, "grid": grid.finalize(), "harmonics": harmonics.finalize(), "stats": stats}
+
+def load_station_registry(stations, path=STATIONS_FILE):
+    """浮标站名称与坐标 (config/ndbc_stations.json); 未登记的站没有坐标"""
+    with open(path, "r") as f:
+        registry = json.load(f)
+    return {s: registry.get(s, {"name": f"NDBC {s}"}) for s in stations}
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * np.arcsin(np.sqrt(a))
+
+def idw_weights(distances_km, power=IDW_POWER, min_km=IDW_MIN_KM):
+    """反距离权重 (归一化)"""
+    w = np.maximum(np.asarray(distances_km, dtype=float), min_km) ** -power
+    return w / w.sum()
+
+def blend(items, weights):
+    """
+    按权重融合各站结果: 嵌套 dict 逐键、数组/列表逐元素、数值直接加权平均
+    某站缺少 (或为 None) 的项不参与, 其余站权重重新归一化
+    """
+    pairs = [(v, w) for v, w in zip(items, weights) if v is not None]
+    if not pairs:
+        return None
+    if isinstance(pairs[0][0], dict):
+        keys = dict.fromkeys(k for v, _ in pairs for k in v)
+        return {k: blend([v.get(k) for v, _ in pairs], [w for _, w in pairs]) for k in keys}
+    w = np.array([w for _, w in pairs])
+    return np.tensordot(w / w.sum(), np.array([v for v, _ in pairs], dtype=float), axes=1)
+
+def _rounded(value):
+    """融合结果 → JSON 可写的数值 (3 位小数)"""
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray) and value.ndim > 0:
+        return [round(float(v), 4) for v in value]
+    return round(float(value), 3)
+
+def station_climatology(station, mode="memory"):
+    """单个浮标站的气候态 (进程池任务; 站内顺序加载文件)"""
+    files = ndbc_files(station)
+    if not files:
+        return station, None
+    manifest_path = os.path.join(STATE_DIR, f"manifest_{station}.json")
+    return station, build_climatology(files, mode, workers=1, manifest_path=manifest_path)
+
+def multi_station_climatology(stations, mode="memory", workers=NDBC_WORKERS):
+    """
+    多个浮标站并行计算气候态 (每站一个进程), 再按到目标点 (bbox 中心) 的距离反距离加权融合
+    DOY 中位值/分位数、366×24 网格、谐波系数都逐项融合; 没有数据的站不参与
+    """
+    registry = load_station_registry(stations)
+    workers = max(1, min(workers, len(stations)))
+    print(f"\n📡 Stations: {', '.join(stations)} (workers: {workers})")
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = dict(station_climatology(s, mode) for s in stations)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = dict(pool.map(station_climatology, stations, [mode] * len(stations)))
+    print(f"   Per-station climatologies: {time.perf_counter() - t0:.2f}s")
+
+    used = [s for s in stations if results[s] is not None and "lat" in registry[s]]
+    for s in stations:
+        if s not in used:
+            reason = "no data" if results[s] is None else "no coordinates in ndbc_stations.json"
+            print(f"⚠️  Skip station {s}: {reason}")
+    if not used:
+        return None
+
+    distances = [haversine_km(registry[s]["lat"], registry[s]["lon"], TARGET_LAT, TARGET_LON) for s in used]
+    weights = idw_weights(distances)
+
+    clim_data = _rounded(blend([results[s]["clim"] for s in used], weights))
+    grid = blend([results[s]["grid"] for s in used], weights).astype(np.float32)
+    harmonics = dict(results[used[0]]["harmonics"])
+    station_coef = [results[s]["harmonics"]["variables"] for s in used]
+    harmonics["variables"] = _rounded(blend(station_coef, weights))
+    for var, coef in harmonics["variables"].items():
+        coef["samples"] = int(sum(c[var]["samples"] for c in station_coef if var in c))
+        for term in ("annual", "semiannual", "diurnal"):
+            coef.setdefault(term, None)
+
+    stats = {"records": 0, "start": None, "end": None}
+    station_info = {}
+    for s, d, w in zip(used, distances, weights):
+        _merge_stats(stats, results[s]["stats"])
+        station_info[s] = {
+            **registry[s],
+            "distance_km": round(float(d), 2),
+            "weight": round(float(w), 4),
+            "records": int(results[s]["stats"]["records"]),
+            **{k: v for k, v in results[s]["clim"].items() if k.endswith("_doy")}
+        }
+        print(f"✅ {s} ({registry[s]['name']}): {d:.1f} km, weight {w:.3f}, "
+              f"{results[s]['stats']['records']} records")
+    return {"clim": clim_data, "grid": grid, "harmonics": harmonics, "stats": stats, "stations": station_info}
+
+def compute_seasonal_defaults(satellite=None):
     """
     季节默认值 (SST/Chl-a)
     春夏秋冬的典型值 - 基于San Diego海域经验
+    satellite: 卫星气候态 (satellite_climatology.py), 有数据时用各季节 DOY 中位值的中位数替换经验值
     """
-    return {
+    defaults = {
         "sst": {
             "winter": 15.5,  # Dec-Feb, °C
             "spring": 16.5,  # Mar-May
@@ -162,6 +615,17 @@ def compute_seasonal_defaults():
             "fall": 0.6
         }
     }
+    
+    # DOY → 季节 (闰年参考年, 覆盖 DOY 366)
+    months = pd.date_range("2000-01-01", "2000-12-31").month
+    seasons = np.array([get_season(m) for m in months])
+    for key, data in (satellite or {}).items():
+        if key not in defaults or not data.get("doy"):
+            continue
+        doy = np.array([data["doy"][d] for d in sorted(data["doy"], key=int)], dtype=float)
+        for season in defaults[key]:
+            defaults[key][season] = round(float(np.median(doy[seasons == season])), 2)
+    return defaults
 
 def get_season(month):
     """获取季节"""
@@ -179,44 +643,75 @@ def main():
     print("🌊 BlueGlow - Compute Climatology")
     print("=" * 60)
     
-    # 1. 加载NDBC数据
-    print("\n📊 Loading NDBC historical data...")
-    df = load_ndbc_data()
+    # --stream: 分批读取 + 分位数草图, 内存与历史长度无关, 额外输出 p10/p50/p90
+    # --incremental: 流式 + 按源文件哈希缓存草图, 只处理新增/变化的文件
+    incremental = "--incremental" in sys.argv[1:]
+    stream = incremental or "--stream" in sys.argv[1:]
+    mode = "incremental" if incremental else "stream" if stream else "memory"
     
-    if df.empty:
+    # 1-3. 浪高/水温气候态 (多站: 各站并行计算后反距离加权融合)
+    if len(NDBC_STATIONS) > 1:
+        result = multi_station_climatology(NDBC_STATIONS, mode)
+    else:
+        result = build_climatology(ndbc_files(NDBC_STATIONS[0]), mode=mode)
+    if result is None:
         print("❌ No data available. Please run Step 2 first.")
         return
+    clim_data, stats = result["clim"], result["stats"]
     
-    # 2. 解析时间戳
-    print("\n🕐 Parsing timestamps...")
-    df = parse_ndbc_datetime(df)
-    df = df.dropna(subset=['timestamp'])
-    print(f"✅ Parsed {len(df)} valid records")
-    print(f"   Time range: {df['timestamp'].min()} → {df['timestamp'].max()}")
+    # 谐波气候态: 年/半年 (+日) 周期系数
+    print("\n〰️  Harmonic climatology (annual + semiannual + diurnal)...")
+    harmonic_coef = result["harmonics"]
+    for key, coef in harmonic_coef["variables"].items():
+        diurnal = "with" if coef["diurnal"] is not None else "without"
+        print(f"✅ {key}: mean={coef['mean']:.2f}, rmse={coef['rmse']:.3f} ({diurnal} diurnal term)")
     
-    # 3. 计算浪高和水温气候态
-    print("\n🌊 Computing wave & temperature climatology (DOY median)...")
-    clim_data = compute_wind_climatology(df)
+    # 4. 卫星 SST/Chl-a 气候态 (逐月 NetCDF, 分块读取) 与季节默认值
+    print("\n🛰️  Satellite SST/Chl-a climatology...")
+    satellite = {}
+    try:
+        from satellite_climatology import compute_satellite_climatology, save_satellite_climatology
+        satellite = compute_satellite_climatology(RAW_DIR)
+        if satellite:
+            path = save_satellite_climatology(satellite)
+            for key, data in satellite.items():
+                print(f"✅ {key}: {data['days']} days from {data['files']} files")
+            print(f"   Saved: {path}")
+        else:
+            print("⚠️  No satellite NetCDF data, using empirical seasonal values")
+    except ImportError:
+        print("⚠️  xarray not installed, using empirical seasonal values")
     
-    # 4. 季节默认值
     print("\n🌡️  Seasonal defaults (SST/Chl-a)...")
-    seasonal = compute_seasonal_defaults()
+    seasonal = compute_seasonal_defaults(satellite)
     print(f"   SST: Winter={seasonal['sst']['winter']}°C, Summer={seasonal['sst']['summer']}°C")
     print(f"   Chl-a: Spring={seasonal['chla']['spring']}mg/m³, Summer={seasonal['chla']['summer']}mg/m³")
     
     # 5. 保存
     climatology = {
-        "wave_height_doy": clim_data.get('wave_height', {}),  # DOY 1-366 -> median wave height (m)
-        "water_temp_doy": clim_data.get('water_temp', {}),    # DOY 1-366 -> median water temp (°C)
+        "wave_height_doy": clim_data.get('wave_height_doy', {}),  # DOY 1-366 -> median wave height (m)
+        "water_temp_doy": clim_data.get('water_temp_doy', {}),    # DOY 1-366 -> median water temp (°C)
+        **{k: v for k, v in clim_data.items() if k.endswith('_quantiles')},
+        "harmonics": harmonic_coef,                                # 谐波系数 (见 climatology_harmonics.py)
+        **({"stations": result["stations"]} if "stations" in result else {}),
         "seasonal_defaults": seasonal,
         "metadata": {
             "created": datetime.utcnow().isoformat() + "Z",
-            "ndbc_records": len(df),
-            "ndbc_station": "46254 (Scripps Nearshore - Wave Buoy)",
-            "note": "Station 46254 is a wave buoy without anemometer. Using WVHT (wave height) as wind-wave proxy.",
+            "ndbc_records": stats["records"],
+            "ndbc_station": ", ".join(
+                f"{station} ({info['name']})" for station, info in load_station_registry(NDBC_STATIONS).items()
+            ),
+            "note": (
+                f"NDBC {', '.join(NDBC_STATIONS)}: wave buoys without anemometer. "
+                "Using WVHT (wave height) as wind-wave proxy."
+            ),
+            "method": (
+                "incremental histogram sketches" if incremental
+                else "streaming histogram sketches" if stream else "in-memory DOY median"
+            ),
             "time_range": {
-                "start": df['timestamp'].min().isoformat(),
-                "end": df['timestamp'].max().isoformat()
+                "start": stats["start"].isoformat(),
+                "end": stats["end"].isoformat()
             }
         }
     }
@@ -227,6 +722,13 @@ def main():
     
     print(f"\n✅ Climatology saved: {OUTPUT_FILE}")
     print(f"   Size: {os.path.getsize(OUTPUT_FILE)} bytes")
+    
+    # 6. 日内×年积日 网格 (366×24 float32 + JSON 头)
+    write_grid(result["grid"], metadata={
+        "created": climatology["metadata"]["created"],
+        "ndbc_records": stats["records"]
+    }, grid_file=GRID_FILE, header_file=GRID_HEADER_FILE)
+    print(f"✅ Hour × DOY grid saved: {GRID_FILE} ({os.path.getsize(GRID_FILE)} bytes)")
     print("\n" + "=" * 60)
 
 if __name__ == "__main__":
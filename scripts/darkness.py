@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+天文暗夜窗口 - 太阳低于 -18° (天文晨昏蒙影) 且月亮在地平线下或足够暗
+在细时间网格上一次性向量化求太阳/月亮高度, 再单遍扫描变号区间并线性插值求根
+"""
+
+import os
+import json
+import numpy as np
+from datetime import datetime
+
+from compute_astronomy import LAT, LON, ROOT, moon_illumination_array
+from lunar_ephemeris import moon_altitude as lunar_moon_altitude
+
+# 天文晨昏蒙影: 太阳中心低于地平线 18°
+ASTRONOMICAL_TWILIGHT_DEG = -18.0
+# 月出/月落的地心高度 (≈ 0.7275·视差 − 34′ 大气折射)
+MOON_HORIZON_DEG = 0.125
+# 月照度低于此值时即使月亮在天上也算暗夜 (与 is_dark_night 一致)
+MOON_ILLUMINATION_THRESHOLD = 0.3
+# 月照度换算到"度"的权重, 让暗夜裕度各分量量级相近, 插值更准
+ILLUMINATION_WEIGHT = 100.0
+# 扫描网格步长 (分钟)
+STEP_MINUTES = 5
+# 日出/日落: 太阳中心高度 -0.833° (半径 + 大气折射)
+SUNRISE_ALTITUDE_DEG = -0.833
+
+OUTPUT_FILE = os.path.join(ROOT, "data", "dark_windows.json")
+
+def _days_since_j2000(times):
+    t = np.asarray(times, dtype="datetime64[s]")
+    return (t - np.datetime64("2000-01-01T12:00:00", "s")).astype(np.int64) / 86400.0
+
+def _altitude(ra, dec, d, lat, lon):
+    """赤道坐标 (弧度) → 地平高度 (度)"""
+    gmst = np.radians(np.mod(280.46061837 + 360.98564736629 * d, 360.0))
+    hour_angle = gmst + np.radians(lon) - ra
+    phi = np.radians(lat)
+    sin_alt = np.sin(phi) * np.sin(dec) + np.cos(phi) * np.cos(dec) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+def _ecliptic_to_equatorial(lon_ecl, lat_ecl, d):
+    """黄道坐标 (弧度) → (赤经, 赤纬) 弧度"""
+    eps = np.radians(23.439 - 0.00000036 * d)
+    ra = np.arctan2(
+        np.sin(lon_ecl) * np.cos(eps) - np.tan(lat_ecl) * np.sin(eps), np.cos(lon_ecl)
+    )
+    dec = np.arcsin(
+        np.sin(lat_ecl) * np.cos(eps) + np.cos(lat_ecl) * np.sin(eps) * np.sin(lon_ecl)
+    )
+    return ra, dec
+
+def sun_altitude(times, lat=LAT, lon=LON):
+    """太阳高度角 (度), 低精度太阳位置公式, 精度约 0.01°"""
+    d = _days_since_j2000(times)
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    L = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    ra, dec = _ecliptic_to_equatorial(L, np.zeros_like(L), d)
+    return _altitude(ra, dec, d, lat, lon)
+
+def is_sun_down(times, lat=LAT, lon=LON):
+    """是否夜间 (日落后到日出前): 太阳中心高度低于 SUNRISE_ALTITUDE_DEG; lat/lon 可为数组, 与时刻广播"""
+    return sun_altitude(times, lat, lon) < SUNRISE_ALTITUDE_DEG
+
+def moon_altitude(times, lat=LAT, lon=LON):
+    """月亮地心高度角 (度), Meeus 月球位置, 精度约 0.01°"""
+    return lunar_moon_altitude(times, lat, lon)
+
+def darkness_margin(times, lat=LAT, lon=LON, moon_threshold=MOON_ILLUMINATION_THRESHOLD):
+    """
+    暗夜裕度 (连续函数, >0 表示暗夜)
+    min(太阳在 -18° 以下的深度, max(月亮在地平线下的深度, 月照度余量))
+    """
+    sun_depth = ASTRONOMICAL_TWILIGHT_DEG - sun_altitude(times, lat, lon)
+    moon_depth = MOON_HORIZON_DEG - moon_altitude(times, lat, lon)
+    dim = (moon_threshold - moon_illumination_array(times)) * ILLUMINATION_WEIGHT
+    return np.minimum(sun_depth, np.maximum(moon_depth, dim))
+
+def is_dark(times, lat=LAT, lon=LON, moon_threshold=MOON_ILLUMINATION_THRESHOLD):
+    """每个时刻是否处于天文暗夜"""
+    return darkness_margin(times, lat, lon, moon_threshold) > 0
+
+def dark_intervals(start, end, lat=LAT, lon=LON,
+                   moon_threshold=MOON_ILLUMINATION_THRESHOLD, step_minutes=STEP_MINUTES):
+    """
+    [start, end) 内所有暗夜区间
+    返回: (开始时刻数组, 结束时刻数组), datetime64[s], UTC
+    """
+    start = np.datetime64(start, "s")
+    end = np.datetime64(end, "s")
+    step = np.timedelta64(int(step_minutes * 60), "s")
+    grid = np.arange(start, end + step, step)
+    margin = darkness_margin(grid, lat, lon, moon_threshold)
+    dark = margin > 0
+
+    # 变号区间: 线性插值求根
+    flips = np.nonzero(dark[1:] != dark[:-1])[0]
+    m0, m1 = margin[flips], margin[flips + 1]
+    frac = m0 / (m0 - m1)
+    roots = grid[flips] + np.round(frac * step.astype(np.int64)).astype("timedelta64[s]")
+    rising = ~dark[flips]   # 由亮变暗 → 区间开始
+
+    starts = roots[rising]
+    ends = roots[~rising]
+    # 网格起点/终点已处于暗夜时, 用网格边界截断
+    if dark[0]:
+        starts = np.concatenate([[start], starts])
+    if dark[-1]:
+        ends = np.concatenate([ends, [grid[-1]]])
+
+    starts = np.clip(starts, start, end)
+    ends = np.clip(ends, start, end)
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+def nightly_dark_windows(start_date, n_nights, lat=LAT, lon=LON,
+                         moon_threshold=MOON_ILLUMINATION_THRESHOLD, step_minutes=STEP_MINUTES):
+    """
+    按夜分组的暗夜窗口
+    一"夜"指当地平太阳时 12:00 到次日 12:00, 以傍晚的日期标记
+    返回: {日期字符串: [{"start", "end", "hours"}, ...]}
+    """
+    # 当地平太阳时正午对应的 UTC 时刻
+    noon_offset = np.timedelta64(int(round((12 - lon / 15.0) * 3600)), "s")
+    first_noon = np.datetime64(start_date, "D").astype("datetime64[s]") + noon_offset
+    last_noon = first_noon + np.timedelta64(n_nights, "D")
+
+    starts, ends = dark_intervals(first_noon, last_noon, lat, lon, moon_threshold, step_minutes)
+    night_index = ((starts - first_noon).astype(np.int64) // 86400).astype(int)
+
+    windows = {}
+    for i in range(n_nights):
+        night = (np.datetime64(start_date, "D") + np.timedelta64(i, "D")).astype(datetime)
+        windows[night.isoformat()] = []
+    for night, s, e in zip(night_index, starts, ends):
+        night_date = (np.datetime64(start_date, "D") + np.timedelta64(int(night), "D")).astype(datetime)
+        windows[night_date.isoformat()].append({
+            "start": s.astype(datetime).isoformat(),
+            "end": e.astype(datetime).isoformat(),
+            "hours": round(float((e - s).astype(np.int64)) / 3600, 2)
+        })
+    return windows
+
+def main():
+    print("=" * 60)
+    print("🌌 BlueGlow - Astronomical Dark Windows")
+    print("=" * 60)
+    print(f"📍 Location: ({LAT:.4f}, {LON:.4f})")
+    print(f"   Sun < {ASTRONOMICAL_TWILIGHT_DEG}° and (moon down or illumination < {MOON_ILLUMINATION_THRESHOLD})")
+
+    today = datetime.utcnow().date()
+    windows = nightly_dark_windows(today, 30)
+
+    print("\n📊 Next 30 nights (UTC):")
+    for night, intervals in windows.items():
+        total = sum(w["hours"] for w in intervals)
+        spans = ", ".join(f"{w['start'][11:16]}→{w['end'][11:16]}" for w in intervals) or "—"
+        print(f"  {night} | {total:4.1f} h | {spans}")
+
+    output = {
+        "location": {"lat": LAT, "lon": LON},
+        "computed_at": datetime.utcnow().isoformat() + "Z",
+        "criteria": {
+            "sun_altitude_below_deg": ASTRONOMICAL_TWILIGHT_DEG,
+            "moon_altitude_below_deg": MOON_HORIZON_DEG,
+            "moon_illumination_below": MOON_ILLUMINATION_THRESHOLD
+        },
+        "nights": windows
+    }
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\n✅ Dark windows saved: {OUTPUT_FILE}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+预计算天文历表 - 每年一个紧凑的二进制 .npy 文件
+日出/日落、民用/航海/天文晨昏蒙影、正午、月相; 加载时内存映射, 按日索引查询,
+预测流程不再在热路径上调用 astral
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EPHEMERIS_DIR = os.path.join(ROOT, "data", "ephemeris")
+
+# 太阳事件 (UTC, datetime64[s]; 太阳达不到对应俯角时为 NaT)
+SUN_EVENTS = (
+    "astronomical_dawn", "nautical_dawn", "civil_dawn", "sunrise", "noon",
+    "sunset", "civil_dusk", "nautical_dusk", "astronomical_dusk",
+)
+# 晨昏蒙影事件对应的太阳俯角 (度)
+DEPRESSIONS = {"civil": 6, "nautical": 12, "astronomical": 18}
+
+EPHEMERIS_DTYPE = np.dtype(
+    [(name, "datetime64[s]") for name in SUN_EVENTS] + [("moon_phase", "float32")]
+)
+
+def ephemeris_path(lat, lon, year, directory=EPHEMERIS_DIR):
+    """某地点某年的历表文件路径"""
+    return os.path.join(directory, f"ephemeris_{lat:.4f}_{lon:.4f}_{year}.npy")
+
+def _utc64(dt):
+    """astral 返回的 UTC aware datetime → datetime64[s]"""
+    return np.datetime64(dt.replace(tzinfo=None), "s")
+
+def compute_year(lat, lon, year):
+    """用 astral 计算一整年的历表 (只在构建步骤调用)"""
+    from astral import Observer
+    from astral.sun import dawn, dusk, noon, sunrise, sunset
+    from compute_astronomy import moon_phase_array
+
+    observer = Observer(latitude=lat, longitude=lon)
+    start = date(year, 1, 1)
+    n_days = (date(year + 1, 1, 1) - start).days
+    table = np.zeros(n_days, dtype=EPHEMERIS_DTYPE)
+
+    for i in range(n_days):
+        day = start + timedelta(days=i)
+        events = {}
+        for kind, depression in DEPRESSIONS.items():
+            for name, func in ((f"{kind}_dawn", dawn), (f"{kind}_dusk", dusk)):
+                try:
+                    events[name] = _utc64(func(observer, day, depression=depression))
+                except ValueError:
+                    events[name] = np.datetime64("NaT", "s")
+        for name, func in (("sunrise", sunrise), ("sunset", sunset)):
+            try:
+                events[name] = _utc64(func(observer, day))
+            except ValueError:
+                events[name] = np.datetime64("NaT", "s")
+        events["noon"] = _utc64(noon(observer, day))
+
+        for name in SUN_EVENTS:
+            table[name][i] = events[name]
+
+    # 月相 (0-28, 当日 00:00 UTC)
+    days = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+    table["moon_phase"] = moon_phase_array(days)
+    return table
+
+def build_year(lat, lon, year, directory=EPHEMERIS_DIR):
+    """计算并写入一年的历表文件"""
+    os.makedirs(directory, exist_ok=True)
+    path = ephemeris_path(lat, lon, year, directory)
+    np.save(path, compute_year(lat, lon, year))
+    return path
+
+class Ephemeris:
+    """
+    某地点的历表查询
+    每年的 .npy 以 mmap_mode='r' 打开, 查询是纯数组索引; 缺失的年份首次访问时构建
+    """
+
+    def __init__(self, lat, lon, directory=EPHEMERIS_DIR, build_missing=True):
+        self.lat = lat
+        self.lon = lon
+        self.directory = directory
+        self.build_missing = build_missing
+        self._years = {}
+
+    def year(self, year):
+        """某年的历表 (内存映射)"""
+        year = int(year)
+        if year not in self._years:
+            path = ephemeris_path(self.lat, self.lon, year, self.directory)
+            if not os.path.exists(path):
+                if not self.build_missing:
+                    raise FileNotFoundError(f"Ephemeris not built: {path}")
+                print(f"🔭 Building ephemeris {year} ({self.lat:.4f}, {self.lon:.4f})...")
+                build_year(self.lat, self.lon, year, self.directory)
+            self._years[year] = np.load(path, mmap_mode="r")
+        return self._years[year]
+
+    def lookup(self, times):
+        """
+        每个时刻所在 UTC 日的历表记录 (结构化数组, 形状同输入)
+        """
+        t = np.asarray(times, dtype="datetime64[s]")
+        days = t.astype("datetime64[D]")
+        years = days.astype("datetime64[Y]")
+        day_index = (days - years).astype(np.int64)
+        year_numbers = years.astype(np.int64) + 1970
+
+        out = np.empty(t.shape, dtype=EPHEMERIS_DTYPE)
+        for year in np.unique(year_numbers):
+            mask = year_numbers == year
+            out[mask] = self.year(year)[day_index[mask]]
+        return out
+
+    def last_event(self, times, event):
+        """
+        每个时刻之前 (含) 最近一次 event 的时刻; 没有则为 NaT
+        事件按 UTC 日存储 (西经地区同一 UTC 日内日落早于日出), 在前一天/当天的记录中取 ≤ t 的最晚者
+        """
+        t = np.asarray(times, dtype="datetime64[s]")
+        one_day = np.timedelta64(1, "D")
+        ti = t.astype(np.int64)
+        nat = np.datetime64("NaT", "s").astype(np.int64)
+        best = np.full(t.shape, nat, dtype=np.int64)
+        for shift in (-one_day, np.timedelta64(0, "D")):
+            ev = self.lookup(t + shift)[event].astype(np.int64)
+            ok = (ev != nat) & (ev <= ti)
+            best = np.where(ok & ((best == nat) | (ev > best)), ev, best)
+        return best.astype("datetime64[s]")
+
+    def is_night(self, times):
+        """日落后到日出前: 最近一次日落晚于最近一次日出 (标量输入返回标量)"""
+        t = np.asarray(times, dtype="datetime64[s]")
+        night = self.last_event(t, "sunset") > self.last_event(t, "sunrise")
+        return night[()] if night.ndim == 0 else night
+
+def main():
+    from compute_astronomy import LAT, LON
+
+    print("=" * 60)
+    print("🔭 BlueGlow - Build Astronomy Ephemeris")
+    print("=" * 60)
+
+    # 默认: 今年起 4 年 (覆盖 3 年预测数据库), 也可传入年份: ephemeris.py 2025 2026
+    this_year = datetime.utcnow().year
+    years = [int(y) for y in sys.argv[1:]] or list(range(this_year, this_year + 4))
+
+    print(f"📍 Location: ({LAT:.4f}, {LON:.4f})")
+    for year in years:
+        t0 = time.perf_counter()
+        path = build_year(LAT, LON, year)
+        size_kb = os.path.getsize(path) / 1024
+        print(f"  ✅ {year}: {os.path.basename(path)} ({size_kb:.1f} KB, {time.perf_counter() - t0:.2f}s)")
+
+    print(f"\n📂 Output: {EPHEMERIS_DIR}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+模型特征 - 训练和预测共用的特征计算
+输入时刻数组 (+ 可选坐标), 输出按 FEATURE_COLS 顺序的连续 float32 特征矩阵;
+每个特征对整个时刻数组向量化计算一次, 各脚本不再各自手写特征字典
+"""
+
+import numpy as np
+
+from compute_astronomy import LAT, LON, moon_illumination_array, tide_level_array
+from darkness import is_sun_down
+
+# 模型输入列顺序 (训练保存的 feature_cols 与此一致)
+FEATURE_COLS = ('moon_illumination', 'is_night', 'tide_level',
+                'wave_height', 'water_temp', 'season_sin')
+FEATURE_DTYPE = np.float32
+# 季节编码周期 (天)
+SEASON_DAYS = 365
+
+def as_times(times):
+    return np.asarray(times, dtype='datetime64[s]')
+
+def day_of_year(times):
+    """年积日 1-366"""
+    t = as_times(times)
+    return (t.astype('datetime64[D]') - t.astype('datetime64[Y]')).astype(np.int64) + 1
+
+def season_sin(times):
+    return np.sin(2 * np.pi * day_of_year(times) / SEASON_DAYS)
+
+def night_flags(times, lat=LAT, lon=LON):
+    """
+    是否夜间 (日落后到日出前, 太阳高度, 见 darkness.is_sun_down)
+    lat/lon 可为数组, 与时刻广播 (如 站点×时刻)
+    """
+    return is_sun_down(as_times(times), lat, lon)
+
+def feature_columns(times, climate, moon_illumination=None, is_night=None, tide_level=None,
+                    lat=LAT, lon=LON):
+    """
+    时刻数组 → {特征名: 数组}
+    climate: 带 at(变量, 时刻数组) 的气候态 (谐波/网格/逐日)
+    moon_illumination / is_night / tide_level 可预先传入 (如天文缓存、按站潮汐), 否则直接计算
+    is_night 可传入标量 (如日预报固定按夜间)
+    """
+    t = as_times(times)
+    if moon_illumination is None:
+        moon_illumination = moon_illumination_array(t)
+    if is_night is None:
+        is_night = night_flags(t, lat, lon)
+    if tide_level is None:
+        tide_level = tide_level_array(t)
+    return {
+        'moon_illumination': np.asarray(moon_illumination, dtype=float),
+        'is_night': np.asarray(is_night).astype(np.int64),
+        'tide_level': np.asarray(tide_level, dtype=float),
+        'wave_height': np.asarray(climate.at('wave_height', t), dtype=float),
+        'water_temp': np.asarray(climate.at('water_temp', t), dtype=float),
+        'season_sin': season_sin(t)
+    }
+
+def feature_matrix(columns, feature_cols=FEATURE_COLS, dtype=FEATURE_DTYPE):
+    """
+    特征列 (字典或 DataFrame) → (N, F) 连续矩阵, 列顺序为 feature_cols
+    各列先广播到同一形状 (如 站点×时刻 与 时刻), 再展平
+    """
+    shape = np.broadcast_shapes(*(np.shape(columns[col]) for col in feature_cols))
+    n = int(np.prod(shape))
+    X = np.empty((n, len(feature_cols)), dtype=dtype)
+    for j, col in enumerate(feature_cols):
+        X[:, j] = np.broadcast_to(np.asarray(columns[col]), shape).reshape(n)
+    return X
+
+def feature_row(columns, i):
+    """第 i 个时刻的特征字典 (Python 标量, 用于输出)"""
+    return {
+        col: (values if values.ndim == 0 else values[i]).item()
+        for col, values in columns.items()
+    }
+
+def build_features(times, climate, feature_cols=FEATURE_COLS, **kwargs):
+    """feature_columns + feature_matrix; 返回 (特征矩阵, 特征列)"""
+    columns = feature_columns(times, climate, **kwargs)
+    return feature_matrix(columns, feature_cols), columns
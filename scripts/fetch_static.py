@@ -11,6 +11,7 @@ import pandas as pd
 from erddapy import ERDDAP
 from dotenv import dotenv_values
 import ssl
+from ndbc_store import ingest_csv
 
 # Fix SSL certificate issues on macOS
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -37,7 +38,8 @@ START = parse_date(CFG.get("START","")) or (datetime.utcnow() - timedelta(days=3
 END   = parse_date(CFG.get("END",""))   or datetime.utcnow()
 if START > END: START, END = END, START
 
-NDBC_STATION = CFG.get("NDBC_STATION","46254")
+# 逗号分隔的多个浮标站, 逐站下载为 ndbc_<站号>_<起>_<止>.csv
+NDBC_STATIONS = [s.strip() for s in (CFG.get("NDBC_STATION") or "46254").split(",") if s.strip()]
 
 # Primary sources
 SST_PRIMARY = (
@@ -162,13 +164,13 @@ def fetch_series(primary, fallbacks, prefix, tag):
         print(f"⚠️  {tag}: {fail_count} files failed")
     print(f"{'='*60}")
 
-def fetch_ndbc_hist():
+def fetch_ndbc_hist(station):
     print(f"\n{'='*60}")
-    print("💨 NDBC Wind Data (Historical stdmet)")
+    print(f"💨 NDBC Wind Data (Historical stdmet) - Station {station}")
     print(f"{'='*60}")
     
     y0, y1 = START.year, END.year
-    out_csv = os.path.join(RAW_DIR, f"ndbc_{NDBC_STATION}_{y0}_{y1}.csv")
+    out_csv = os.path.join(RAW_DIR, f"ndbc_{station}_{y0}_{y1}.csv")
     
     if os.path.exists(out_csv):
         print(f"✓ Skip {out_csv}")
@@ -176,7 +178,7 @@ def fetch_ndbc_hist():
     
     frames = []
     for y in range(y0, y1+1):
-        url = f"https://www.ndbc.noaa.gov/data/historical/stdmet/{NDBC_STATION}h{y}.txt.gz"
+        url = f"https://www.ndbc.noaa.gov/data/historical/stdmet/{station}h{y}.txt.gz"
         ok = False
         
         for attempt in range(1, RETRY_TIMES+1):
@@ -244,7 +246,8 @@ def fetch_ndbc_hist():
     if frames:
         allf = pd.concat(frames, ignore_index=True)
         allf.to_csv(out_csv, index=False)
-        print(f"\n✅ Saved: {os.path.basename(out_csv)}")
+        ingest_csv(out_csv)
+        print(f"\n✅ Saved: {os.path.basename(out_csv)} (+ columnar store)")
         print(f"   Total rows: {len(allf):,}")
         print(f"   Years: {y0}-{y1}")
     else:
@@ -257,7 +260,7 @@ def main():
     print("="*60)
     print(f"📅 Time range: {START.date()} → {END.date()}")
     print(f"📍 Bbox: ({LAT_MIN}, {LON_MIN}) → ({LAT_MAX}, {LON_MAX})")
-    print(f"�� NDBC Station: {NDBC_STATION}")
+    print(f"�� NDBC Stations: {', '.join(NDBC_STATIONS)}")
     print(f"🔄 Retry: {RETRY_TIMES} times with {RETRY_BACKOFF}s backoff")
     print(f"📂 Output: {RAW_DIR}")
     print("="*60)
@@ -270,7 +273,8 @@ def main():
     print(f"\n💡 Chl-a sources: {len([CHLA_PRIMARY] + CHLA_FALLBACKS)} configured")
     fetch_series(CHLA_PRIMARY, CHLA_FALLBACKS, "chla", "CHLA")
     
-    fetch_ndbc_hist()
+    for station in NDBC_STATIONS:
+        fetch_ndbc_hist(station)
     
     print("\n" + "="*60)
     print("✅ All downloads complete!")
@@ -7,8 +7,13 @@ import os
 import json
 import numpy as np
 from datetime import datetime, timedelta
-import joblib
-from compute_astronomy import compute_astronomy_features, LOCATION, LAT, LON
+from compute_astronomy import LOCATION, LAT, LON
+from astronomy_provider import ASTRONOMY
+from linear_scorer import load_scorer
+from batch_scoring import predict_columns, probabilities_to_scores
+from features import FEATURE_COLS, feature_columns, feature_row
+from climatology_harmonics import load_climatology_model
+from climatology_table import ClimatologyTable
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
@@ -16,35 +21,45 @@ CLIM_FILE = os.path.join(ROOT, "data", "climatology.json")
 OUTPUT_FILE = os.path.join(ROOT, "site", "forecast.json")
 
 def load_model():
-    model_data = joblib.load(MODEL_FILE)
-    return model_data['model'], model_data['feature_cols']
+    return load_scorer(model_file=MODEL_FILE)
 
 def load_climatology():
-    with open(CLIM_FILE, 'r') as f:
-        return json.load(f)
+    return ClimatologyTable.load(CLIM_FILE)
+
+def extract_day_features(dates, clim):
+    """
+    多日天文特征包和模型输入特征列
+    月照度、潮位取自天文特征包 (LRU 缓存); 按夜间情况预测, is_night 固定为 1
+    """
+    astros = [ASTRONOMY.features(date) for date in dates]
+    columns = feature_columns(
+        np.array(dates, dtype='datetime64[s]'), load_climatology_model(clim),
+        moon_illumination=[astro['moon']['illumination'] for astro in astros],
+        is_night=1,
+        tide_level=[astro['tide']['current_level'] for astro in astros]
+    )
+    return astros, columns
+
+def predict_days(model, feature_cols, dates, clim):
+    """批量预测多日评分 (单次 predict_proba 调用)"""
+    astros, columns = extract_day_features(dates, clim)
+    probs = predict_columns(model, feature_cols, columns)
+    scores = probabilities_to_scores(probs)
+    
+    return [
+        {
+            'date': date,
+            'score': int(score),
+            'astro': astro,
+            'features': feature_row(columns, i)
+        }
+        for i, (date, score, astro) in enumerate(zip(dates, scores, astros))
+    ]
 
 def predict_single_day(model, feature_cols, date, clim):
     """预测单日评分"""
-    doy = date.timetuple().tm_yday
-    
-    # 计算天文特征
-    astro = compute_astronomy_features(date)
-    
-    # 提取特征
-    features = {
-        'moon_illumination': astro['moon']['illumination'],
-        'is_night': 1,
-        'tide_level': astro['tide']['current_level'],
-        'wave_height': float(clim['wave_height_doy'].get(str(doy), 1.0)),
-        'water_temp': float(clim['water_temp_doy'].get(str(doy), 16.0)),
-        'season_sin': np.sin(2 * np.pi * doy / 365)
-    }
-    
-    X = np.array([[features[col] for col in feature_cols]])
-    prob = model.predict_proba(X)[0, 1]
-    score = int(prob * 100)
-    
-    return score, astro, features
+    pred = predict_days(model, feature_cols, [date], clim)[0]
+    return pred['score'], pred['astro'], pred['features']
 
 def find_best_week(days_to_check=30):
     """在未来N天中寻找评分最高的连续7天"""
@@ -55,18 +70,9 @@ def find_best_week(days_to_check=30):
     
     # 计算所有日期的评分
     today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
-    all_predictions = []
-    
-    for i in range(days_to_check):
-        date = today + timedelta(days=i)
-        score, astro, features = predict_single_day(model, feature_cols, date, clim)
-        
-        all_predictions.append({
-            'date': date,
-            'score': score,
-            'astro': astro,
-            'features': features
-        })
+    dates = [today + timedelta(days=i) for i in range(days_to_check)]
+    all_predictions = predict_days(model, feature_cols, dates, clim)
+    ASTRONOMY.report()
     
     # 找到连续7天平均分最高的窗口
     best_avg = -1
@@ -180,7 +186,7 @@ def main():
         'metadata': {
             'search_window': '30 days',
             'selection_method': 'Highest average score for 7 consecutive days',
-            'features_used': ['moon_illumination', 'is_night', 'tide_level', 'wave_height', 'water_temp', 'season_sin'],
+            'features_used': list(FEATURE_COLS),
             'weak_supervision': True
         }
     }
@@ -7,9 +7,16 @@ import os
 import json
 import numpy as np
 from datetime import datetime, timedelta
-import joblib
-from compute_astronomy import moon_illumination, compute_tides, is_near_low_tide, LOCATION, LAT, LON
-from astral.sun import sun
+from compute_astronomy import (
+    moon_illumination_array, tide_level_array, TIDE_INDEX, LAT, LON
+)
+from astronomy_provider import ASTRONOMY
+from darkness import is_dark, nightly_dark_windows
+from linear_scorer import load_scorer
+from batch_scoring import predict_matrix, probabilities_to_scores, rate_score
+from features import feature_columns, feature_matrix, feature_row, night_flags
+from climatology_harmonics import load_climatology_model
+from climatology_table import ClimatologyTable
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
@@ -17,103 +24,107 @@ CLIM_FILE = os.path.join(ROOT, "data", "climatology.json")
 OUTPUT_FILE = os.path.join(ROOT, "site", "forecast_detailed.json")
 
 def load_model():
-    model_data = joblib.load(MODEL_FILE)
-    return model_data['model'], model_data['feature_cols']
+    return load_scorer(model_file=MODEL_FILE)
 
 def load_climatology():
-    with open(CLIM_FILE, 'r') as f:
-        return json.load(f)
+    return ClimatologyTable.load(CLIM_FILE)
+
+def astronomy_arrays(dts):
+    """对任意时刻数组一次性计算天文特征"""
+    times = np.array(dts, dtype='datetime64[s]')
+    return {
+        'moon_illumination': moon_illumination_array(times),
+        'tide_level': tide_level_array(times),
+        'near_low_tide': TIDE_INDEX.near_low_tide(times, window_hours=2),
+        'is_night': night_flags(times),
+        'is_dark': is_dark(times)
+    }
+
+def predict_timeslots(model, feature_cols, dts, clim, astro=None, climate=None):
+    """
+    批量预测多个时刻的评分 (单次 predict_proba 调用)
+    astro: 与 dts 对齐的天文特征数组 (如来自 ASTRONOMY.grid), 缺省时直接计算
+    climate: 带 at(变量, 时刻数组) 的气候态 (谐波/网格/逐日), 缺省时按 CLIMATOLOGY_MODEL 加载
+    只有天文暗夜 (is_dark) 的时刻送入模型评分, 其余时刻记 0 分
+    is_night 与训练相同, 由 feature_columns 按太阳高度计算
+    """
+    if astro is None:
+        astro = astronomy_arrays(dts)
+    if climate is None:
+        climate = load_climatology_model(clim)
+    columns = feature_columns(
+        np.array(dts, dtype='datetime64[s]'), climate,
+        moon_illumination=astro['moon_illumination'],
+        tide_level=astro['tide_level']
+    )
+    is_darks = np.asarray(astro['is_dark'], dtype=bool)
+    probs = np.zeros(len(dts))
+    probs[is_darks] = predict_matrix(model, feature_matrix(columns, feature_cols)[is_darks])
+    scores = probabilities_to_scores(probs)
+    
+    preds = []
+    for i, (prob, score, dark) in enumerate(zip(probs, scores, is_darks)):
+        preds.append({
+            'score': int(score),
+            'probability': round(prob, 3),
+            'features': feature_row(columns, i),
+            'is_night': bool(columns['is_night'][i]),
+            'is_dark': bool(dark),
+            'near_low_tide': bool(astro['near_low_tide'][i])
+        })
+    return preds
 
 def predict_timeslot(model, feature_cols, dt, clim):
     """预测特定时刻的评分"""
-    doy = dt.timetuple().tm_yday
-    hour = dt.hour
-    
-    # 月照度
-    moon_illum = moon_illumination(dt)
-    
-    # 是否夜间 (日落后到日出前)
-    s = sun(LOCATION.observer, date=dt.date())
-    # 转换为naive datetime进行比较
-    sunrise_naive = s['sunrise'].replace(tzinfo=None)
-    sunset_naive = s['sunset'].replace(tzinfo=None)
-    is_night = (dt < sunrise_naive or dt > sunset_naive)
-    
-    # 潮汐
-    tides = compute_tides(dt)
-    tide_level = tides['current_level']
-    near_low = is_near_low_tide(dt, window_hours=2)
-    
-    # 气候学特征
-    wave_height = float(clim['wave_height_doy'].get(str(doy), 1.0))
-    water_temp = float(clim['water_temp_doy'].get(str(doy), 16.0))
-    season_sin = np.sin(2 * np.pi * doy / 365)
-    
-    # 构建特征
-    features = {
-        'moon_illumination': moon_illum,
-        'is_night': int(is_night),
-        'tide_level': tide_level,
-        'wave_height': wave_height,
-        'water_temp': water_temp,
-        'season_sin': season_sin
-    }
-    
-    X = np.array([[features[col] for col in feature_cols]])
-    prob = model.predict_proba(X)[0, 1]
-    score = int(prob * 100)
+    return predict_timeslots(model, feature_cols, [dt], clim)[0]
+
+def build_timeslot(dt, pred):
+    """把单个时刻的预测整理成输出格式"""
+    score = pred['score']
+    rating, icon = rate_score(score)
     
     return {
+        'time': dt.strftime('%H:%M'),
+        'datetime': dt.isoformat(),
         'score': score,
-        'probability': round(prob, 3),
-        'features': features,
-        'is_night': is_night,
-        'near_low_tide': near_low
+        'rating': rating,
+        'icon': icon,
+        'is_night': pred['is_night'],
+        'is_dark': pred['is_dark'],
+        'conditions': {
+            'moon_illumination': round(pred['features']['moon_illumination'], 3),
+            'tide_level': round(pred['features']['tide_level'], 3),
+            'near_low_tide': pred['near_low_tide'],
+            'wave_height_m': round(pred['features']['wave_height'], 2),
+            'water_temp_c': round(pred['features']['water_temp'], 1)
+        }
     }
 
+def generate_timeslots(dates, model, feature_cols, clim, use_cache=False):
+    """
+    为多天生成8个时段（3小时间隔）的预测
+    整个 日期×时段 网格一次性评分, 返回每天一个时段列表
+    use_cache: 天文特征按天取自 LRU 缓存 (与同一进程中 find_best_week 查询的日期共享);
+               默认对整个网格一次向量化计算 (如整年数据, 日期不会重复)
+    """
+    # 0:00, 3:00, 6:00, 9:00, 12:00, 15:00, 18:00, 21:00
+    dts = [
+        datetime(date.year, date.month, date.day, hour, 0, 0)
+        for date in dates
+        for hour in range(0, 24, 3)
+    ]
+    # 3小时分辨率的缓存网格正好对应这8个时段
+    astro = None
+    if use_cache:
+        astro = ASTRONOMY.grid([date.date() if isinstance(date, datetime) else date for date in dates], 180)
+    preds = predict_timeslots(model, feature_cols, dts, clim, astro)
+    timeslots = [build_timeslot(dt, pred) for dt, pred in zip(dts, preds)]
+    
+    return [timeslots[i:i + 8] for i in range(0, len(timeslots), 8)]
+
 def generate_daily_timeslots(date, model, feature_cols, clim):
     """为某一天生成8个时段（3小时间隔）的预测"""
-    timeslots = []
-    
-    # 0:00, 3:00, 6:00, 9:00, 12:00, 15:00, 18:00, 21:00
-    for hour in range(0, 24, 3):
-        dt = datetime(date.year, date.month, date.day, hour, 0, 0)
-        pred = predict_timeslot(model, feature_cols, dt, clim)
-        
-        # 评级
-        score = pred['score']
-        if score >= 70:
-            rating = "Excellent"
-            icon = "🌟"
-        elif score >= 50:
-            rating = "Good"
-            icon = "✨"
-        elif score >= 30:
-            rating = "Fair"
-            icon = "💫"
-        else:
-            rating = "Poor"
-            icon = "⭐"
-        
-        timeslot = {
-            'time': dt.strftime('%H:%M'),
-            'datetime': dt.isoformat(),
-            'score': score,
-            'rating': rating,
-            'icon': icon,
-            'is_night': pred['is_night'],
-            'conditions': {
-                'moon_illumination': round(pred['features']['moon_illumination'], 3),
-                'tide_level': round(pred['features']['tide_level'], 3),
-                'near_low_tide': pred['near_low_tide'],
-                'wave_height_m': round(pred['features']['wave_height'], 2),
-                'water_temp_c': round(pred['features']['water_temp'], 1)
-            }
-        }
-        
-        timeslots.append(timeslot)
-    
-    return timeslots
+    return generate_timeslots([date], model, feature_cols, clim)[0]
 
 def find_best_week_with_timeslots(days_to_check=30):
     """寻找最佳周并生成详细时段预测"""
@@ -124,14 +135,15 @@ def find_best_week_with_timeslots(days_to_check=30):
     
     # 先找到最佳周的起始日期
     today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
-    daily_scores = []
+    dates = [today + timedelta(days=i) for i in range(days_to_check)]
+    all_timeslots = generate_timeslots(dates, model, feature_cols, clim, use_cache=True)
+    dark_windows = nightly_dark_windows(dates[0].date(), days_to_check)
     
-    for i in range(days_to_check):
-        date = today + timedelta(days=i)
-        # 计算当天所有时段的平均分
-        timeslots = generate_daily_timeslots(date, model, feature_cols, clim)
-        avg_score = sum(t['score'] for t in timeslots) / len(timeslots)
-        daily_scores.append((date, avg_score))
+    # 计算每天所有时段的平均分
+    daily_scores = [
+        (date, sum(t['score'] for t in timeslots) / len(timeslots))
+        for date, timeslots in zip(dates, all_timeslots)
+    ]
     
     # 找到连续7天平均分最高的窗口
     best_avg = -1
@@ -144,6 +156,7 @@ def find_best_week_with_timeslots(days_to_check=30):
             best_start_idx = i
     
     best_week_start = daily_scores[best_start_idx][0]
+    ASTRONOMY.report()
     print(f"\n✅ 找到最佳观测周:")
     print(f"   起始日期: {best_week_start.strftime('%Y-%m-%d')}")
     print(f"   平均评分: {best_avg:.1f}/100")
@@ -152,7 +165,7 @@ def find_best_week_with_timeslots(days_to_check=30):
     forecasts = []
     for i in range(7):
         date = best_week_start + timedelta(days=i)
-        timeslots = generate_daily_timeslots(date, model, feature_cols, clim)
+        timeslots = all_timeslots[best_start_idx + i]
         
         # 计算当天最佳时段
         best_timeslot = max(timeslots, key=lambda t: t['score'])
@@ -178,6 +191,7 @@ def find_best_week_with_timeslots(days_to_check=30):
             'best_score': best_timeslot['score'],
             'best_time': best_timeslot['time'],
             'timeslots': timeslots,
+            'dark_windows': dark_windows[date.date().isoformat()],
             'recommendation': recommendation
         }
         
@@ -210,6 +224,7 @@ def main():
             'search_window': '30 days',
             'timeslot_interval': '3 hours',
             'timeslots_per_day': 8,
+            'scored_timeslots': 'Astronomical darkness only (sun < -18°, moon down or illumination < 0.3)',
             'selection_method': 'Highest average score for 7 consecutive days'
         }
     }
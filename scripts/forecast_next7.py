@@ -8,7 +8,11 @@ import os
 import json
 import numpy as np
 from datetime import datetime, timedelta
-import joblib
+from linear_scorer import load_scorer
+from batch_scoring import predict_columns, probabilities_to_scores, rate_score
+from features import feature_columns
+from climatology_harmonics import load_climatology_model
+from climatology_table import ClimatologyTable
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
@@ -18,80 +22,47 @@ OUTPUT_FILE = os.path.join(ROOT, "site", "forecast.json")
 
 def load_model():
     """加载训练好的模型"""
-    model_data = joblib.load(MODEL_FILE)
-    return model_data['model'], model_data['feature_cols']
+    return load_scorer(model_file=MODEL_FILE)
 
 def load_climatology():
     """加载气候学数据"""
-    with open(CLIM_FILE, 'r') as f:
-        return json.load(f)
+    return ClimatologyTable.load(CLIM_FILE)
 
 def load_astronomy():
     """加载天文数据"""
     with open(ASTRO_FILE, 'r') as f:
         return json.load(f)
 
-def extract_features(astro_day, clim):
+def extract_features(astro_days, clim):
     """
-    从天文数据和气候学数据提取特征
+    从天文数据 (astronomy_next7.json 的逐日记录) 和气候态提取所有天的特征列
+    月照度、潮位取自天文文件; 预测夜间情况 (生物发光主要在夜间), is_night 固定为 1
     """
-    date = datetime.fromisoformat(astro_day['date'])
-    doy = date.timetuple().tm_yday
-    
-    # 天文特征
-    moon_illum = astro_day['moon']['illumination']
-    is_dark_night = astro_day['moon']['is_dark_night']
-    tide_level = astro_day['tide']['current_level']
-    near_low_tide = astro_day['tide']['near_low_tide']
-    
-    # 气候学特征
-    wave_height = float(clim['wave_height_doy'].get(str(doy), 1.0))
-    water_temp = float(clim['water_temp_doy'].get(str(doy), 16.0))
-    season_sin = np.sin(2 * np.pi * doy / 365)
-    
-    # 构建特征向量 (与训练时一致)
-    features = {
-        'moon_illumination': moon_illum,
-        'is_night': 1,  # 预测夜间情况 (生物发光主要在夜间)
-        'tide_level': tide_level,
-        'wave_height': wave_height,
-        'water_temp': water_temp,
-        'season_sin': season_sin
-    }
-    
-    return features
+    times = np.array([day['date'] for day in astro_days], dtype='datetime64[s]')
+    return feature_columns(
+        times, load_climatology_model(clim),
+        moon_illumination=[day['moon']['illumination'] for day in astro_days],
+        is_night=1,
+        tide_level=[day['tide']['current_level'] for day in astro_days]
+    )
 
-def predict_for_day(model, feature_cols, features):
-    """对单天进行预测"""
-    X = np.array([[features[col] for col in feature_cols]])
-    
-    # 预测概率
-    prob = model.predict_proba(X)[0, 1]  # 类别1(高可能)的概率
-    
-    # 转换为0-100的评分
-    score = int(prob * 100)
-    
-    # 评级
-    if score >= 70:
-        rating = "Excellent"
-        icon = "🌟"
-    elif score >= 50:
-        rating = "Good"
-        icon = "✨"
-    elif score >= 30:
-        rating = "Fair"
-        icon = "💫"
-    else:
-        rating = "Poor"
-        icon = "⭐"
+def summarize_prediction(prob, score):
+    """概率和评分 → 预测结果"""
+    rating, icon = rate_score(score)
     
     return {
-        'score': score,
+        'score': int(score),
         'rating': rating,
         'icon': icon,
         'probability': round(prob, 3)
     }
 
+def predict_for_days(model, feature_cols, columns):
+    """对多天一次性预测 (单次 predict_proba 调用)"""
+    probs = predict_columns(model, feature_cols, columns)
+    scores = probabilities_to_scores(probs)
+    return [summarize_prediction(prob, score) for prob, score in zip(probs, scores)]
+
 def generate_forecast():
     """生成7天预测"""
     print("=" * 60)
@@ -111,15 +82,15 @@ def generate_forecast():
     print("\n🔮 Generating predictions...")
     forecasts = []
     
-    for day in astro['forecast_days']:
+    # 提取特征
+    columns = extract_features(astro['forecast_days'], clim)
+    
+    # 预测 (所有天一次性评分)
+    preds = predict_for_days(model, feature_cols, columns)
+    
+    for i, (day, pred) in enumerate(zip(astro['forecast_days'], preds)):
         date = datetime.fromisoformat(day['date'])
         
-        # 提取特征
-        features = extract_features(day, clim)
-        
-        # 预测
-        pred = predict_for_day(model, feature_cols, features)
-        
         # 构建预测结果
         forecast = {
             'date': date.strftime('%Y-%m-%d'),
@@ -137,8 +108,8 @@ def generate_forecast():
                     'near_low_tide': day['tide']['near_low_tide'],
                     'low_tide_times': day['tide']['low_tide_times'][:2]
                 },
-                'wave_height_m': round(features['wave_height'], 2),
-                'water_temp_c': round(features['water_temp'], 1)
+                'wave_height_m': round(float(columns['wave_height'][i]), 2),
+                'water_temp_c': round(float(columns['water_temp'][i]), 1)
             },
             'recommendation': generate_recommendation(pred['score'], day)
         }
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+多观测点批量预测 - 站点×时刻 一次广播计算天文特征, 一次 predict_proba 评分
+每个观测点输出一个预测文件: site/forecasts/<site_id>.json
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+from datetime import datetime, timedelta
+
+from compute_astronomy import (
+    ROOT, HARMONIC_TIDES, TIDE_INDEX, TideEventIndex,
+    moon_illumination_array, tide_level_array
+)
+from tide_harmonics import HarmonicTidePredictor, load_constituents
+from darkness import darkness_margin, nightly_dark_windows
+from linear_scorer import load_scorer
+from batch_scoring import predict_matrix, probabilities_to_scores, rate_score
+from sites import load_sites, site_coordinates
+from features import feature_columns, feature_matrix
+from climatology_harmonics import load_climatology_model
+from climatology_table import ClimatologyTable
+
+MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
+CLIM_FILE = os.path.join(ROOT, "data", "climatology.json")
+OUTPUT_DIR = os.path.join(ROOT, "site", "forecasts")
+
+SLOT_HOURS = 3
+DEFAULT_DAYS = 30
+
+def load_model():
+    return load_scorer(model_file=MODEL_FILE)
+
+def load_climatology():
+    return ClimatologyTable.load(CLIM_FILE)
+
+def station_tides(station, times, window_hours=2):
+    """
+    某潮位站在时间网格上的 (归一化潮位, 是否近低潮)
+    调和模型且有该站调和常数时按站计算, 否则使用全局潮汐模型 (缺少调和常数时给出警告)
+    """
+    path = os.path.join(ROOT, "data", f"tide_constituents_{station}.json")
+    if HARMONIC_TIDES is None or not os.path.exists(path):
+        if HARMONIC_TIDES is not None:
+            print(f"⚠️  No constituents for tide station {station} ({os.path.relpath(path, ROOT)}), "
+                  f"using the global tide model")
+        return tide_level_array(times), TIDE_INDEX.near_low_tide(times, window_hours=window_hours)
+
+    predictor = HarmonicTidePredictor(load_constituents(path))
+    pad = np.timedelta64(1, "D")
+    index = TideEventIndex.from_harmonic(predictor, times[0] - pad, times[-1] + pad)
+    return predictor.normalized_level(times), index.near_low_tide(times, window_hours=window_hours)
+
+def site_astronomy(sites, times):
+    """
+    站点×时刻 天文特征 (形状 (n_sites, n_times))
+    太阳/月亮高度按坐标广播一次算完; 月照度各站相同; 潮汐按潮位站去重计算
+    """
+    lat, lon = site_coordinates(sites)
+    moon_illum = moon_illumination_array(times)
+
+    tides = {}
+    for station in dict.fromkeys(site["tide_station"] for site in sites):
+        tides[station] = station_tides(station, times)
+
+    return {
+        "moon_illumination": np.broadcast_to(moon_illum, (len(sites), len(times))),
+        "is_dark": darkness_margin(times, lat, lon) > 0,
+        "tide_level": np.stack([tides[site["tide_station"]][0] for site in sites]),
+        "near_low_tide": np.stack([tides[site["tide_station"]][1] for site in sites])
+    }
+
+def forecast_sites(model, feature_cols, sites, start_date, n_days, clim):
+    """
+    所有站点×时段一次评分
+    返回: (时间网格, 天文特征, 模型特征列 (含气候态), 概率矩阵 (n_sites, n_times))
+    """
+    slots = np.arange(0, 24, SLOT_HOURS).astype("timedelta64[h]")
+    days = np.datetime64(start_date, "D") + np.arange(n_days).astype("timedelta64[D]")
+    times = (days[:, None] + slots[None, :]).ravel().astype("datetime64[s]")
+
+    astro = site_astronomy(sites, times)
+    lat, lon = site_coordinates(sites)
+    # 气候态和季节各站共用, 形状 (n_times,); 天文特征 (n_sites, n_times), 构建矩阵时广播
+    # is_night 与训练同一实现 (太阳高度), 按各站坐标计算
+    columns = feature_columns(
+        times, load_climatology_model(clim),
+        moon_illumination=astro["moon_illumination"],
+        tide_level=astro["tide_level"],
+        lat=lat, lon=lon
+    )
+    # 只有天文暗夜时刻送入模型评分, 其余记 0 (与单站详细预测一致); 先按暗夜掩码取行再组装矩阵
+    is_darks = np.asarray(astro["is_dark"], dtype=bool)
+    dark_columns = {col: np.broadcast_to(columns[col], is_darks.shape)[is_darks] for col in feature_cols}
+    probs = np.zeros(is_darks.shape)
+    probs[is_darks] = predict_matrix(model, feature_matrix(dark_columns, feature_cols))
+    return times, astro, columns, probs
+
+def build_site_forecast(site, i, times, astro, climate, probs, dark_windows):
+    """整理单个站点的输出"""
+    scores = probabilities_to_scores(probs[i])
+    by_date = {}
+    for j, t in enumerate(times.astype(datetime)):
+        rating, icon = rate_score(int(scores[j]))
+        by_date.setdefault(t.date().isoformat(), []).append({
+            'time': t.strftime('%H:%M'),
+            'datetime': t.isoformat(),
+            'score': int(scores[j]),
+            'rating': rating,
+            'icon': icon,
+            'is_night': bool(climate['is_night'][i, j]),
+            'is_dark': bool(astro['is_dark'][i, j]),
+            'moon_illumination': round(float(astro['moon_illumination'][i, j]), 3),
+            'tide_level': round(float(astro['tide_level'][i, j]), 3),
+            'near_low_tide': bool(astro['near_low_tide'][i, j]),
+            'wave_height': round(float(climate['wave_height'][j]), 2),
+            'water_temp': round(float(climate['water_temp'][j]), 1)
+        })
+
+    days = []
+    for date_str, timeslots in by_date.items():
+        best = max(timeslots, key=lambda x: x['score'])
+        days.append({
+            'date': date_str,
+            'max_score': best['score'],
+            'best_time': best['time'],
+            'timeslots': timeslots,
+            'dark_windows': dark_windows.get(date_str, [])
+        })
+
+    return {
+        'site': site,
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'slot_hours': SLOT_HOURS,
+        'days': days
+    }
+
+def main():
+    print("=" * 60)
+    print("🏖️  BlueGlow - Multi-Site Forecast")
+    print("=" * 60)
+
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DAYS
+    sites = load_sites()
+    model, feature_cols = load_model()
+    clim = load_climatology()
+    today = datetime.utcnow().date()
+
+    print(f"📍 {len(sites)} sites × {n_days} days × {24 // SLOT_HOURS} slots")
+    t0 = time.perf_counter()
+    times, astro, climate, probs = forecast_sites(model, feature_cols, sites, today, n_days, clim)
+    print(f"   ⚡ Scored {probs.size} site-slots in {time.perf_counter() - t0:.2f}s")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for i, site in enumerate(sites):
+        dark_windows = nightly_dark_windows(today, n_days, site['lat'], site['lon'])
+        output = build_site_forecast(site, i, times, astro, climate, probs, dark_windows)
+        path = os.path.join(OUTPUT_DIR, f"{site['id']}.json")
+        with open(path, 'w') as f:
+            json.dump(output, f, indent=2)
+        best = max(output['days'], key=lambda d: d['max_score'])
+        print(f"  ✅ {site['name']:<36} best {best['date']} {best['best_time']} ({best['max_score']})")
+
+    print(f"\n⏱️  Total: {time.perf_counter() - t0:.2f}s")
+    print(f"📂 Output: {OUTPUT_DIR}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
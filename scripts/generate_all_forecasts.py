@@ -5,7 +5,6 @@ Generate forecast data for every day in the next 3 years
 """
 
 import json
-import pickle
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -14,107 +13,109 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from scripts.compute_astronomy import moon_illumination, is_dark_night, compute_tides, get_moon_phase_name
-from scripts.compute_climatology import compute_seasonal_defaults, get_season
+from scripts.compute_astronomy import get_moon_phase_name
+from scripts.climatology_table import ClimatologyTable
+from scripts.climatology_harmonics import load_climatology_model
+from scripts.linear_scorer import load_scorer
+from scripts.batch_scoring import predict_columns, probabilities_to_scores, rate_score
+from scripts.features import feature_columns, feature_row
 
 # La Jolla location
 LAT = 32.83
 LON = -117.32
 
-# Load seasonal climatology once
-SEASONAL_CLIM = compute_seasonal_defaults()
+# Load climatology once (DOY arrays from data/climatology.json)
+CLIMATOLOGY = ClimatologyTable.load()
+
+TIMESLOT_HOURS = [0, 3, 6, 9, 12, 15, 18, 21]
 
 def load_model():
     """Load trained model"""
-    model_path = Path(__file__).parent.parent / 'models' / 'biolum_lr.pkl'
-    with open(model_path, 'rb') as f:
-        return pickle.load(f)
+    return load_scorer()
 
-def predict_day(model, date, hour=12):
+def extract_features(date_hours):
+    """
+    Build model features for many (date, hour) pairs at once
+
+    Args:
+        date_hours: list of (datetime.date, hour) tuples
+
+    Returns:
+        dict: Feature name -> array (shared feature pipeline, see features.py)
+    """
+    times = np.array(
+        [datetime.combine(date, datetime.min.time().replace(hour=hour)) for date, hour in date_hours],
+        dtype='datetime64[s]'
+    )
+    return feature_columns(times, load_climatology_model(CLIMATOLOGY))
+
+def build_conditions(features):
+    """Display conditions for one timeslot's feature dict"""
+    return {
+        'moon_illumination': round(features['moon_illumination'], 3),
+        'moon_phase': get_moon_phase_name(features['moon_illumination']),
+        'tide_level': round(features['tide_level'], 3),
+        'wave_height_m': round(features['wave_height'], 2),
+        'water_temp_c': round(features['water_temp'], 1)
+    }
+
+def predict_hours(model, feature_cols, date_hours):
+    """
+    Predict bioluminescence scores for many (date, hour) pairs at once
+
+    Args:
+        model: Trained ML model
+        feature_cols: Feature order expected by the model
+        date_hours: list of (datetime.date, hour) tuples
+
+    Returns:
+        list: One prediction dict per (date, hour) pair
+    """
+    # Moon, tide, night flag and climatology for the whole grid in one vectorized pass
+    columns = extract_features(date_hours)
+
+    # Predict the whole grid with a single predict_proba call
+    probs = predict_columns(model, feature_cols, columns)
+    scores = np.clip(probabilities_to_scores(probs), 0, 100)
+
+    preds = []
+    for i, ((date, hour), score) in enumerate(zip(date_hours, scores)):
+        features = feature_row(columns, i)
+        score = int(score)
+        rating, icon = rate_score(score)
+        preds.append({
+            'hour': hour,
+            'score': score,
+            'rating': rating,
+            'icon': icon,
+            'is_night': bool(features['is_night']),
+            'conditions': build_conditions(features)
+        })
+
+    return preds
+
+def predict_day(model, feature_cols, date, hour=12):
     """
     Predict bioluminescence score for a specific date and hour
 
     Args:
         model: Trained ML model
+        feature_cols: Feature order expected by the model
         date: datetime.date object
         hour: Hour of day (0-23)
 
     Returns:
         dict: Prediction with score, rating, conditions
     """
-    dt = datetime.combine(date, datetime.min.time().replace(hour=hour))
-
-    # Get moon data
-    moon_illum = moon_illumination(dt)
-    moon_phase_name = get_moon_phase_name(moon_illum)
-
-    # Check if night (simplified - assume 6pm to 6am)
-    is_night = hour < 6 or hour >= 18
-
-    # Get tide
-    tide_level = compute_tides(dt)
-
-    # Get climatology from seasonal data
-    season = get_season(date.month)
-    clim = SEASONAL_CLIM[season]
-    wave_height = clim['wave_height_m']
-    water_temp = clim['water_temp_c']
-
-    # Season encoding
-    day_of_year = date.timetuple().tm_yday
-    season_sin = np.sin(2 * np.pi * day_of_year / 365.25)
-    season_cos = np.cos(2 * np.pi * day_of_year / 365.25)
-
-    # Create feature vector
-    features = np.array([[
-        moon_illum,
-        1 if is_night else 0,
-        tide_level,
-        wave_height,
-        water_temp,
-        season_sin
-    ]])
-
-    # Predict
-    score_raw = model.predict_proba(features)[0][1] * 100
-    score = int(np.clip(score_raw, 0, 100))
-
-    # Rating
-    if score >= 90:
-        rating = "Excellent"
-        icon = "🌟"
-    elif score >= 80:
-        rating = "Good"
-        icon = "✨"
-    elif score >= 70:
-        rating = "Fair"
-        icon = "💫"
-    else:
-        rating = "Poor"
-        icon = "⭐"
-
-    return {
-        'hour': hour,
-        'score': score,
-        'rating': rating,
-        'icon': icon,
-        'is_night': is_night,
-        'conditions': {
-            'moon_illumination': round(moon_illum, 3),
-            'moon_phase': moon_phase_name,
-            'tide_level': round(tide_level, 3),
-            'wave_height_m': wave_height,
-            'water_temp_c': water_temp
-        }
-    }
+    return predict_hours(model, feature_cols, [(date, hour)])[0]
 
-def generate_day_forecast(model, date):
-    """Generate forecast for one day (8 timeslots, 3-hour intervals)"""
+def build_day_forecast(date, preds):
+    """Assemble one day's forecast from its 8 timeslot predictions"""
     timeslots = []
     scores = []
 
-    for hour in [0, 3, 6, 9, 12, 15, 18, 21]:
-        pred = predict_day(model, date, hour)
+    for pred in preds:
+        hour = pred['hour']
         scores.append(pred['score'])
 
         timeslots.append({
@@ -145,6 +146,21 @@ def generate_day_forecast(model, date):
         'recommendation': f"Best viewing at {best_slot['time']} (Score: {best_slot['score']})"
     }
 
+def generate_forecasts(model, feature_cols, dates):
+    """Generate forecasts for many days (8 timeslots each) in one batch"""
+    date_hours = [(date, hour) for date in dates for hour in TIMESLOT_HOURS]
+    preds = predict_hours(model, feature_cols, date_hours)
+
+    n = len(TIMESLOT_HOURS)
+    return [
+        build_day_forecast(date, preds[i * n:(i + 1) * n])
+        for i, date in enumerate(dates)
+    ]
+
+def generate_day_forecast(model, feature_cols, date):
+    """Generate forecast for one day (8 timeslots, 3-hour intervals)"""
+    return generate_forecasts(model, feature_cols, [date])[0]
+
 def main():
     print("="*60)
     print("🔮 Generating 3-Year Forecast Database")
@@ -152,7 +168,7 @@ def main():
 
     # Load model
     print("\n📦 Loading model...")
-    model = load_model()
+    model, feature_cols = load_model()
     print("   ✓ Model loaded")
 
     # Generate forecasts
@@ -162,23 +178,18 @@ def main():
     print(f"\n📅 Date range: {start_date} to {end_date}")
     print(f"   Total days: {(end_date - start_date).days}")
 
-    all_forecasts = {}
-
+    dates = []
     current_date = start_date
-    count = 0
-
     while current_date <= end_date:
-        if count % 100 == 0:
-            print(f"   Processing: {current_date} ({count} days completed)")
-
-        # Generate forecast for this day
-        forecast = generate_day_forecast(model, current_date)
+        dates.append(current_date)
+        current_date += timedelta(days=1)
+    count = len(dates)
 
-        # Store by date string
-        all_forecasts[current_date.isoformat()] = forecast
+    print(f"   Scoring {count * len(TIMESLOT_HOURS)} timeslots in one batch...")
+    forecasts = generate_forecasts(model, feature_cols, dates)
 
-        current_date += timedelta(days=1)
-        count += 1
+    # Store by date string
+    all_forecasts = {date.isoformat(): forecast for date, forecast in zip(dates, forecasts)}
 
     # Save to file
     output_path = Path(__file__).parent.parent / 'site' / 'forecast_database.json'
@@ -8,9 +8,10 @@ import json
 import sys
 from datetime import datetime, timedelta
 from forecast_detailed import (
-    load_model, load_climatology, generate_daily_timeslots,
+    load_model, load_climatology, generate_timeslots,
     LAT, LON
 )
+from darkness import nightly_dark_windows
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 OUTPUT_FILE = os.path.join(ROOT, "site", "forecast_year.json")
@@ -33,19 +34,15 @@ def main():
     print(f"\n📅 Generating forecasts from {start_date} to {end_date}")
     print(f"   Total days: 365")
     
-    all_forecasts = []
-    current_date = start_date
-    day_count = 0
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
     
-    while current_date < end_date:
-        day_count += 1
-        
-        if day_count % 30 == 0 or day_count == 1:
-            print(f"   Processing day {day_count}/365: {current_date}")
-        
-        # 生成该天的所有时段预测
-        timeslots = generate_daily_timeslots(current_date, model, feature_cols, clim)
-        
+    # 整年 日期×时段 网格一次性评分
+    print(f"   Scoring {len(dates) * 8} timeslots in one batch...")
+    all_timeslots = generate_timeslots(dates, model, feature_cols, clim)
+    dark_windows = nightly_dark_windows(start_date, len(dates))
+    
+    all_forecasts = []
+    for current_date, timeslots in zip(dates, all_timeslots):
         # 计算平均分和最佳时段
         scores = [ts['score'] for ts in timeslots]
         avg_score = int(sum(scores) / len(scores))
@@ -58,11 +55,11 @@ def main():
             'avg_score': avg_score,
             'best_score': best_score,
             'best_time': best_timeslot['time'],
-            'timeslots': timeslots
+            'timeslots': timeslots,
+            'dark_windows': dark_windows[current_date.isoformat()]
         }
         
         all_forecasts.append(forecast)
-        current_date += timedelta(days=1)
     
     # 构建完整输出
     output_data = {
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+线性模型评分 - 系数导出为 JSON, 预测只需一次矩阵乘法 + sigmoid
+预测脚本不再反序列化 sklearn 估计器 (省去 sklearn 的导入时间);
+save_model 同时写出 models/biolum_lr.json, 单独运行本脚本可从已有的 .pkl 导出
+"""
+
+import os
+import json
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
+MODEL_JSON = os.path.join(ROOT, "models", "biolum_lr.json")
+
+FORMAT = "linear-logistic/1"
+
+def linear_coefficients(model):
+    """
+    sklearn 线性分类器 → (系数, 截距)
+    支持 LogisticRegression / SGDClassifier(log_loss), 以及前接 StandardScaler 的 Pipeline:
+    标准化折叠进系数 w' = w / scale, b' = b - Σ w·mean / scale
+    非线性模型 (如树模型) 抛出 ValueError
+    """
+    steps = getattr(model, "steps", None)
+    clf = steps[-1][1] if steps else model
+    if not hasattr(clf, "coef_") or clf.coef_.shape[0] != 1:
+        raise ValueError(f"{type(clf).__name__} is not a binary linear classifier")
+    if getattr(clf, "loss", "log_loss") != "log_loss":
+        raise ValueError(f"{type(clf).__name__} with loss={clf.loss!r} has no predict_proba")
+
+    coef = clf.coef_[0].astype(float)
+    intercept = float(clf.intercept_[0])
+    for _, step in (steps or [])[:-1][::-1]:
+        if type(step).__name__ != "StandardScaler":
+            raise ValueError(f"Cannot fold pipeline step {type(step).__name__}")
+        if step.scale_ is not None:
+            coef = coef / step.scale_
+        if step.mean_ is not None:
+            intercept -= float(coef @ step.mean_)
+    return coef, intercept
+
+def export_linear_model(model, feature_cols, metadata=None, path=MODEL_JSON):
+    """写出系数 JSON (浮点数按 repr 保存, 读回后与原值完全相同)"""
+    coef, intercept = linear_coefficients(model)
+    artifact = {
+        "format": FORMAT,
+        "feature_cols": list(feature_cols),
+        "coef": coef.tolist(),
+        "intercept": intercept,
+        "metadata": metadata or {}
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(artifact, f, indent=2)
+    return path
+
+class LinearScorer:
+    """
+    逻辑回归评分器: p = sigmoid(X·w + b)
+    predict_proba 与 sklearn 接口相同, 可直接传给 batch_scoring 的各函数
+    """
+
+    def __init__(self, coef, intercept, feature_cols, metadata=None):
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.feature_cols = list(feature_cols)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def load(cls, path=MODEL_JSON):
+        with open(path, "r") as f:
+            artifact = json.load(f)
+        if artifact.get("format") != FORMAT:
+            raise ValueError(f"Unknown model format: {artifact.get('format')}")
+        return cls(artifact["coef"], artifact["intercept"], artifact["feature_cols"], artifact.get("metadata"))
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=float) @ self.coef + self.intercept
+
+    def predict_proba(self, X):
+        """(N, 2) 概率: [类别0, 类别1]"""
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+def load_scorer(path=MODEL_JSON, model_file=MODEL_FILE):
+    """
+    预测脚本的模型加载: 返回 (模型, 特征列)
+    系数 JSON 存在且不比 .pkl 旧时用 LinearScorer; 否则 (如非线性模型) 回退到 joblib 反序列化
+    """
+    if os.path.exists(path) and (
+        not os.path.exists(model_file) or os.path.getmtime(path) >= os.path.getmtime(model_file)
+    ):
+        scorer = LinearScorer.load(path)
+        return scorer, scorer.feature_cols
+
+    import joblib
+    model_data = joblib.load(model_file)
+    return model_data['model'], model_data['feature_cols']
+
+def main():
+    import joblib
+    model_data = joblib.load(MODEL_FILE)
+    export_linear_model(model_data['model'], model_data['feature_cols'], model_data.get('metadata'))
+    scorer = LinearScorer.load()
+    print(f"✅ Exported {MODEL_JSON}")
+    for feat, coef in zip(scorer.feature_cols, scorer.coef):
+        print(f"   {feat:20s}: {coef:+.6f}")
+    print(f"   {'intercept':20s}: {scorer.intercept:+.6f}")
+
+if __name__ == "__main__":
+    main()
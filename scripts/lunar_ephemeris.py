@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+向量化月球历表 - Meeus《天文算法》第 47/48 章
+月球黄经/黄纬/距离 (主要周期项)、被照亮比例、地平高度、月出/月落;
+全部为 NumPy 数组运算, 每秒可计算数百万个时刻, 预测流程不再调用 astral
+运行本脚本输出与 astral 的性能对比和精度报告
+"""
+
+import time
+import numpy as np
+from datetime import datetime
+
+# TT − UT (秒), 2020 年代约 69 s; 月球每秒移动约 0.55″, 忽略会带来约 0.01° 误差
+DELTA_T_SECONDS = 69.2
+EARTH_RADIUS_KM = 6378.14
+AU_KM = 149597870.7
+# 月出/月落: 月面上缘在地平线 (−34′ 大气折射 − 月面半径), 加上 0.7275·视差 的地平视差修正
+MOON_RISE_REFRACTION_DEG = 0.5667
+RISE_SET_STEP_MINUTES = 10
+# 分块大小: 每块的周期项中间数组约 60 × CHUNK_SIZE 个 float64
+CHUNK_SIZE = 50_000
+
+# Meeus 表 47.A: (D, M, M', F, Σl [1e-6 度], Σr [1e-3 km])
+_LR_TERMS = np.array([
+    (0, 0, 1, 0, 6288774, -20905355), (2, 0, -1, 0, 1274027, -3699111),
+    (2, 0, 0, 0, 658314, -2955968), (0, 0, 2, 0, 213618, -569925),
+    (0, 1, 0, 0, -185116, 48888), (0, 0, 0, 2, -114332, -3149),
+    (2, 0, -2, 0, 58793, 246158), (2, -1, -1, 0, 57066, -152138),
+    (2, 0, 1, 0, 53322, -170733), (2, -1, 0, 0, 45758, -204586),
+    (0, 1, -1, 0, -40923, -129620), (1, 0, 0, 0, -34720, 108743),
+    (0, 1, 1, 0, -30383, 104755), (2, 0, 0, -2, 15327, 10321),
+    (0, 0, 1, 2, -12528, 0), (0, 0, 1, -2, 10980, 79661),
+    (4, 0, -1, 0, 10675, -34782), (0, 0, 3, 0, 10034, -23210),
+    (4, 0, -2, 0, 8548, -21636), (2, 1, -1, 0, -7888, 24208),
+    (2, 1, 0, 0, -6766, 30824), (1, 0, -1, 0, -5163, -8379),
+    (1, 1, 0, 0, 4987, -16675), (2, -1, 1, 0, 4036, -12831),
+    (2, 0, 2, 0, 3994, -10445), (4, 0, 0, 0, 3861, -11650),
+    (2, 0, -3, 0, 3665, 14403), (0, 1, -2, 0, -2689, -7003),
+    (2, 0, -1, 2, -2602, 0), (2, -1, -2, 0, 2390, 10056),
+    (1, 0, 1, 0, -2348, 6322), (2, -2, 0, 0, 2236, -9884),
+    (0, 1, 2, 0, -2120, 5751), (0, 2, 0, 0, -2069, 0),
+    (2, -2, -1, 0, 2048, -4950), (2, 0, 1, -2, -1773, 4130),
+    (2, 0, 0, 2, -1595, 0), (4, -1, -1, 0, 1215, -3958),
+    (0, 0, 2, 2, -1110, 0), (3, 0, -1, 0, -892, 3258),
+    (2, 1, 1, 0, -810, 2616), (4, -1, -2, 0, 759, -1897),
+    (0, 2, -1, 0, -713, -2117), (2, 2, -1, 0, -700, 2354),
+    (2, 1, -2, 0, 691, 0), (2, -1, 0, -2, 596, 0),
+    (4, 0, 1, 0, 549, -1423), (0, 0, 4, 0, 537, -1117),
+    (4, -1, 0, 0, 520, -1571), (1, 0, -2, 0, -487, -1739),
+    (2, 1, 0, -2, -399, 0), (0, 0, 2, -2, -381, -4421),
+    (1, 1, 1, 0, 351, 0), (3, 0, -2, 0, -340, 0),
+    (4, 0, -3, 0, 330, 0), (2, -1, 2, 0, 327, 0),
+    (0, 2, 1, 0, -323, 1165), (1, 1, -1, 0, 299, 0),
+    (2, 0, 3, 0, 294, 0), (2, 0, -1, -2, 0, 8752),
+], dtype=float)
+
+# Meeus 表 47.B: (D, M, M', F, Σb [1e-6 度]), 截去振幅 < 0.0008° 的项
+_B_TERMS = np.array([
+    (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693),
+    (2, 0, 0, -1, 173237), (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271),
+    (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198), (2, 0, 1, -1, 9266),
+    (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+    (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463),
+    (2, -1, 0, 1, 2211), (2, -1, -1, -1, 2065), (0, 1, -1, -1, -1870),
+    (4, 0, -1, -1, 1828), (0, 1, 0, 1, -1794), (0, 0, 0, 3, -1749),
+    (0, 1, -1, 1, -1565), (1, 0, 0, 1, -1491), (0, 1, 1, 1, -1475),
+    (0, 1, 1, -1, -1410), (0, 1, 0, -1, -1344), (1, 0, 0, -1, -1335),
+    (0, 0, 3, 1, 1107), (4, 0, 0, -1, 1021), (4, 0, -1, 1, 833),
+], dtype=float)
+
+def _julian_centuries(times):
+    """datetime64 (UTC) → (J2000 起的儒略世纪数 TT, 儒略日 UT)"""
+    t = np.asarray(times, dtype="datetime64[s]")
+    seconds = (t - np.datetime64("2000-01-01T12:00:00", "s")).astype(np.int64).astype(float)
+    jd_ut = 2451545.0 + seconds / 86400.0
+    T = (seconds + DELTA_T_SECONDS) / (86400.0 * 36525.0)
+    return T, jd_ut
+
+def _periodic_args(terms, D, M, Mp, F, E):
+    """(N, 项数) 的幅角 D·d + M·m + M'·m' + F·f, 以及含 M 项的偏心率因子 E^|M|"""
+    arg = np.stack([D, M, Mp, F], axis=-1) @ terms[:, :4].T
+    ecc = np.stack([np.ones_like(E), E, E * E], axis=-1)[:, np.abs(terms[:, 1]).astype(int)]
+    return arg, ecc
+
+def _position_chunk(T, jd_ut):
+    """一块时刻的月球/太阳位置与恒星时"""
+    rad = np.radians
+
+    Lp = 218.3164477 + 481267.88123421 * T - 0.0015786 * T**2 + T**3 / 538841 - T**4 / 65194000
+    D = 297.8501921 + 445267.1114034 * T - 0.0018819 * T**2 + T**3 / 545868 - T**4 / 113065000
+    M = 357.5291092 + 35999.0502909 * T - 0.0001536 * T**2 + T**3 / 24490000
+    Mp = 134.9633964 + 477198.8675055 * T + 0.0087414 * T**2 + T**3 / 69699 - T**4 / 14712000
+    F = 93.2720950 + 483202.0175233 * T - 0.0036539 * T**2 - T**3 / 3526000 + T**4 / 863310000
+    A1 = 119.75 + 131.849 * T
+    A2 = 53.09 + 479264.290 * T
+    A3 = 313.45 + 481266.484 * T
+    E = 1 - 0.002516 * T - 0.0000074 * T**2
+
+    Dr, Mr, Mpr, Fr = rad(D % 360), rad(M % 360), rad(Mp % 360), rad(F % 360)
+    arg, ecc = _periodic_args(_LR_TERMS, Dr, Mr, Mpr, Fr, E)
+    sigma_l = (np.sin(arg) * ecc) @ _LR_TERMS[:, 4]
+    sigma_r = (np.cos(arg) * ecc) @ _LR_TERMS[:, 5]
+    arg, ecc = _periodic_args(_B_TERMS, Dr, Mr, Mpr, Fr, E)
+    sigma_b = (np.sin(arg) * ecc) @ _B_TERMS[:, 4]
+
+    Lpr = rad(Lp % 360)
+    sigma_l += 3958 * np.sin(rad(A1)) + 1962 * np.sin(Lpr - Fr) + 318 * np.sin(rad(A2))
+    sigma_b += (-2235 * np.sin(Lpr) + 382 * np.sin(rad(A3)) + 175 * np.sin(rad(A1) - Fr)
+                + 175 * np.sin(rad(A1) + Fr) + 127 * np.sin(Lpr - Mpr) - 115 * np.sin(Lpr + Mpr))
+
+    # 章动 (主项) 与黄赤交角
+    omega = rad(125.04452 - 1934.136261 * T)
+    L_sun = rad(280.4665 + 36000.7698 * T)
+    delta_psi = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * L_sun)
+                 - 0.23 * np.sin(2 * Lpr) + 0.21 * np.sin(2 * omega)) / 3600
+    delta_eps = (9.20 * np.cos(omega) + 0.57 * np.cos(2 * L_sun)
+                 + 0.10 * np.cos(2 * Lpr) - 0.09 * np.cos(2 * omega)) / 3600
+    eps = rad(23.4392911 - 0.0130042 * T + delta_eps)
+
+    lon = (Lp + sigma_l / 1e6 + delta_psi) % 360
+    lat = sigma_b / 1e6
+    distance = 385000.56 + sigma_r / 1000
+
+    lam, beta = rad(lon), rad(lat)
+    ra = np.arctan2(np.sin(lam) * np.cos(eps) - np.tan(beta) * np.sin(eps), np.cos(lam))
+    dec = np.arcsin(np.sin(beta) * np.cos(eps) + np.cos(beta) * np.sin(eps) * np.sin(lam))
+
+    # 太阳 (第 25 章低精度公式), 用于月相角
+    e = 0.016708634 - 0.000042037 * T
+    C = ((1.914602 - 0.004817 * T) * np.sin(Mr) + (0.019993 - 0.000101 * T) * np.sin(2 * Mr)
+         + 0.000289 * np.sin(3 * Mr))
+    sun_true = 280.46646 + 36000.76983 * T + C
+    sun_lon = (sun_true - 0.00569 - 0.00478 * np.sin(omega)) % 360
+    nu = Mr + rad(C)
+    sun_distance = AU_KM * 1.000001018 * (1 - e**2) / (1 + e * np.cos(nu))
+
+    # 视恒星时 (度)
+    gmst = (280.46061837 + 360.98564736629 * (jd_ut - 2451545.0)
+            + 0.000387933 * T**2 - T**3 / 38710000)
+    gast = (gmst + delta_psi * np.cos(eps)) % 360
+
+    return {
+        "lon": lon, "lat": lat, "distance_km": distance,
+        "ra": ra, "dec": dec, "sidereal_deg": gast,
+        "parallax": np.degrees(np.arcsin(EARTH_RADIUS_KM / distance)),
+        "sun_lon": sun_lon, "sun_distance_km": sun_distance,
+    }
+
+def moon_position(times):
+    """
+    月球地心视位置 (分块计算, 控制周期项中间数组的内存)
+    返回 dict (形状同输入): lon/lat (黄经/黄纬, 度), distance_km, ra/dec (赤经/赤纬, 弧度),
+    sidereal_deg (视恒星时), parallax (地平视差, 度), sun_lon/sun_distance_km (太阳, 供相位计算)
+    """
+    T, jd_ut = _julian_centuries(times)
+    shape = T.shape
+    T, jd_ut = T.ravel(), jd_ut.ravel()
+    chunks = [
+        _position_chunk(T[i:i + CHUNK_SIZE], jd_ut[i:i + CHUNK_SIZE])
+        for i in range(0, max(T.size, 1), CHUNK_SIZE)
+    ]
+    return {key: np.concatenate([c[key] for c in chunks]).reshape(shape) for key in chunks[0]}
+
+def phase_angle(times, position=None):
+    """
+    月相角 i (度, 0 = 满月, 180 = 新月)
+    给定 position (moon_position 结果) 时由完整位置精确计算;
+    否则用 Meeus 式 48.4 的短级数 (只需 4 个基本幅角, 误差约 0.1°, 快一个数量级)
+    """
+    if position is not None:
+        beta = np.radians(position["lat"])
+        cos_psi = np.cos(beta) * np.cos(np.radians(position["lon"] - position["sun_lon"]))
+        psi = np.arccos(np.clip(cos_psi, -1.0, 1.0))
+        R, delta = position["sun_distance_km"], position["distance_km"]
+        return np.degrees(np.arctan2(R * np.sin(psi), delta - R * np.cos(psi)))
+
+    T, _ = _julian_centuries(times)
+    D = np.radians((297.8501921 + 445267.1114034 * T - 0.0018819 * T**2) % 360)
+    M = np.radians((357.5291092 + 35999.0502909 * T - 0.0001536 * T**2) % 360)
+    Mp = np.radians((134.9633964 + 477198.8675055 * T + 0.0087414 * T**2) % 360)
+    return (180 - np.degrees(D) - 6.289 * np.sin(Mp) + 2.100 * np.sin(M)
+            - 1.274 * np.sin(2 * D - Mp) - 0.658 * np.sin(2 * D)
+            - 0.214 * np.sin(2 * Mp) - 0.110 * np.sin(D)) % 360
+
+def illuminated_fraction(times, position=None):
+    """月面被照亮比例 k = (1 + cos i) / 2, 0 = 新月, 1 = 满月"""
+    return (1 + np.cos(np.radians(phase_angle(times, position)))) / 2
+
+def moon_altitude(times, lat, lon, position=None):
+    """
+    月亮地心高度角 (度), lat/lon 可与时间数组广播 (如 站点×时刻)
+    """
+    pos = moon_position(times) if position is None else position
+    hour_angle = np.radians(pos["sidereal_deg"] + lon) - pos["ra"]
+    phi = np.radians(lat)
+    sin_alt = (np.sin(phi) * np.sin(pos["dec"])
+               + np.cos(phi) * np.cos(pos["dec"]) * np.cos(hour_angle))
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+def horizon_margin(times, lat, lon, position=None):
+    """
+    月亮高出"月出地平"的度数 (>0 表示月亮在地平线上)
+    月出地平 h0 = 0.7275·视差 − 34′ (Meeus 第 15 章)
+    """
+    pos = moon_position(times) if position is None else position
+    h0 = 0.7275 * pos["parallax"] - MOON_RISE_REFRACTION_DEG
+    return moon_altitude(times, lat, lon, pos) - h0
+
+def rise_set_times(start, end, lat, lon, step_minutes=RISE_SET_STEP_MINUTES):
+    """
+    [start, end) 内的月出/月落时刻 (datetime64[s], UTC)
+    细网格上一次算出高度裕度, 扫描变号区间后用一步割线法在区间内求根
+    """
+    start = np.datetime64(start, "s")
+    end = np.datetime64(end, "s")
+    step = np.timedelta64(int(step_minutes * 60), "s")
+    grid = np.arange(start, end + step, step)
+    margin = horizon_margin(grid, lat, lon)
+
+    flips = np.nonzero((margin[1:] > 0) != (margin[:-1] > 0))[0]
+    t0, m0, m1 = grid[flips], margin[flips], margin[flips + 1]
+    step_s = step.astype(np.int64)
+    guess = t0 + np.round(m0 / (m0 - m1) * step_s).astype("timedelta64[s]")
+
+    # 在猜测点再求一次裕度, 用包含根的那一半区间再插值一次
+    mg = horizon_margin(guess, lat, lon)
+    left = np.sign(mg) != np.sign(m0)
+    a_t = np.where(left, t0, guess)
+    a_m = np.where(left, m0, mg)
+    b_t = np.where(left, guess, t0 + step)
+    b_m = np.where(left, mg, m1)
+    span = (b_t - a_t).astype(np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(a_m != b_m, a_m / (a_m - b_m), 0.0)
+    roots = a_t + np.round(frac * span).astype("timedelta64[s]")
+
+    rising = m0 <= 0
+    keep = (roots >= start) & (roots < end)
+    return roots[rising & keep], roots[~rising & keep]
+
+def daily_rise_set(dates, lat, lon, step_minutes=RISE_SET_STEP_MINUTES):
+    """
+    每个 UTC 日的 (月出, 月落), 当天无事件为 NaT; 一次扫描覆盖全部日期
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    rises = np.full(days.shape, np.datetime64("NaT", "s"))
+    sets = np.full(days.shape, np.datetime64("NaT", "s"))
+    if days.size == 0:
+        return rises, sets
+    first, last = days.min(), days.max() + np.timedelta64(1, "D")
+    rise_t, set_t = rise_set_times(first, last, lat, lon, step_minutes)
+
+    for events, out in ((rise_t, rises), (set_t, sets)):
+        event_days = events.astype("datetime64[D]")
+        # 同一天有两次时取第一次 (与 astral 一致)
+        unique_days, first_idx = np.unique(event_days, return_index=True)
+        pos = np.searchsorted(unique_days, days)
+        pos = np.clip(pos, 0, max(len(unique_days) - 1, 0))
+        if len(unique_days):
+            found = unique_days[pos] == days
+            out[found] = events[first_idx[pos[found]]]
+    return rises, sets
+
+def main():
+    from astral import Observer
+    from astral.moon import phase, elevation, moonrise, moonset
+    from compute_astronomy import LAT, LON, moon_illumination_array
+
+    print("=" * 60)
+    print("🌙 BlueGlow - Lunar Ephemeris Benchmark & Accuracy")
+    print("=" * 60)
+    print(f"📍 Location: ({LAT:.4f}, {LON:.4f})")
+
+    # 性能: 向量化 vs astral 逐点调用
+    n = 2_000_000
+    times = np.datetime64("2024-01-01T00:00:00", "s") + np.arange(n).astype("timedelta64[m]")
+    t0 = time.perf_counter()
+    illuminated_fraction(times)
+    vec_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    moon_position(times[:200_000])
+    pos_s = time.perf_counter() - t0
+
+    n_ref = 20_000
+    sample = times[:: n // n_ref].astype(datetime)
+    t0 = time.perf_counter()
+    for dt in sample:
+        phase(dt)
+    ref_s = (time.perf_counter() - t0) / len(sample)
+
+    print("\n⚡ Throughput:")
+    print(f"   illuminated_fraction: {n / vec_s / 1e6:.2f} M timestamps/s ({vec_s:.2f}s for {n:,})")
+    print(f"   moon_position (full): {0.2 / pos_s:.2f} M timestamps/s")
+    print(f"   astral.moon.phase:    {1 / ref_s / 1e6:.2f} M timestamps/s")
+
+    # 精度: 照度, 与 astral 月相换算的真实被照亮比例以及三角近似比较
+    rng = np.random.default_rng(0)
+    check = np.datetime64("2020-01-01", "s") + rng.integers(0, 15 * 365 * 86400, 5000).astype("timedelta64[s]")
+    check_dt = check.astype(datetime)
+    k = illuminated_fraction(check)
+    k_full = illuminated_fraction(check, moon_position(check))
+    # astral 月相 = (取整的距角 + 6.43°) / 360 · 28
+    elong = np.radians(np.array([phase(dt) for dt in check_dt]) / 28 * 360 - 6.43)
+    k_astral = (1 - np.cos(elong)) / 2
+    k_triangle = moon_illumination_array(check)
+    print("\n🎯 Illuminated fraction (5,000 random times, 2020–2035):")
+    print(f"   short series vs full series: mean |Δ| {np.mean(np.abs(k - k_full)):.4f}, "
+          f"max {np.max(np.abs(k - k_full)):.4f}")
+    print(f"   vs astral phase → (1−cos)/2: mean |Δ| {np.mean(np.abs(k - k_astral)):.4f}, "
+          f"max {np.max(np.abs(k - k_astral)):.4f}")
+    print(f"   triangular approximation:    mean |Δ| {np.mean(np.abs(k - k_triangle)):.4f}, "
+          f"max {np.max(np.abs(k - k_triangle)):.4f}")
+
+    observer = Observer(latitude=LAT, longitude=LON)
+    alt = moon_altitude(check[:1000], LAT, LON)
+    alt_astral = np.array([elevation(observer, dt) for dt in check_dt[:1000]])
+    # astral 的 elevation 含大气折射和地平视差, 只比较地平线以上足够高的样本
+    high = alt_astral > 10
+    print(f"   altitude vs astral (>10°):   mean |Δ| {np.mean(np.abs(alt[high] - alt_astral[high])):.2f}°")
+
+    # 月出/月落
+    start = datetime.utcnow().date()
+    dates = np.datetime64(start) + np.arange(365)
+    t0 = time.perf_counter()
+    rises, sets = daily_rise_set(dates, LAT, LON)
+    rs_s = time.perf_counter() - t0
+
+    diffs = []
+    for day, ours_list in ((d, (r, s)) for d, r, s in zip(dates.astype(datetime), rises, sets)):
+        for ours, func in zip(ours_list, (moonrise, moonset)):
+            try:
+                ref = func(observer, day)
+            except ValueError:
+                ref = None
+            if ref is None or np.isnat(ours):
+                continue
+            ref64 = np.datetime64(ref.replace(tzinfo=None), "s")
+            diffs.append(abs((ours - ref64).astype(np.int64)) / 60)
+    diffs = np.array(diffs)
+    print(f"\n🌅 Moonrise/moonset ({len(dates)} days, {rs_s:.2f}s):")
+    print(f"   vs astral: median |Δ| {np.median(diffs):.1f} min, "
+          f"95th pct {np.percentile(diffs, 95):.1f} min, n={len(diffs)}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
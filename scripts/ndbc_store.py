@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+NDBC 观测列式存储 - 原始 CSV 只在入库时解析一次
+每个源文件一个目录: 每列一个 .npy (float32, 99/999/9999 缺测标记已替换为 NaN),
+timestamp.npy 为 int64 Unix 秒, meta.json 记录源文件大小/修改时间和列名;
+入库按块读取 CSV 直接写入内存映射列, 内存与文件大小无关;
+读取时内存映射, 下游 (气候态、数据验收) 不再解析 CSV
+"""
+
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RAW_DIR = os.path.join(ROOT, "data", "raw")
+STORE_DIR = os.path.join(ROOT, "data", "ndbc_store")
+
+# NDBC 标准气象数据的缺测标记
+SENTINELS = {
+    "WDIR": 999, "WSPD": 99, "GST": 99, "WVHT": 99, "DPD": 99, "APD": 99, "MWD": 999,
+    "PRES": 9999, "ATMP": 999, "WTMP": 999, "DEWP": 999, "VIS": 99, "PTDY": 99, "TIDE": 99,
+}
+TIME_COLUMNS = ("YY", "YYYY", "MM", "DD", "hh", "mm", "dt", "datetime")
+
+# 入库时每块读取的 CSV 行数
+CHUNK_ROWS = 200_000
+
+def store_path(csv_name, store_dir=STORE_DIR):
+    """某个源 CSV 对应的列式存储目录"""
+    return os.path.join(store_dir, os.path.splitext(os.path.basename(csv_name))[0])
+
+def parse_epoch_seconds(df):
+    """
+    向量化构建 int64 Unix 秒 (无法解析为 INT64_MIN)
+    支持 YY/YYYY + MM/DD/hh/mm 列 (2 位年份: >50 → 19xx, 否则 20xx), 或已解析的 dt/datetime 列
+    """
+    cols = {c.replace('#', '').strip(): c for c in df.columns}
+    year_col = cols.get('YY') or cols.get('YYYY')
+
+    if year_col is not None and all(k in cols for k in ('MM', 'DD', 'hh')):
+        year = pd.to_numeric(df[year_col], errors='coerce').to_numpy(dtype=float)
+        year = np.where(year < 100, np.where(year > 50, 1900 + year, 2000 + year), year)
+        parts = pd.DataFrame({
+            'year': year,
+            'month': pd.to_numeric(df[cols['MM']], errors='coerce'),
+            'day': pd.to_numeric(df[cols['DD']], errors='coerce'),
+            'hour': pd.to_numeric(df[cols['hh']], errors='coerce'),
+            'minute': pd.to_numeric(df[cols['mm']], errors='coerce') if 'mm' in cols else 0,
+        })
+        ts = pd.to_datetime(parts, errors='coerce')
+    else:
+        time_col = cols.get('dt') or cols.get('datetime')
+        if time_col is None:
+            raise ValueError("No timestamp columns (YY/MM/DD/hh or dt/datetime)")
+        ts = pd.to_datetime(df[time_col], errors='coerce', utc=True).dt.tz_localize(None)
+
+    return ts.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+def _clean_name(col):
+    return col.replace('#', '').strip()
+
+def _read_chunks(csv_path, **kwargs):
+    """按块读取 CSV, 列名去掉 '#'"""
+    for chunk in pd.read_csv(csv_path, chunksize=CHUNK_ROWS, **kwargs):
+        chunk.columns = [_clean_name(c) for c in chunk.columns]
+        yield chunk
+
+def ingest_csv(csv_path, store_dir=STORE_DIR):
+    """
+    解析一个 NDBC CSV 并写入列式存储 (按块读取, 不把整个文件读入内存)
+    第一遍只读时间列得到有效行数, 第二遍逐块写入预分配的内存映射列
+    返回: 存储目录
+    """
+    header = [_clean_name(c) for c in pd.read_csv(csv_path, nrows=0).columns]
+    value_cols = [c for c in header if c not in TIME_COLUMNS]
+    n_rows = sum(
+        int((parse_epoch_seconds(chunk) != np.iinfo(np.int64).min).sum())
+        for chunk in _read_chunks(csv_path, usecols=lambda c: _clean_name(c) in TIME_COLUMNS)
+    )
+
+    out_dir = store_path(csv_path, store_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    def column_file(name, dtype):
+        return np.lib.format.open_memmap(
+            os.path.join(out_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=(n_rows,)
+        )
+
+    timestamp = column_file("timestamp", np.int64)
+    outputs = {col: column_file(col, np.float32) for col in value_cols}
+    has_data = dict.fromkeys(value_cols, False)
+
+    pos = 0
+    for chunk in _read_chunks(csv_path):
+        epoch = parse_epoch_seconds(chunk)
+        valid = epoch != np.iinfo(np.int64).min
+        end = pos + int(valid.sum())
+        timestamp[pos:end] = epoch[valid]
+        for col in value_cols:
+            values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float32)
+            has_data[col] |= not np.isnan(values).all()
+            if col in SENTINELS:
+                values[values >= SENTINELS[col]] = np.nan
+            outputs[col][pos:end] = values[valid]
+        pos = end
+
+    timestamp.flush()
+    columns = []
+    for col in value_cols:
+        outputs[col].flush()
+        # 全部缺测的列不入库
+        if has_data[col]:
+            columns.append(col)
+        else:
+            del outputs[col]
+            os.remove(os.path.join(out_dir, f"{col}.npy"))
+
+    stat = os.stat(csv_path)
+    meta = {
+        "source": os.path.basename(csv_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "rows": n_rows,
+        "columns": columns
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+def is_current(csv_path, store_dir=STORE_DIR):
+    """列式存储是否存在且与源文件 (大小/修改时间) 一致"""
+    meta_path = os.path.join(store_path(csv_path, store_dir), "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    stat = os.stat(csv_path)
+    return meta["source_size"] == stat.st_size and meta["source_mtime_ns"] == stat.st_mtime_ns
+
+def ensure_ingested(csv_path, store_dir=STORE_DIR):
+    """源文件未入库或已变化时 (重新) 入库, 返回存储目录"""
+    if not is_current(csv_path, store_dir):
+        ingest_csv(csv_path, store_dir)
+    return store_path(csv_path, store_dir)
+
+def load_observations(csv_path, store_dir=STORE_DIR, mmap=True):
+    """
+    读取一个源文件的观测 (必要时先入库)
+    返回: dict 列名 → 数组 (memmap), 'timestamp' 为 int64 Unix 秒
+    """
+    out_dir = ensure_ingested(csv_path, store_dir)
+    with open(os.path.join(out_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    obs = {"timestamp": np.load(os.path.join(out_dir, "timestamp.npy"), mmap_mode=mode)}
+    for col in meta["columns"]:
+        obs[col] = np.load(os.path.join(out_dir, f"{col}.npy"), mmap_mode=mode)
+    return obs
+
+def to_dataframe(obs, start=0, stop=None):
+    """观测 (或其 [start, stop) 行切片) → DataFrame, timestamp 列为 datetime64"""
+    df = pd.DataFrame({col: arr[start:stop] for col, arr in obs.items() if col != "timestamp"})
+    df['timestamp'] = obs["timestamp"][start:stop].astype("datetime64[s]")
+    return df
+
+def main():
+    print("=" * 60)
+    print("🗄️  BlueGlow - Ingest NDBC CSV → Columnar Store")
+    print("=" * 60)
+
+    # 默认入库 data/raw 下所有 NDBC CSV, 也可传入文件路径
+    files = sys.argv[1:]
+    if not files and os.path.isdir(RAW_DIR):
+        files = sorted(
+            os.path.join(RAW_DIR, f) for f in os.listdir(RAW_DIR)
+            if f.startswith("ndbc_") and f.endswith(".csv")
+        )
+    for path in files:
+        out_dir = ingest_csv(path)
+        with open(os.path.join(out_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+        print(f"  ✅ {meta['source']}: {meta['rows']:,} rows, {len(meta['columns'])} columns")
+
+    print(f"\n📂 Output: {STORE_DIR}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+夜间构建 - 在同一进程中依次生成详细时段预测和最佳周预测
+两者查询未来30天的相同日期, 共用 ASTRONOMY 的 LRU 缓存 (第二步的天文特征包全部命中缓存)
+"""
+
+import forecast_detailed
+import find_best_week
+from astronomy_provider import ASTRONOMY
+
+def main():
+    forecast_detailed.main()
+    find_best_week.main()
+    print("\n🌙 Nightly build astronomy cache:")
+    ASTRONOMY.report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+分组分位数草图 - 固定分箱直方图
+每组 (如 DOY 1-366、小时 0-23) 一行计数, 内存只与 组数 × 分箱数 有关, 与数据量无关;
+更新是一次 bincount, 两个草图直接相加即可合并, 分位数误差不超过一个分箱宽度
+"""
+
+import numpy as np
+
+class HistogramSketch:
+    """
+    固定分箱分位数草图
+    n_groups: 组数; [lo, hi): 取值范围; resolution: 分箱宽度 (同时是分位数精度)
+    """
+
+    def __init__(self, n_groups, lo, hi, resolution, counts=None):
+        self.n_groups = int(n_groups)
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.resolution = float(resolution)
+        self.n_bins = int(np.ceil((self.hi - self.lo) / self.resolution))
+        if counts is None:
+            counts = np.zeros((self.n_groups, self.n_bins), dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64).reshape(self.n_groups, self.n_bins)
+
+    def update(self, groups, values):
+        """
+        加入一批样本; groups 为 0 起的组号, 超出 [lo, hi) 或 NaN 的样本忽略
+        """
+        groups = np.asarray(groups, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        valid = (values >= self.lo) & (values < self.hi) & (groups >= 0) & (groups < self.n_groups)
+        bins = ((values[valid] - self.lo) / self.resolution).astype(np.int64)
+        bins = np.minimum(bins, self.n_bins - 1)
+        flat = groups[valid] * self.n_bins + bins
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        return self
+
+    def merge(self, other):
+        """合并另一个相同配置的草图 (计数相加)"""
+        if (other.n_groups, other.n_bins, other.lo, other.resolution) != \
+                (self.n_groups, self.n_bins, self.lo, self.resolution):
+            raise ValueError("Cannot merge sketches with different binning")
+        self.counts += other.counts
+        return self
+
+    def count(self):
+        """每组样本数"""
+        return self.counts.sum(axis=1)
+
+    def quantiles(self, qs):
+        """
+        每组的分位数 (分箱内线性插值)
+        返回: (n_groups, len(qs)) 数组, 空组为 NaN
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1]
+        out = np.full((self.n_groups, len(qs)), np.nan)
+        has = total > 0
+        if not has.any():
+            return out
+
+        cum = cum[has]
+        target = qs[None, :] * total[has, None]
+        # 第一个累计计数 ≥ 目标的分箱
+        idx = (cum[:, :, None] < target[:, None, :]).sum(axis=1)
+        idx = np.minimum(idx, self.n_bins - 1)
+        rows = np.arange(len(cum))[:, None]
+        below = np.where(idx > 0, cum[rows, idx - 1], 0)
+        in_bin = self.counts[has][rows, idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(in_bin > 0, (target - below) / in_bin, 0.5)
+        out[has] = self.lo + (idx + np.clip(frac, 0.0, 1.0)) * self.resolution
+        return out
+
+    def to_arrays(self):
+        """持久化用的配置与计数 (可直接传给 np.savez)"""
+        return {
+            "config": np.array([self.n_groups, self.lo, self.hi, self.resolution]),
+            "counts": self.counts
+        }
+
+    @classmethod
+    def from_arrays(cls, config, counts):
+        """由 to_arrays 的结果重建草图"""
+        n_groups, lo, hi, resolution = config
+        return cls(int(n_groups), lo, hi, resolution, counts)
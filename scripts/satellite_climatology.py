@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+卫星 SST / Chl-a 气候态 - 从 fetch_static 下载的逐月 ERDDAP NetCDF 网格计算
+每个文件惰性打开, 按时间分块读取并求区域 (bbox) 平均, 任意时刻内存中只有一块;
+输出逐日区域平均序列和历年同日 (DOY) 中位值: data/satellite_climatology.json
+"""
+
+import os
+import glob
+import json
+import numpy as np
+import pandas as pd
+import xarray as xr
+from datetime import datetime
+from dotenv import dotenv_values
+from compute_climatology import doy_climatology
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CFG = {**dotenv_values(os.path.join(ROOT, "config", ".env"))}
+RAW_DIR = os.path.join(ROOT, "data", "raw")
+OUTPUT_FILE = os.path.join(ROOT, "data", "satellite_climatology.json")
+
+# 每次读取的时间步数 (日数据即天数)
+TIME_CHUNK = 8
+
+def _fallback_vars(key):
+    """config/.env 中 <key>_FALLBACKS 的变量名 (server|dataset|var)"""
+    return [x.split("|")[-1] for x in (CFG.get(key) or "").split(",") if x.count("|") == 2]
+
+# 变量: 文件前缀、候选变量名 (主数据集 + 备选数据集)、缺省值
+SATELLITE_VARIABLES = {
+    "sst": {
+        "prefix": "sst",
+        "names": [CFG.get("SST_VAR") or "sst", *_fallback_vars("SST_FALLBACKS"), "analysed_sst"],
+        "default": 17.0,
+        "units": "degC",
+    },
+    "chla": {
+        "prefix": "chla",
+        "names": [CFG.get("CHLA_VAR") or "chlor_a", *_fallback_vars("CHLA_FALLBACKS"), "chla", "chlorophyll"],
+        "default": 0.8,
+        "units": "mg m-3",
+    },
+}
+
+def satellite_files(prefix, raw_dir=RAW_DIR):
+    """data/raw 下某个前缀的逐月 NetCDF 文件 (按月份排序)"""
+    return sorted(glob.glob(os.path.join(raw_dir, f"{prefix}_*.nc")))
+
+def _pick_variable(ds, names):
+    for name in names:
+        if name in ds.data_vars:
+            return ds[name]
+    if len(ds.data_vars) == 1:
+        return ds[next(iter(ds.data_vars))]
+    raise KeyError(f"None of {names} in {list(ds.data_vars)}")
+
+def iter_bbox_means(path, names, time_chunk=TIME_CHUNK):
+    """
+    单个 NetCDF 文件 → 分块产出 (时间数组, 区域平均数组)
+    文件惰性打开 (xarray 只在索引时读取), 每次只加载 time_chunk 个时间步
+    """
+    with xr.open_dataset(path) as ds:
+        da = _pick_variable(ds, names)
+        spatial = [d for d in da.dims if d != "time"]
+        # 开尔文 → 摄氏度 (部分 SST 数据集以 K 为单位)
+        kelvin = str(da.attrs.get("units", "")).lower() in ("k", "kelvin", "degree_kelvin")
+        for start in range(0, da.sizes["time"], time_chunk):
+            block = da.isel(time=slice(start, start + time_chunk))
+            values = block.values.astype(float)
+            with np.errstate(invalid="ignore"):
+                means = np.nanmean(values.reshape(values.shape[0], -1), axis=1) if spatial else values
+            if kelvin:
+                means = means - 273.15
+            yield block["time"].values.astype("datetime64[s]"), means
+
+def daily_series(files, names, time_chunk=TIME_CHUNK):
+    """
+    所有文件的逐日区域平均序列 (按日期平均, 无有效像元的日期丢弃)
+    文件逐个处理, 只保留每块的区域平均值
+    """
+    times, values = [], []
+    for path in files:
+        try:
+            for t, v in iter_bbox_means(path, names, time_chunk):
+                times.append(t)
+                values.append(v)
+        except Exception as e:
+            print(f"⚠️  Failed to read {os.path.basename(path)}: {e}")
+    if not times:
+        return pd.Series(dtype=float)
+    series = pd.Series(np.concatenate(values), index=pd.DatetimeIndex(np.concatenate(times)))
+    series = series.dropna()
+    return series.groupby(series.index.floor("D")).mean().sort_index()
+
+def compute_satellite_climatology(raw_dir=RAW_DIR, time_chunk=TIME_CHUNK):
+    """
+    SST / Chl-a 逐日区域平均 + DOY 中位值 (缺失日环形插值)
+    返回: {变量: {...}}; 没有文件或没有有效数据的变量不输出
+    """
+    result = {}
+    for key, spec in SATELLITE_VARIABLES.items():
+        files = satellite_files(spec["prefix"], raw_dir)
+        if not files:
+            continue
+        series = daily_series(files, spec["names"], time_chunk)
+        if series.empty:
+            continue
+        result[key] = {
+            "units": spec["units"],
+            "files": len(files),
+            "days": len(series),
+            "time_range": {
+                "start": series.index.min().date().isoformat(),
+                "end": series.index.max().date().isoformat()
+            },
+            "daily": {d.date().isoformat(): round(float(v), 3) for d, v in series.items()},
+            "doy": doy_climatology(series.index, series.to_numpy(), spec["default"])
+        }
+    return result
+
+def save_satellite_climatology(satellite, output_file=OUTPUT_FILE):
+    """写入 data/satellite_climatology.json (与 climatology.json 同目录)"""
+    output = {
+        **satellite,
+        "metadata": {
+            "created": datetime.utcnow().isoformat() + "Z",
+            "bbox": {k: CFG.get(k) for k in ("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX")},
+            "method": f"bbox mean per time step (chunks of {TIME_CHUNK}), daily mean, DOY median"
+        }
+    }
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump(output, f, indent=2)
+    return output_file
+
+def main():
+    print("=" * 60)
+    print("🛰️  BlueGlow - Satellite SST / Chl-a Climatology")
+    print("=" * 60)
+
+    satellite = compute_satellite_climatology()
+    if not satellite:
+        print("❌ No satellite NetCDF data in data/raw/ (run fetch_static.py first)")
+        return
+
+    for key, data in satellite.items():
+        doy = data["doy"]
+        print(f"✅ {key}: {data['files']} files, {data['days']} days "
+              f"({data['time_range']['start']} → {data['time_range']['end']}), "
+              f"DOY 1 = {doy[1]:.2f}, DOY 180 = {doy[180]:.2f} {data['units']}")
+
+    save_satellite_climatology(satellite)
+    print(f"\n📂 Output: {OUTPUT_FILE}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+模型选择 - 候选模型 × 超参数 × 特征集的分层 k 折交叉验证
+弱监督样本是从 365×24 网格单元中有放回抽样的, 同一单元的样本完全相同, 按网格日分组划分折 (同一天不跨折)
+所有 (候选, 折) 组合用 joblib 进程池并行评估;
+每个候选报告 ROC-AUC、训练耗时、单条与批量推理延迟, 选模型时同时看效果和线上开销
+输出: data/model_selection.json
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedGroupKFold, StratifiedKFold
+
+from train_model import ROOT, generate_weak_supervision_labels
+from features import FEATURE_COLS, feature_matrix
+
+OBSERVED_FILE = os.path.join(ROOT, "streamlit_data", "classification_data.csv")
+OUTPUT_FILE = os.path.join(ROOT, "data", "model_selection.json")
+
+CV_FOLDS = 5
+N_JOBS = -1
+# 推理延迟: 单条重复次数 (取中位数) 和批量行数
+LATENCY_REPEATS = 50
+BATCH_ROWS = 10000
+DEFAULT_WEAK_SAMPLES = 20000
+
+# 数据集: 标签列、可选的分组列 (同组样本不跨折)、是否据此选模型 和可选的特征集
+# 弱监督标签是特征的阈值规则, 按天分组后树模型仍能完全复现规则 (AUC≈1), 只报告不选模型
+DATASETS = {
+    "weak": {
+        "label": "label",
+        "groups": "day",
+        "pick_best": False,
+        "feature_sets": {
+            "all": list(FEATURE_COLS),
+            "astronomy": ["moon_illumination", "is_night", "tide_level"],
+            "no_season": [c for c in FEATURE_COLS if c != "season_sin"],
+        },
+    },
+    "observed": {
+        "label": "has_biolum",
+        "pick_best": True,
+        "feature_sets": {
+            "all": ["water_temp", "wave_height", "wind_speed", "moon_phase"],
+            "ocean": ["water_temp", "wave_height", "wind_speed"],
+            "moon_temp": ["water_temp", "moon_phase"],
+        },
+    },
+}
+
+# 候选模型: 名称 → 未训练的估计器 (树模型单线程, 并行由外层进程池负责)
+CANDIDATES = {
+    **{
+        f"logreg_C{c:g}": LogisticRegression(C=c, class_weight="balanced", max_iter=1000)
+        for c in (0.01, 0.1, 1.0, 10.0)
+    },
+    "random_forest": RandomForestClassifier(
+        n_estimators=200, max_depth=6, min_samples_leaf=2,
+        class_weight="balanced", n_jobs=1, random_state=42
+    ),
+    "hist_gradient_boosting": HistGradientBoostingClassifier(
+        max_iter=200, learning_rate=0.1, class_weight="balanced", random_state=42
+    ),
+}
+
+def load_observed(path=OBSERVED_FILE):
+    """
+    观测数据 (streamlit_data/classification_data.csv)
+    只有一个季节内连续的日期, 不加由日期派生的特征 (会直接泄漏标签)
+    """
+    return pd.read_csv(path, parse_dates=["date"])
+
+def load_dataset(name, n_weak=DEFAULT_WEAK_SAMPLES):
+    if name == "weak":
+        return generate_weak_supervision_labels(n_samples=n_weak, seed=42)
+    return load_observed()
+
+def inference_latency(model, X):
+    """单条推理延迟 (中位数, 秒) 和批量推理每行耗时 (秒)"""
+    row = X[:1]
+    single = []
+    for _ in range(LATENCY_REPEATS):
+        t0 = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - t0)
+
+    batch = np.resize(X, (BATCH_ROWS, X.shape[1]))
+    t0 = time.perf_counter()
+    model.predict_proba(batch)
+    return float(np.median(single)), (time.perf_counter() - t0) / BATCH_ROWS
+
+def evaluate_fold(estimator, X, y, train_idx, test_idx):
+    """训练并评估一个折 (在工作进程中运行)"""
+    model = clone(estimator)
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - t0
+
+    prob = model.predict_proba(X[test_idx])[:, 1]
+    single, per_row = inference_latency(model, X[test_idx])
+    return {
+        "roc_auc": roc_auc_score(y[test_idx], prob),
+        "fit_seconds": fit_seconds,
+        "single_row_ms": single * 1e3,
+        "batch_us_per_row": per_row * 1e6
+    }
+
+def select_models(datasets=("weak", "observed"), folds=CV_FOLDS, n_jobs=N_JOBS, n_weak=DEFAULT_WEAK_SAMPLES):
+    """
+    数据集 × 特征集 × 候选模型 × 折 全部展开后一次提交到进程池
+    返回: 每个 (数据集, 特征集, 模型) 的汇总结果列表 (按数据集、AUC 降序)
+    """
+    jobs, keys = [], []
+    for dataset in datasets:
+        spec = DATASETS[dataset]
+        df = load_dataset(dataset, n_weak)
+        y = df[spec["label"]].to_numpy(dtype=int)
+        if "groups" in spec:
+            groups = df[spec["groups"]].to_numpy()
+            cv = StratifiedGroupKFold(n_splits=folds, shuffle=True, random_state=42)
+            splits = list(cv.split(np.zeros(len(y)), y, groups))
+            grouping = f", grouped by {spec['groups']} ({len(np.unique(groups))} groups)"
+        else:
+            cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+            splits = list(cv.split(np.zeros(len(y)), y))
+            grouping = ""
+        print(f"📦 {dataset}: {len(df):,} rows, positive rate {y.mean():.1%}, {folds} folds{grouping}")
+
+        for fs_name, cols in spec["feature_sets"].items():
+            X = feature_matrix(df, cols)
+            for model_name, estimator in CANDIDATES.items():
+                for train_idx, test_idx in splits:
+                    jobs.append(delayed(evaluate_fold)(estimator, X, y, train_idx, test_idx))
+                    keys.append((dataset, fs_name, model_name))
+
+    print(f"⚙️  Evaluating {len(jobs)} fits (n_jobs={n_jobs})...")
+    t0 = time.perf_counter()
+    folds_out = Parallel(n_jobs=n_jobs)(jobs)
+    print(f"   Done in {time.perf_counter() - t0:.1f}s")
+
+    by_key = {}
+    for key, result in zip(keys, folds_out):
+        by_key.setdefault(key, []).append(result)
+
+    results = []
+    for (dataset, fs_name, model_name), fold_results in by_key.items():
+        frame = pd.DataFrame(fold_results)
+        results.append({
+            "dataset": dataset,
+            "feature_set": fs_name,
+            "features": DATASETS[dataset]["feature_sets"][fs_name],
+            "model": model_name,
+            "roc_auc": round(float(frame["roc_auc"].mean()), 4),
+            "roc_auc_std": round(float(frame["roc_auc"].std(ddof=0)), 4),
+            "fit_seconds": round(float(frame["fit_seconds"].mean()), 4),
+            "single_row_ms": round(float(frame["single_row_ms"].median()), 4),
+            "batch_us_per_row": round(float(frame["batch_us_per_row"].median()), 4)
+        })
+    results.sort(key=lambda r: (r["dataset"], -r["roc_auc"]))
+    return results
+
+def print_results(results):
+    header = f"{'dataset':<9} {'features':<10} {'model':<23} {'AUC':>13} {'fit s':>8} {'1-row ms':>9} {'batch µs/row':>13}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        auc = f"{r['roc_auc']:.3f}±{r['roc_auc_std']:.3f}"
+        print(f"{r['dataset']:<9} {r['feature_set']:<10} {r['model']:<23} {auc:>13} "
+              f"{r['fit_seconds']:>8.3f} {r['single_row_ms']:>9.3f} {r['batch_us_per_row']:>13.3f}")
+
+def main():
+    print("=" * 60)
+    print("🧪 BlueGlow - Model Selection (stratified, day-grouped k-fold CV)")
+    print("=" * 60)
+
+    # 可传入弱监督样本数: select_model.py 50000
+    n_weak = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WEAK_SAMPLES
+    results = select_models(n_weak=n_weak)
+    print_results(results)
+
+    for dataset in dict.fromkeys(r["dataset"] for r in results):
+        if not DATASETS[dataset]["pick_best"]:
+            print(f"\nℹ️  {dataset}: labels are a threshold rule of the features, "
+                  f"AUC only measures rule recovery; no model picked")
+            continue
+        best = next(r for r in results if r["dataset"] == dataset)
+        print(f"\n🏆 {dataset}: {best['model']} on '{best['feature_set']}' "
+              f"(AUC {best['roc_auc']:.3f}, {best['single_row_ms']:.2f} ms/row single)")
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump({
+            "created": datetime.utcnow().isoformat() + "Z",
+            "folds": CV_FOLDS,
+            "weak_samples": n_weak,
+            "batch_rows": BATCH_ROWS,
+            "results": results
+        }, f, indent=2)
+    print(f"\n📂 Output: {OUTPUT_FILE}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
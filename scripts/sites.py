@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+观测点登记表 - 圣地亚哥各海滩 (名称、坐标、潮位站)
+各站共用同一份浪高/水温气候态 (compute_climatology.py 按 NDBC_STATION 融合)
+从 config/sites.json 加载, 并提供批量计算用的坐标数组
+"""
+
+import os
+import json
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SITES_FILE = os.path.join(ROOT, "config", "sites.json")
+
+def load_sites(path=SITES_FILE):
+    """加载所有观测点 (list of dict)"""
+    with open(path, "r") as f:
+        return json.load(f)["sites"]
+
+def get_site(site_id, path=SITES_FILE):
+    """按 id 查找观测点"""
+    for site in load_sites(path):
+        if site["id"] == site_id:
+            return site
+    raise KeyError(f"Unknown site: {site_id}")
+
+def default_site(path=SITES_FILE):
+    """默认观测点 (La Jolla Shores)"""
+    with open(path, "r") as f:
+        registry = json.load(f)
+    return get_site(registry["default"], path)
+
+def site_coordinates(sites):
+    """
+    观测点坐标列向量 (n_sites, 1), 与 (n_times,) 时间数组广播成 站点×时刻
+    """
+    lat = np.array([site["lat"] for site in sites], dtype=float)[:, None]
+    lon = np.array([site["lon"] for site in sites], dtype=float)[:, None]
+    return lat, lon
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+多分潮调和潮汐预测 - Scripps Pier (NOAA 9410230)
+从本地调和常数文件加载 M2/S2/N2/K1/O1 等分潮, 对任意时间网格向量化求潮位,
+并提供高/低潮极值查找; 调和常数需先从 NOAA CO-OPS 下载一次 (--refresh), 之后不依赖网络
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STATION = "9410230"
+CONSTITUENT_FILE = os.path.join(ROOT, "data", f"tide_constituents_{STATION}.json")
+HARCON_URL = (
+    "https://api.tidesandcurrents.noaa.gov/mdapi/prod/webapi/stations/"
+    "{station}/harcon.json?units=metric"
+)
+DATUMS_URL = (
+    "https://api.tidesandcurrents.noaa.gov/mdapi/prod/webapi/stations/"
+    "{station}/datums.json?units=metric"
+)
+
+# 天文参数系数 (Schureman): V = a·T + b·s + c·h + d·p + e·p1 + offset (度)
+# T = 平太阳时角, s = 月球平黄经, h = 太阳平黄经, p = 月球近地点, p1 = 太阳近地点
+DOODSON = {
+    "M2":  (2, -2, 2, 0, 0, 0),
+    "S2":  (2, 0, 0, 0, 0, 0),
+    "N2":  (2, -3, 2, 1, 0, 0),
+    "K2":  (2, 0, 2, 0, 0, 0),
+    "K1":  (1, 0, 1, 0, 0, -90),
+    "O1":  (1, -2, 1, 0, 0, 90),
+    "P1":  (1, 0, -1, 0, 0, 90),
+    "Q1":  (1, -3, 1, 1, 0, 90),
+    "J1":  (1, 1, 1, -1, 0, -90),
+    "NU2": (2, -3, 4, -1, 0, 0),
+    "2N2": (2, -4, 2, 2, 0, 0),
+    "MU2": (2, -4, 4, 0, 0, 0),
+    "L2":  (2, -1, 2, -1, 0, 180),
+    "T2":  (2, 0, -1, 0, 1, 0),
+    "M4":  (4, -4, 4, 0, 0, 0),
+    "MS4": (4, -2, 2, 0, 0, 0),
+    "M6":  (6, -6, 6, 0, 0, 0),
+    "SA":  (0, 0, 1, 0, 0, 0),
+    "SSA": (0, 0, 2, 0, 0, 0),
+}
+
+# 各分潮采用的交点订正类型 (f, u 随月球升交点黄经 N 变化)
+NODAL_TYPE = {
+    "M2": "M2", "N2": "M2", "NU2": "M2", "2N2": "M2", "MU2": "M2", "L2": "M2",
+    "K1": "K1", "O1": "O1", "Q1": "O1", "J1": "J1", "K2": "K2",
+    "M4": "M4", "MS4": "M2", "M6": "M6",
+}
+
+# 主要分潮 (归一化潮位用)
+PRINCIPAL = ("M2", "S2", "K1", "O1")
+
+# 预测时每块的时间点数, 限制 (时间 × 分潮) 中间矩阵的内存
+CHUNK_SIZE = 1_000_000
+
+def load_constituents(path=CONSTITUENT_FILE):
+    """加载调和常数文件 (不随仓库提供, 需先 --refresh 下载)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Tide constituents not fetched: {path} "
+            f"(run: python scripts/tide_harmonics.py --refresh)"
+        )
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _days_since_j2000(times):
+    """datetime64 → 距 J2000.0 (2000-01-01 12:00 UT) 的天数"""
+    t = np.asarray(times, dtype="datetime64[s]")
+    return (t - np.datetime64("2000-01-01T12:00:00", "s")).astype(np.int64) / 86400.0
+
+def astronomical_arguments(times):
+    """
+    天文参数 (度): T, s, h, p, N, p1
+    线性平均运动, 对本项目的时间跨度足够精确
+    """
+    d = _days_since_j2000(times)
+    hours_ut = np.mod(d + 0.5, 1.0) * 24.0
+    T = 180.0 + 15.0 * hours_ut
+    s = 218.3164 + 13.17639648 * d
+    h = 280.4661 + 0.98564736 * d
+    p = 83.3535 + 0.11140353 * d
+    N = 125.0445 - 0.05295377 * d
+    p1 = 282.9384 + 0.0000471 * d
+    return T, s, h, p, N, p1
+
+def nodal_corrections(names, N):
+    """
+    交点因子 f 和相位订正 u (度), 形状 (len(N), len(names))
+    """
+    N = np.radians(np.atleast_1d(N))[:, None]
+    cos1, cos2, cos3 = np.cos(N), np.cos(2 * N), np.cos(3 * N)
+    sin1, sin2, sin3 = np.sin(N), np.sin(2 * N), np.sin(3 * N)
+
+    f_m2 = 1.0004 - 0.0373 * cos1 + 0.0002 * cos2
+    u_m2 = -2.14 * sin1
+    table = {
+        "M2": (f_m2, u_m2),
+        "K1": (1.0060 + 0.1150 * cos1 - 0.0088 * cos2 + 0.0006 * cos3,
+               -8.86 * sin1 + 0.68 * sin2 - 0.07 * sin3),
+        "O1": (1.0089 + 0.1871 * cos1 - 0.0147 * cos2 + 0.0014 * cos3,
+               10.80 * sin1 - 1.34 * sin2 + 0.19 * sin3),
+        "J1": (1.1029 + 0.1676 * cos1 - 0.0170 * cos2 + 0.0016 * cos3,
+               -12.94 * sin1 + 1.34 * sin2 - 0.19 * sin3),
+        "K2": (1.0241 + 0.2863 * cos1 + 0.0083 * cos2 - 0.0015 * cos3,
+               -17.74 * sin1 + 0.68 * sin2 - 0.04 * sin3),
+        "M4": (f_m2 ** 2, 2 * u_m2),
+        "M6": (f_m2 ** 3, 3 * u_m2),
+    }
+    ones = np.ones_like(N)
+    zeros = np.zeros_like(N)
+
+    f = np.hstack([table.get(NODAL_TYPE.get(name), (ones, zeros))[0] for name in names])
+    u = np.hstack([table.get(NODAL_TYPE.get(name), (ones, zeros))[1] for name in names])
+    return f, u
+
+class HarmonicTidePredictor:
+    """
+    调和潮汐预测器
+    h(t) = Z0 + Σ f·A·cos(V(t) + u − κ), 对时间数组一次性矩阵求值
+    """
+
+    def __init__(self, constituents=None):
+        if constituents is None:
+            constituents = load_constituents()
+
+        known = [c for c in constituents["constituents"] if c["name"] in DOODSON]
+        skipped = [c["name"] for c in constituents["constituents"] if c["name"] not in DOODSON]
+        if skipped:
+            print(f"⚠️  Skipping unsupported constituents: {', '.join(skipped)}")
+
+        self.station = constituents.get("station", STATION)
+        self.names = [c["name"] for c in known]
+        self.amplitudes = np.array([c["amplitude"] for c in known], dtype=float)
+        self.phases = np.array([c["phase"] for c in known], dtype=float)
+        self.datum_offset = float(constituents.get("datum_offset_m", 0.0))
+        self.msl_above_mllw = float(constituents.get("msl_above_mllw_m", 0.0))
+
+        coeffs = np.array([DOODSON[name] for name in self.names], dtype=float)
+        self._arg_coeffs = coeffs[:, :5]   # T, s, h, p, p1
+        self._arg_offsets = coeffs[:, 5]
+
+        # 四个主要分潮振幅之和 ≈ 大潮潮差的一半, 用于把潮位归一化到 [-1, 1]
+        # (与 M2 余弦特征同量纲, 只有极端大潮会被截断)
+        principal = [a for name, a in zip(self.names, self.amplitudes) if name in PRINCIPAL]
+        self.level_scale = float(sum(principal) or self.amplitudes.sum())
+
+    def _predict_chunk(self, times):
+        T, s, h, p, _, p1 = astronomical_arguments(times)
+        args = np.column_stack([T, s, h, p, p1])
+        V = args @ self._arg_coeffs.T + self._arg_offsets
+
+        # 交点订正周期 18.6 年, 按天计算一次再按索引展开即可
+        day = np.floor(_days_since_j2000(times)).astype(np.int64)
+        first_day = day.min() if day.size else 0
+        n_days = int(day.max() - first_day + 1) if day.size else 0
+        N_daily = 125.0445 - 0.05295377 * (first_day + np.arange(n_days) + 0.5)
+        f_daily, u_daily = nodal_corrections(self.names, N_daily)
+        f = f_daily[day - first_day]
+        u = u_daily[day - first_day]
+        phase = np.radians(V + u - self.phases)
+        return self.datum_offset + (f * self.amplitudes * np.cos(phase)).sum(axis=1)
+
+    def predict(self, times):
+        """
+        潮位 (米, 相对MSL), 输入 datetime64 数组, 返回同形状数组
+        """
+        t = np.asarray(times, dtype="datetime64[s]")
+        flat = t.ravel()
+        out = np.empty(flat.shape, dtype=float)
+        for i in range(0, flat.size, CHUNK_SIZE):
+            out[i:i + CHUNK_SIZE] = self._predict_chunk(flat[i:i + CHUNK_SIZE])
+        return out.reshape(t.shape)
+
+    def normalized_level(self, times):
+        """潮位归一化到 [-1, 1] (-1 = 低潮, 1 = 高潮)"""
+        return np.clip((self.predict(times) - self.datum_offset) / self.level_scale, -1.0, 1.0)
+
+    def extrema(self, start, end, step_minutes=6):
+        """
+        [start, end) 内的高/低潮
+        在步长网格上找离散极值, 再用三点抛物线插值细化时刻和潮高
+        返回: (high_times, high_heights, low_times, low_heights)
+        """
+        step = np.timedelta64(int(step_minutes * 60), "s")
+        grid = np.arange(
+            np.datetime64(start, "s") - step, np.datetime64(end, "s") + 2 * step, step
+        )
+        heights = self.predict(grid)
+
+        y0, y1, y2 = heights[:-2], heights[1:-1], heights[2:]
+        is_high = (y1 > y0) & (y1 >= y2)
+        is_low = (y1 < y0) & (y1 <= y2)
+
+        # 抛物线顶点偏移 (单位: 步长)
+        denom = y0 - 2 * y1 + y2
+        safe = np.where(denom == 0, 1.0, denom)
+        offset = np.where(denom == 0, 0.0, 0.5 * (y0 - y2) / safe)
+        peak = y1 - 0.25 * (y0 - y2) * offset
+        peak_times = grid[1:-1] + np.round(offset * step.astype(np.int64)).astype("timedelta64[s]")
+
+        in_range = (peak_times >= np.datetime64(start, "s")) & (peak_times < np.datetime64(end, "s"))
+        highs = is_high & in_range
+        lows = is_low & in_range
+        return peak_times[highs], peak[highs], peak_times[lows], peak[lows]
+
+def fetch_constituents(station=STATION, path=CONSTITUENT_FILE):
+    """从 NOAA CO-OPS 下载调和常数与潮汐基准面并写入本地文件 (唯一需要网络的步骤)"""
+    import requests
+
+    r = requests.get(HARCON_URL.format(station=station), timeout=60)
+    r.raise_for_status()
+    data = r.json()
+
+    r = requests.get(DATUMS_URL.format(station=station), timeout=60)
+    r.raise_for_status()
+    datums = {d["name"]: d["value"] for d in r.json()["datums"] if d.get("value") is not None}
+
+    constituents = {
+        "station": station,
+        "units": "meters",
+        "phase_reference": "GMT (Greenwich epoch, degrees)",
+        "datum": "MSL",
+        "msl_above_mllw_m": round(datums["MSL"] - datums["MLLW"], 3),
+        "source": f"NOAA CO-OPS harcon.json + datums.json ({datetime.utcnow().date().isoformat()})",
+        "constituents": [
+            {"name": c["name"], "amplitude": c["amplitude"], "phase": c["phase_GMT"]}
+            for c in data["HarmonicConstituents"]
+            if c.get("amplitude")
+        ]
+    }
+
+    with open(path, "w") as f:
+        json.dump(constituents, f, indent=2)
+    print(f"✅ Saved {len(constituents['constituents'])} constituents: {path}")
+
+def main():
+    print("=" * 60)
+    print(f"🌊 BlueGlow - Harmonic Tides (station {STATION})")
+    print("=" * 60)
+
+    if "--refresh" in sys.argv:
+        fetch_constituents()
+
+    predictor = HarmonicTidePredictor()
+    print(f"📄 Constituents: {', '.join(predictor.names)}")
+
+    # 一年 6 分钟分辨率的预测耗时
+    start = np.datetime64(datetime.utcnow().strftime("%Y-%m-%d"), "s")
+    grid = np.arange(start, start + np.timedelta64(365, "D"), np.timedelta64(6, "m"))
+    t0 = time.perf_counter()
+    predictor.predict(grid)
+    elapsed = time.perf_counter() - t0
+    print(f"\n⏱️  {len(grid):,} predictions (1 year @ 6 min): {elapsed * 1000:.0f} ms")
+
+    # 未来 3 天的高低潮
+    end = start + np.timedelta64(3, "D")
+    high_t, high_h, low_t, low_h = predictor.extrema(start, end)
+    events = sorted(
+        [(t, h, "High") for t, h in zip(high_t, high_h)] +
+        [(t, h, "Low ") for t, h in zip(low_t, low_h)]
+    )
+    print("\n📊 Next 3 days (UTC, height above MLLW):")
+    for t, h, kind in events:
+        print(f"  {str(t).replace('T', ' ')[:16]} | {kind} | {h + predictor.msl_above_mllw:+.2f} m")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -5,93 +5,107 @@ Step 3: Train lightweight Logistic Regression model
 """
 
 import os
+import sys
 import json
+import time
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from sklearn.linear_model import LogisticRegression
+from datetime import datetime
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, roc_auc_score
 import joblib
+from quantile_sketch import HistogramSketch
+from linear_scorer import MODEL_JSON, export_linear_model
+from features import FEATURE_COLS, feature_columns, feature_matrix
+from climatology_table import ClimatologyTable
+from climatology_harmonics import load_climatology_model
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CLIM_FILE = os.path.join(ROOT, "data", "climatology.json")
 MODEL_FILE = os.path.join(ROOT, "models", "biolum_lr.pkl")
+# 弱监督样本缓存 (每列一个 .npy, 流式训练时内存映射分块读取)
+SAMPLE_STORE_DIR = os.path.join(ROOT, "data", "weak_labels")
+# 流式训练的留出集: 训练样本数的比例; 按整天留出 (同样比例的网格日), 留出日的样本不进训练
+HOLDOUT_FRACTION = 0.2
+HOLDOUT_SEED = 20240101
+# 生成器模式的训练样本种子 (先数类别再训练, 两遍取到同一批样本)
+TRAIN_SEED = 42
+
+# 弱监督样本的时间范围起点 (随机取其后 365 天内的整点)
+SAMPLE_BASE = np.datetime64("2024-01-01T00:00:00", "s")
+# 分块生成的每块样本数 (限制临时数组大小)
+SAMPLE_CHUNK = 1_000_000
 
 def load_climatology():
-    """加载气候学数据"""
-    with open(CLIM_FILE, 'r') as f:
-        return json.load(f)
+    """加载气候学数据 (DOY 数组表)"""
+    return ClimatologyTable.load(CLIM_FILE)
 
-def generate_weak_supervision_labels(n_samples=5000):
+def weak_supervision_grid(climate):
     """
-    生成弱监督训练样本
-    规则: 暗夜 + 低潮±2h + 低浪 → 高可能 (label=1)
-          否则 → 低可能 (label=0)
+    所有可能采样时刻 (365 天 × 24 个整点) 的特征和标签列
+    样本只是在这 8760 个时刻中随机抽取, 每个特征只需在网格上计算一次
+    climate: 带 at(变量, 时刻数组) 的气候态 (与预测时相同来源)
     """
-    print(f"🏷️  Generating {n_samples} weak supervision samples...")
+    days = np.repeat(np.arange(365), 24)
+    hours = np.tile(np.arange(24), 365)
+    times = SAMPLE_BASE + (days * 86400 + hours * 3600).astype("timedelta64[s]")
     
-    # 加载气候学数据
-    clim = load_climatology()
-    wave_doy = clim['wave_height_doy']
-    temp_doy = clim['water_temp_doy']
+    # 特征与预测共用同一套计算 (月照度、太阳高度夜间、潮汐模型、气候态、季节)
+    columns = feature_columns(times, climate)
     
-    samples = []
+    # 弱监督规则; 银标: 暗夜 + 低潮 + 低浪 (< 1.2m) → 高可能
+    dark_night = (columns['moon_illumination'] < 0.3) & (columns['is_night'] == 1)
+    low_tide = columns['tide_level'] < -0.5  # -1=低潮, 1=高潮
+    low_wave = columns['wave_height'] < 1.2
+    label = dark_night & low_tide & low_wave
     
-    # 随机生成时间点 (过去一年)
-    base_date = datetime(2024, 1, 1)
+    X = feature_matrix(columns)
+    grid = {col: X[:, j] for j, col in enumerate(FEATURE_COLS)}
+    grid['label'] = label.astype(np.int64)
+    return grid
+
+def weak_supervision_chunk(n, rng, grid, days=None):
+    """
+    随机抽取 n 个 (日, 小时) 样本, 从特征网格中按下标取值
+    days: 可选的网格日下标 (0-364), 只从这些天中抽样
+    返回的 day 列为网格日下标: 同一网格单元的样本完全相同, 评估时需按天分组
+    """
+    day = rng.integers(0, 365, n) if days is None else rng.choice(days, n)
+    hours = rng.integers(0, 24, n)
+    cell = day * 24 + hours
+    return pd.DataFrame({"day": day, **{col: values[cell] for col, values in grid.items()}})
+
+def iter_weak_supervision_chunks(n_samples, chunk_size=SAMPLE_CHUNK, seed=None, days=None):
+    """按块产出弱监督样本 DataFrame, 共 n_samples 行 (days: 只从这些网格日抽样)"""
+    rng = np.random.default_rng(seed)
+    grid = weak_supervision_grid(load_climatology_model(load_climatology()))
+    for start in range(0, n_samples, chunk_size):
+        yield weak_supervision_chunk(min(chunk_size, n_samples - start), rng, grid, days)
+
+def holdout_split(fraction=HOLDOUT_FRACTION, seed=HOLDOUT_SEED):
+    """
+    365 个网格日随机分为 (训练日, 留出日)
+    同一网格单元的样本特征和标签完全相同, 按样本留出等于在训练集上评估, 因此按整天留出
+    """
+    days = np.random.default_rng(seed).permutation(365)
+    n_holdout = max(int(round(365 * fraction)), 1)
+    return np.sort(days[n_holdout:]), np.sort(days[:n_holdout])
+
+def generate_weak_supervision_labels(n_samples=5000, chunk_size=SAMPLE_CHUNK, seed=None):
+    """
+    生成弱监督训练样本
+    规则: 暗夜 + 低潮±2h + 低浪 → 高可能 (label=1)
+          否则 → 低可能 (label=0)
+    """
+    print(f"🏷️  Generating {n_samples:,} weak supervision samples...")
     
-    for _ in range(n_samples):
-        # 随机日期和时间
-        random_days = np.random.randint(0, 365)
-        random_hour = np.random.randint(0, 24)
-        dt = base_date + timedelta(days=random_days, hours=random_hour)
-        
-        doy = dt.timetuple().tm_yday
-        hour = dt.hour
-        
-        # 特征1: 月照度 (简化计算: 基于月相周期29.5天)
-        days_since_new_moon = (random_days % 29.5)
-        moon_illum = 1.0 - abs(days_since_new_moon - 14.75) / 14.75
-        moon_illum = max(0.0, min(1.0, moon_illum))
-        
-        # 特征2: 是否夜间 (18:00-06:00)
-        is_night = (hour >= 18 or hour <= 6)
-        
-        # 特征3: 潮汐相位 (简化: 基于M2周期12.42小时)
-        hours_total = random_days * 24 + hour
-        tide_phase = (hours_total / 12.42) * 2 * np.pi
-        tide_level = np.cos(tide_phase)  # -1=低潮, 1=高潮
-        
-        # 特征4: 浪高气候值
-        wave_height = float(wave_doy.get(str(doy), 1.0))
-        
-        # 特征5: 水温气候值
-        water_temp = float(temp_doy.get(str(doy), 16.0))
-        
-        # 特征6: 季节 (归一化到0-1)
-        season_norm = np.sin(2 * np.pi * doy / 365)
-        
-        # 弱监督规则
-        dark_night = (moon_illum < 0.3) and is_night
-        low_tide = (tide_level < -0.5)  # 低潮
-        low_wave = (wave_height < 1.2)  # 浪高 < 1.2m
-        
-        # 银标: 满足3个条件 → 高可能
-        label = 1 if (dark_night and low_tide and low_wave) else 0
-        
-        samples.append({
-            'moon_illumination': moon_illum,
-            'is_night': int(is_night),
-            'tide_level': tide_level,
-            'wave_height': wave_height,
-            'water_temp': water_temp,
-            'season_sin': season_norm,
-            'label': label
-        })
-    
-    df = pd.DataFrame(samples)
+    t0 = time.perf_counter()
+    df = pd.concat(list(iter_weak_supervision_chunks(n_samples, chunk_size, seed)), ignore_index=True)
     
+    print(f"   Generated in {time.perf_counter() - t0:.2f}s")
     print(f"   Positive samples (label=1): {df['label'].sum()} ({df['label'].mean()*100:.1f}%)")
     print(f"   Negative samples (label=0): {(1-df['label']).sum()}")
     
@@ -102,10 +116,9 @@ def train_model(df):
     print("\n🤖 Training Logistic Regression model...")
     
     # 特征和标签
-    feature_cols = ['moon_illumination', 'is_night', 'tide_level', 
-                    'wave_height', 'water_temp', 'season_sin']
+    feature_cols = list(FEATURE_COLS)
     
-    X = df[feature_cols].values
+    X = feature_matrix(df, feature_cols)
     y = df['label'].values
     
     # 划分训练/测试集
@@ -141,7 +154,161 @@ def train_model(df):
     
     return model, feature_cols
 
-def save_model(model, feature_cols):
+def write_sample_store(n_samples, chunk_size=SAMPLE_CHUNK, seed=None, store_dir=SAMPLE_STORE_DIR, days=None):
+    """
+    分块生成弱监督样本并写入缓存 (每列一个预分配的 .npy, 逐块填充, 内存只有一块)
+    写入时累计类别计数, 存入 meta.json (流式训练的类别权重)
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    columns = None
+    row = 0
+    class_counts = np.zeros(2, dtype=np.int64)
+    for chunk in iter_weak_supervision_chunks(n_samples, chunk_size, seed, days):
+        if columns is None:
+            columns = {
+                col: np.lib.format.open_memmap(
+                    os.path.join(store_dir, f"{col}.npy"), mode="w+",
+                    dtype=chunk[col].dtype, shape=(n_samples,)
+                )
+                for col in chunk.columns
+            }
+        for col, arr in columns.items():
+            arr[row:row + len(chunk)] = chunk[col].to_numpy()
+        class_counts += np.bincount(chunk['label'].to_numpy(), minlength=2)
+        row += len(chunk)
+    for arr in (columns or {}).values():
+        arr.flush()
+    meta = {
+        "rows": n_samples,
+        "columns": list(columns or []),
+        "seed": seed,
+        "days": None if days is None else len(days),
+        "class_counts": class_counts.tolist(),
+        "created": datetime.utcnow().isoformat() + "Z"
+    }
+    with open(os.path.join(store_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return store_dir
+
+def load_sample_store_meta(store_dir=SAMPLE_STORE_DIR):
+    path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def iter_sample_store(start=0, stop=None, chunk_size=SAMPLE_CHUNK, store_dir=SAMPLE_STORE_DIR):
+    """按块读取缓存样本的 [start, stop) 行 (内存映射; stop 缺省为全部)"""
+    meta = load_sample_store_meta(store_dir)
+    stop = meta["rows"] if stop is None else stop
+    arrays = {col: np.load(os.path.join(store_dir, f"{col}.npy"), mmap_mode="r") for col in meta["columns"]}
+    for i in range(start, stop, chunk_size):
+        j = min(i + chunk_size, stop)
+        yield pd.DataFrame({col: np.asarray(arr[i:j]) for col, arr in arrays.items()})
+
+class StreamingEvaluator:
+    """
+    流式留出集评估: 逐块累加 log-loss、混淆矩阵和按类别的预测概率直方图
+    ROC-AUC 由两个直方图计算 (精度为一个分箱 0.001), 内存与样本数无关
+    """
+
+    def __init__(self, resolution=0.001):
+        self.scores = HistogramSketch(2, 0.0, 1.0 + resolution, resolution)
+        self.n = 0
+        self.log_loss_sum = 0.0
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+
+    def update(self, y, prob):
+        y = np.asarray(y, dtype=np.int64)
+        p = np.clip(prob, 1e-15, 1 - 1e-15)
+        self.n += len(y)
+        self.log_loss_sum += float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).sum())
+        np.add.at(self.confusion, (y, (prob >= 0.5).astype(np.int64)), 1)
+        self.scores.update(y, prob)
+        return self
+
+    def roc_auc(self):
+        """P(正样本得分 > 负样本得分), 同一分箱内计一半"""
+        neg, pos = self.scores.counts.astype(float)
+        if neg.sum() == 0 or pos.sum() == 0:
+            return float("nan")
+        pos_above = pos[::-1].cumsum()[::-1] - pos
+        return float((neg * (pos_above + 0.5 * pos)).sum() / (neg.sum() * pos.sum()))
+
+    def report(self):
+        (tn, fp), (fn, tp) = self.confusion
+        return {
+            "samples": self.n,
+            "roc_auc": round(self.roc_auc(), 4),
+            "log_loss": round(self.log_loss_sum / max(self.n, 1), 4),
+            "accuracy": round(float((tp + tn) / max(self.n, 1)), 4),
+            "precision": round(float(tp / max(tp + fp, 1)), 4),
+            "recall": round(float(tp / max(tp + fn, 1)), 4)
+        }
+
+def count_classes(chunks):
+    """遍历一遍样本块, 累计各类别样本数"""
+    counts = np.zeros(2, dtype=np.int64)
+    for chunk in chunks:
+        counts += np.bincount(chunk['label'].to_numpy(), minlength=2)
+    return counts
+
+def balanced_class_weight(counts):
+    """与 class_weight='balanced' 相同的权重 n / (2 · n_c); counts: 全部训练样本的类别计数"""
+    counts = np.asarray(counts, dtype=np.int64)
+    return {c: int(counts.sum()) / (2 * max(int(n), 1)) for c, n in enumerate(counts)}
+
+def train_model_streaming(train_chunks, holdout_chunks, epochs=1, alpha=1e-5, class_counts=None):
+    """
+    流式训练 (out-of-core): 逐块 StandardScaler.partial_fit + SGDClassifier(log_loss).partial_fit
+    train_chunks / holdout_chunks: 无参函数, 每次调用返回一个 DataFrame 块的迭代器
+    类别权重按全部训练样本的类别计数, 与 class_weight='balanced' 相同;
+    class_counts 缺省时先遍历一遍训练块计数 (train_chunks 每次须返回同一批样本)
+    返回: (Pipeline(scaler, SGD), 特征列, 留出集评估结果)
+    """
+    print(f"\n🤖 Training SGD logistic regression out-of-core ({epochs} epoch(s))...")
+    feature_cols = list(FEATURE_COLS)
+    t0 = time.perf_counter()
+    if class_counts is None:
+        class_counts = count_classes(train_chunks())
+        print(f"   Counted classes in {time.perf_counter() - t0:.2f}s")
+    weights = balanced_class_weight(class_counts)
+    print(f"   Class counts: {list(map(int, class_counts))}, "
+          f"weights: {{0: {weights[0]:.3f}, 1: {weights[1]:.3f}}}")
+    scaler = StandardScaler()
+    clf = SGDClassifier(loss='log_loss', alpha=alpha, class_weight=weights, random_state=42)
+    seen = 0
+    
+    for epoch in range(epochs):
+        for chunk in train_chunks():
+            X = feature_matrix(chunk, feature_cols)
+            y = chunk['label'].to_numpy()
+            if epoch == 0:
+                scaler.partial_fit(X)
+            clf.partial_fit(scaler.transform(X), y, classes=np.array([0, 1]))
+            seen += len(chunk)
+        print(f"   Epoch {epoch + 1}: {seen:,} samples seen ({time.perf_counter() - t0:.2f}s)")
+    
+    model = Pipeline([('scaler', scaler), ('clf', clf)])
+    
+    # 流式留出集评估
+    evaluator = StreamingEvaluator()
+    for chunk in holdout_chunks():
+        prob = model.predict_proba(feature_matrix(chunk, feature_cols))[:, 1]
+        evaluator.update(chunk['label'].to_numpy(), prob)
+    metrics = evaluator.report()
+    
+    print("\n📊 Holdout Performance (streaming):")
+    for key, value in metrics.items():
+        print(f"   {key:10s}: {value}")
+    
+    print("\n📈 Feature Importance (Coefficients, standardized):")
+    for feat, coef in zip(feature_cols, clf.coef_[0]):
+        print(f"   {feat:20s}: {coef:+.3f}")
+    
+    return model, feature_cols, metrics
+
+def save_model(model, feature_cols, model_type='LogisticRegression', metrics=None):
     """保存模型"""
     os.makedirs(os.path.dirname(MODEL_FILE), exist_ok=True)
     
@@ -150,30 +317,65 @@ def save_model(model, feature_cols):
         'feature_cols': feature_cols,
         'metadata': {
             'trained_at': datetime.utcnow().isoformat() + 'Z',
-            'model_type': 'LogisticRegression',
+            'model_type': model_type,
             'features': feature_cols,
             'version': '1.0-climatology',
             'note': 'Trained with weak supervision. Ready for SST/Chl-a features when available.'
         }
     }
+    if metrics:
+        model_data['metadata']['holdout'] = metrics
     
     joblib.dump(model_data, MODEL_FILE)
     print(f"\n✅ Model saved: {MODEL_FILE}")
     print(f"   Size: {os.path.getsize(MODEL_FILE)} bytes")
+    
+    # 系数 JSON: 预测脚本只需矩阵乘法 + sigmoid, 不加载 sklearn
+    try:
+        export_linear_model(model, feature_cols, model_data['metadata'], MODEL_JSON)
+        print(f"✅ Coefficients exported: {MODEL_JSON}")
+    except ValueError as e:
+        print(f"⚠️  No coefficient export ({e}); forecasts will unpickle the model")
 
 def main():
     print("=" * 60)
     print("�� BlueGlow - Step 3: Train Model")
     print("=" * 60)
     
-    # 1. 生成弱监督样本
-    df = generate_weak_supervision_labels(n_samples=5000)
+    # 1. 生成弱监督样本 (可传入样本数: train_model.py 10000000)
+    #    --stream: 分块生成、流式训练 (内存与样本数无关)
+    #    --store:  先写入 data/weak_labels/ 样本缓存, 再内存映射分块训练 (隐含 --stream)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    flags = {a for a in sys.argv[1:] if a.startswith('--')}
+    n_samples = int(args[0]) if args else 5000
     
-    # 2. 训练模型
-    model, feature_cols = train_model(df)
-    
-    # 3. 保存模型
-    save_model(model, feature_cols)
+    if flags & {'--stream', '--store'}:
+        n_holdout = max(int(n_samples * HOLDOUT_FRACTION), 1)
+        train_days, holdout_days = holdout_split()
+        print(f"📅 Holdout: {len(holdout_days)} whole days, training on the other {len(train_days)}")
+        class_counts = None
+        if '--store' in flags:
+            train_dir = os.path.join(SAMPLE_STORE_DIR, "train")
+            holdout_dir = os.path.join(SAMPLE_STORE_DIR, "holdout")
+            print(f"🗄️  Writing {n_samples + n_holdout:,} samples to {SAMPLE_STORE_DIR}...")
+            write_sample_store(n_samples, store_dir=train_dir, days=train_days)
+            write_sample_store(n_holdout, seed=HOLDOUT_SEED, store_dir=holdout_dir, days=holdout_days)
+            class_counts = load_sample_store_meta(train_dir)["class_counts"]
+            train_chunks = lambda: iter_sample_store(store_dir=train_dir)
+            holdout_chunks = lambda: iter_sample_store(store_dir=holdout_dir)
+        else:
+            train_chunks = lambda: iter_weak_supervision_chunks(n_samples, seed=TRAIN_SEED, days=train_days)
+            holdout_chunks = lambda: iter_weak_supervision_chunks(n_holdout, seed=HOLDOUT_SEED, days=holdout_days)
+        model, feature_cols, metrics = train_model_streaming(train_chunks, holdout_chunks, class_counts=class_counts)
+        save_model(model, feature_cols, model_type='SGDClassifier(log_loss)+StandardScaler', metrics=metrics)
+    else:
+        df = generate_weak_supervision_labels(n_samples=n_samples)
+        
+        # 2. 训练模型
+        model, feature_cols = train_model(df)
+        
+        # 3. 保存模型
+        save_model(model, feature_cols)
     
     print("\n" + "=" * 60)
     print("✅ Training complete!")
@@ -5,6 +5,7 @@ Step 2 数据验收脚本
 """
 
 import glob
+import json
 import os
 
 def check_netcdf():
@@ -78,9 +79,20 @@ def check_ndbc():
     print("=" * 60)
     
     try:
+        import numpy as np
         import pandas as pd
+        from ndbc_store import load_observations, to_dataframe
         
-        ndbc_files = sorted(glob.glob('data/raw/ndbc_46254_*.csv'))
+        # 登记的所有浮标站 (config/ndbc_stations.json), 逐站查找 data/raw/ndbc_<站号>_*.csv
+        with open('config/ndbc_stations.json', 'r') as fp:
+            stations = json.load(fp)
+        
+        ndbc_files = []
+        print(f"\n📡 浮标站 ({len(stations)}):")
+        for station, info in stations.items():
+            files = sorted(glob.glob(f'data/raw/ndbc_{station}_*.csv'))
+            print(f"  {'✅' if files else '⚠️ '} {station} ({info['name']}): {len(files)} 个文件")
+            ndbc_files += files
         
         if not ndbc_files:
             print("⚠️  未找到 NDBC 文件")
@@ -92,26 +104,30 @@ def check_ndbc():
             size_mb = os.path.getsize(f) / 1024 / 1024
             print(f"\n📁 文件: {os.path.basename(f)} ({size_mb:.2f} MB)")
             
-            df = pd.read_csv(f)
-            print(f"  总行数: {len(df):,}")
-            print(f"  列数: {len(df.columns)}")
-            print(f"  列名: {list(df.columns[:10])}...")
+            # 列式存储 (首次检查时入库, 缺测标记已替换为 NaN)
+            obs = load_observations(f)
+            n_rows = len(obs['timestamp'])
+            print(f"  总行数: {n_rows:,}")
+            print(f"  列数: {len(obs)}")
+            print(f"  列名: {list(obs)[:10]}...")
             
-            if 'dt' in df.columns:
-                df['dt'] = pd.to_datetime(df['dt'])
-                print(f"  时间范围: {df['dt'].min()} → {df['dt'].max()}")
+            if n_rows:
+                ts = obs['timestamp']
+                print(f"  时间范围: {pd.Timestamp(ts.min(), unit='s')} → {pd.Timestamp(ts.max(), unit='s')}")
             
-            if 'WSPD' in df.columns:
-                df['WSPD'] = pd.to_numeric(df['WSPD'], errors='coerce')
-                valid_wspd = df['WSPD'][df['WSPD'] < 90].dropna()
+            if 'WSPD' in obs:
+                wspd = np.asarray(obs['WSPD'])
+                valid_wspd = wspd[~np.isnan(wspd)]
                 if len(valid_wspd) > 0:
                     print(f"  风速统计 (m/s):")
                     print(f"    - 平均: {valid_wspd.mean():.2f}")
                     print(f"    - 范围: {valid_wspd.min():.2f} → {valid_wspd.max():.2f}")
-                    print(f"    - 有效数据点: {len(valid_wspd):,} ({len(valid_wspd)/len(df)*100:.1f}%)")
+                    print(f"    - 有效数据点: {len(valid_wspd):,} ({len(valid_wspd)/n_rows*100:.1f}%)")
             
             print(f"\n  样本数据 (前5行):")
-            print(df[['dt', 'WSPD', 'WDIR']].head().to_string(index=False) if 'dt' in df.columns and 'WSPD' in df.columns else df.head())
+            sample = to_dataframe(obs, 0, 5)
+            cols = [c for c in ('timestamp', 'WSPD', 'WDIR') if c in sample.columns]
+            print(sample[cols].to_string(index=False))
             
     except ImportError:
         print("❌ pandas 未安装,无法检查 CSV 文件")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+天文特征向量化测试
+向量化月相/月照度/潮位与逐时刻的标量计算逐元素一致, 潮汐事件索引的低潮与近低潮判断
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from astral import moon
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import compute_astronomy as astro
+
+def sample_datetimes(n=500, seed=0):
+    """2020-2030 之间随机的整分钟时刻 (naive UTC)"""
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 11 * 365 * 24 * 60, n)
+    return [datetime(2020, 1, 1) + timedelta(minutes=int(m)) for m in minutes]
+
+def as_times(dts):
+    return np.array(dts, dtype="datetime64[s]")
+
+def test_moon_phase_matches_astral():
+    dts = sample_datetimes()
+    expected = np.array([moon.phase(d) for d in dts])
+    np.testing.assert_allclose(astro.moon_phase_array(as_times(dts)), expected, atol=1e-9)
+
+@pytest.mark.skipif(astro.MOON_MODEL != "phase", reason="scalar reference is the astral phase model")
+def test_moon_illumination_matches_scalar_phase():
+    dts = sample_datetimes(seed=1)
+    expected = np.array([min(max(1.0 - abs(moon.phase(d) - 14) / 14.0, 0.0), 1.0) for d in dts])
+    np.testing.assert_allclose(astro.moon_illumination_array(as_times(dts)), expected, atol=1e-9)
+    assert astro.moon_illumination(dts[0]) == pytest.approx(expected[0])
+
+def test_tide_level_matches_compute_tides():
+    dts = sample_datetimes(200, seed=2)
+    expected = np.array([astro.compute_tides(d)["current_level"] for d in dts])
+    np.testing.assert_allclose(astro.tide_level_array(as_times(dts)), expected, atol=1e-9)
+
+def test_low_tide_events_are_tide_minima():
+    t0 = np.datetime64("2024-06-01T00:00:00")
+    _, lows = astro.TIDE_INDEX.events_between(t0, t0 + np.timedelta64(30, "D"))
+    offset = np.timedelta64(10, "m")
+    level = astro.tide_level_array(lows)
+    assert (level <= astro.tide_level_array(lows - offset)).all()
+    assert (level <= astro.tide_level_array(lows + offset)).all()
+
+def test_near_low_tide_matches_event_distance():
+    dts = sample_datetimes(200, seed=3)
+    expected = []
+    for d in dts:
+        _, lows = astro.TIDE_INDEX.events_between(d - timedelta(days=1), d + timedelta(days=1))
+        expected.append(np.abs((lows - np.datetime64(d, "s")).astype(np.int64)).min() <= 2 * 3600)
+    np.testing.assert_array_equal(astro.TIDE_INDEX.near_low_tide(as_times(dts), window_hours=2), expected)
+    assert astro.is_near_low_tide(dts[0]) == expected[0]
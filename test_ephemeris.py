@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+历表夜间判断测试
+一年中约一半时刻为夜间, 当地正午不是夜间, 午夜是夜间
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from ephemeris import Ephemeris
+
+LAT, LON = 32.86, -117.26
+
+@pytest.fixture(scope="module")
+def ephemeris(tmp_path_factory):
+    """在临时目录构建历表, 不写入 data/ephemeris"""
+    return Ephemeris(LAT, LON, directory=str(tmp_path_factory.mktemp("ephemeris")))
+
+def year_times(step_minutes=10):
+    return np.arange(
+        np.datetime64("2024-01-01T00:00"), np.datetime64("2025-01-01T00:00"),
+        np.timedelta64(step_minutes, "m")
+    ).astype("datetime64[s]")
+
+def test_night_fraction_over_year(ephemeris):
+    night = ephemeris.is_night(year_times())
+    assert 0.45 < night.mean() < 0.55
+
+def test_local_noon_is_day_and_midnight_is_night(ephemeris):
+    days = np.arange(np.datetime64("2024-01-01"), np.datetime64("2025-01-01"))
+    # 当地太阳正午约 UTC 19:49, 当地午夜约 UTC 07:49
+    noon = days.astype("datetime64[s]") + np.timedelta64(19 * 3600 + 49 * 60, "s")
+    midnight = days.astype("datetime64[s]") + np.timedelta64(7 * 3600 + 49 * 60, "s")
+    assert not ephemeris.is_night(noon).any()
+    assert ephemeris.is_night(midnight).all()
+
+def test_night_matches_last_sun_event(ephemeris):
+    """夜间 ⇔ 最近一次日落晚于最近一次日出, 且与每日日出/日落时刻一致"""
+    records = ephemeris.lookup(np.datetime64("2024-06-21"))
+    after_sunset = records["sunset"] + np.timedelta64(60, "s")
+    before_sunrise = records["sunrise"] - np.timedelta64(60, "s")
+    after_sunrise = records["sunrise"] + np.timedelta64(60, "s")
+    assert ephemeris.is_night(after_sunset)
+    assert ephemeris.is_night(before_sunrise)
+    assert not ephemeris.is_night(after_sunrise)
+
+def test_scalar_input_returns_scalar(ephemeris):
+    assert ephemeris.is_night(np.datetime64("2024-06-21T20:00")) in (True, False)
+    assert np.ndim(ephemeris.is_night(np.datetime64("2024-06-21T20:00"))) == 0
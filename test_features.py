@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+模型特征测试
+is_night (太阳高度) 一年中约一半为夜间, 当地正午不是夜间; 与历表日出日落一致
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from features import FEATURE_COLS, feature_matrix, night_flags
+from compute_astronomy import EPHEMERIS
+
+# 当地太阳正午约 UTC 19:49, 当地午夜约 UTC 07:49
+NOON_UTC = np.timedelta64(19 * 3600 + 49 * 60, "s")
+MIDNIGHT_UTC = np.timedelta64(7 * 3600 + 49 * 60, "s")
+
+def year_days():
+    return np.arange(np.datetime64("2024-01-01"), np.datetime64("2025-01-01")).astype("datetime64[s]")
+
+def test_night_fraction_over_year():
+    times = np.arange(
+        np.datetime64("2024-01-01T00:00"), np.datetime64("2025-01-01T00:00"), np.timedelta64(10, "m")
+    )
+    assert 0.45 < night_flags(times).mean() < 0.55
+
+def test_local_noon_is_day_and_midnight_is_night():
+    assert not night_flags(year_days() + NOON_UTC).any()
+    assert night_flags(year_days() + MIDNIGHT_UTC).all()
+
+def test_night_flags_agree_with_ephemeris():
+    """太阳高度与历表日出日落只在事件前后几分钟内可能不同"""
+    times = np.arange(
+        np.datetime64("2024-01-01T00:00"), np.datetime64("2025-01-01T00:00"), np.timedelta64(10, "m")
+    ).astype("datetime64[s]")
+    assert (night_flags(times) != EPHEMERIS.is_night(times)).mean() < 0.001
+
+def test_night_flags_broadcast_over_sites():
+    times = year_days()[:10] + NOON_UTC
+    lat = np.array([32.68, 32.86, 32.93])[:, None]
+    lon = np.array([-117.18, -117.26, -117.26])[:, None]
+    assert night_flags(times, lat, lon).shape == (3, 10)
+
+def test_feature_matrix_column_order_and_broadcast():
+    columns = {col: np.full(4, j, dtype=float) for j, col in enumerate(FEATURE_COLS)}
+    columns["is_night"] = np.ones((2, 4), dtype=np.int64)
+    X = feature_matrix(columns)
+    assert X.shape == (8, len(FEATURE_COLS)) and X.dtype == np.float32
+    np.testing.assert_array_equal(X[:, 0], 0.0)
+    np.testing.assert_array_equal(X[:, FEATURE_COLS.index("is_night")], 1.0)
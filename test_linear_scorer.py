@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+线性评分器测试
+LinearScorer (导出的 JSON 系数) 与 sklearn 模型的 predict_proba 一致
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from linear_scorer import LinearScorer, export_linear_model, linear_coefficients
+
+FEATURE_COLS = ["a", "b", "c", "d"]
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=[0.5, 15.0, -1.0, 2.0], scale=[0.3, 2.0, 1.0, 0.5], size=(2000, 4))
+    y = (X[:, 0] - 0.2 * X[:, 1] + X[:, 2] + rng.normal(scale=0.5, size=len(X)) > -3.0).astype(int)
+    return X, y
+
+@pytest.mark.parametrize("make_model", [
+    lambda: LogisticRegression(max_iter=1000),
+    lambda: Pipeline([("scaler", StandardScaler()), ("clf", SGDClassifier(loss="log_loss", random_state=0))]),
+], ids=["logreg", "scaler_sgd"])
+def test_predict_proba_matches_sklearn(tmp_path, data, make_model):
+    X, y = data
+    model = make_model().fit(X, y)
+    path = export_linear_model(model, FEATURE_COLS, path=str(tmp_path / "model.json"))
+    scorer = LinearScorer.load(path)
+    assert scorer.feature_cols == FEATURE_COLS
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X), rtol=1e-9, atol=1e-12)
+
+def test_non_linear_model_is_rejected(data):
+    X, y = data
+    with pytest.raises(ValueError):
+        linear_coefficients(DecisionTreeClassifier(max_depth=2).fit(X, y))
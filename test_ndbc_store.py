@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+NDBC 列式存储测试
+按块入库与块大小无关; 无法解析时间的行被丢弃, 缺测标记替换为 NaN, 全缺测列不入库
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import ndbc_store
+
+N = 5003
+BAD_ROWS = [10, 2000]
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    t = pd.date_range("2020-01-01", periods=N, freq="30min")
+    df = pd.DataFrame({
+        "#YY": t.year.astype(object), "MM": t.month, "DD": t.day, "hh": t.hour, "mm": t.minute,
+        "WVHT": np.where(rng.random(N) < 0.1, 99.0, rng.random(N) * 3),
+        "WTMP": rng.random(N) * 20,
+        "VIS": np.full(N, np.nan),
+    })
+    df.loc[BAD_ROWS, "#YY"] = "yr"
+    path = tmp_path / "ndbc_test.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+def ingest(csv_path, store_dir, chunk_rows, monkeypatch):
+    monkeypatch.setattr(ndbc_store, "CHUNK_ROWS", chunk_rows)
+    return ndbc_store.load_observations(csv_path, str(store_dir))
+
+def test_chunked_ingest_matches_single_chunk(csv_path, tmp_path, monkeypatch):
+    a = ingest(csv_path, tmp_path / "a", 777, monkeypatch)
+    b = ingest(csv_path, tmp_path / "b", N, monkeypatch)
+    assert sorted(a) == sorted(b)
+    for col in b:
+        np.testing.assert_array_equal(np.asarray(a[col]), np.asarray(b[col]), err_msg=col)
+
+def test_ingest_cleans_rows_and_columns(csv_path, tmp_path, monkeypatch):
+    obs = ingest(csv_path, tmp_path / "store", 777, monkeypatch)
+    assert len(obs["timestamp"]) == N - len(BAD_ROWS)
+    assert np.all(np.diff(obs["timestamp"]) > 0)
+    assert "VIS" not in obs
+    wvht = np.asarray(obs["WVHT"])
+    assert np.isnan(wvht).any() and np.nanmax(wvht) < 3
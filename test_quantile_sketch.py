@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+分位数草图测试
+HistogramSketch 的分组分位数与 np.quantile 相差不超过一个分箱宽度, 合并与一次更新相同
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from quantile_sketch import HistogramSketch
+
+QS = (0.1, 0.5, 0.9)
+RESOLUTION = 0.01
+
+def grouped_samples(n_groups=5, n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    groups = rng.integers(0, n_groups, n)
+    values = rng.gamma(2.0, 0.5, n) + groups
+    return groups, values
+
+def test_quantiles_match_numpy():
+    groups, values = grouped_samples()
+    sketch = HistogramSketch(5, 0.0, 20.0, RESOLUTION).update(groups, values)
+    result = sketch.quantiles(QS)
+    for g in range(5):
+        np.testing.assert_allclose(result[g], np.quantile(values[groups == g], QS), atol=RESOLUTION)
+
+def test_merge_equals_single_update():
+    groups, values = grouped_samples()
+    whole = HistogramSketch(5, 0.0, 20.0, RESOLUTION).update(groups, values)
+    half = len(values) // 2
+    merged = HistogramSketch(5, 0.0, 20.0, RESOLUTION).update(groups[:half], values[:half])
+    merged.merge(HistogramSketch(5, 0.0, 20.0, RESOLUTION).update(groups[half:], values[half:]))
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    np.testing.assert_array_equal(merged.count(), np.bincount(groups, minlength=5))
+
+def test_empty_group_and_out_of_range_values():
+    sketch = HistogramSketch(2, 0.0, 1.0, RESOLUTION).update([0, 0, 0], [0.2, np.nan, 5.0])
+    assert sketch.count().tolist() == [1, 0]
+    assert np.isnan(sketch.quantiles(0.5)[1]).all()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+弱监督样本生成测试
+网格抽样 (weak_supervision_grid + weak_supervision_chunk) 与逐行循环在同一随机种子下逐行一致
+"""
+
+import os
+import sys
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import train_model
+from compute_astronomy import compute_tides, moon_illumination
+from darkness import is_sun_down
+from climatology_harmonics import load_climatology_model
+
+N = 300
+SEED = 7
+
+@pytest.fixture(scope="module")
+def climate_doy():
+    with open(train_model.CLIM_FILE, "r") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="module")
+def grid():
+    # DOY 中位值表, 与逐行循环的 wave_height_doy / water_temp_doy 查表相同
+    return train_model.weak_supervision_grid(load_climatology_model(train_model.load_climatology(), "daily"))
+
+def reference_row(day, hour, clim):
+    """逐行计算一个 (日, 小时) 样本"""
+    dt = datetime(2024, 1, 1) + timedelta(days=int(day), hours=int(hour))
+    doy = dt.timetuple().tm_yday
+    moon_illum = moon_illumination(dt)
+    is_night = bool(is_sun_down(np.datetime64(dt, "s")))
+    tide_level = compute_tides(dt)["current_level"]
+    wave_height = float(clim["wave_height_doy"].get(str(doy), 1.0))
+    label = moon_illum < 0.3 and is_night and tide_level < -0.5 and wave_height < 1.2
+    return {
+        "day": day,
+        "moon_illumination": moon_illum,
+        "is_night": int(is_night),
+        "tide_level": tide_level,
+        "wave_height": wave_height,
+        "water_temp": float(clim["water_temp_doy"].get(str(doy), 16.0)),
+        "season_sin": np.sin(2 * np.pi * doy / 365),
+        "label": int(label)
+    }
+
+def test_chunk_matches_row_loop(grid, climate_doy):
+    chunk = train_model.weak_supervision_chunk(N, np.random.default_rng(SEED), grid)
+    rng = np.random.default_rng(SEED)
+    days, hours = rng.integers(0, 365, N), rng.integers(0, 24, N)
+    expected = [reference_row(d, h, climate_doy) for d, h in zip(days, hours)]
+    for col in chunk.columns:
+        np.testing.assert_allclose(
+            chunk[col].to_numpy(dtype=float), [row[col] for row in expected], atol=1e-6, err_msg=col
+        )
+
+def test_labels_only_at_night(grid):
+    label = np.asarray(grid["label"])
+    assert label.any()
+    assert not label[np.asarray(grid["is_night"]) == 0].any()
+
+def test_chunks_are_seeded_and_sized():
+    a = list(train_model.iter_weak_supervision_chunks(2500, chunk_size=1000, seed=SEED))
+    b = list(train_model.iter_weak_supervision_chunks(2500, chunk_size=1000, seed=SEED))
+    assert [len(c) for c in a] == [1000, 1000, 500]
+    for x, y in zip(a, b):
+        assert x.equals(y)